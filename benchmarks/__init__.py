@@ -0,0 +1,5 @@
+"""
+Benchmark and load-test suite for the Shopcart API.
+
+Run `python -m benchmarks.run --help` from the repository root.
+"""
@@ -0,0 +1,71 @@
+"""
+Database round trips and latency of POST /checkout, one order at a time.
+
+    python -m benchmarks.bench_checkout --latency-ms 5
+
+Runs on the in-memory backend with a simulated per-call round-trip delay so
+that the number of *sequential* awaits, not just the number of queries,
+shows up in the timings. Run it on two revisions to compare before/after.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.harness import app_client, boot_app, git_revision
+from benchmarks.load import failed_requests
+from benchmarks.run import scenario_checkout
+from benchmarks.seed import SeedConfig, seed
+
+
+async def run(args) -> dict:
+    app, database, counter = boot_app("memory", latency_ms=args.latency_ms)
+    config = SeedConfig(products=200, users=args.orders, cart_size=args.cart_size, history_size=0)
+
+    async with app_client(app) as client:
+        async with counter.pause():
+            fixture = await seed(database, config)
+        send = await scenario_checkout(client, fixture, args, counter)
+
+        queries, latencies, statuses = [], [], {}
+        for i in range(args.orders):
+            before = counter.count
+            started = time.perf_counter()
+            status = await send(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count - before)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    return {
+        "git_revision": git_revision(),
+        "orders": args.orders,
+        "latency_ms_per_call": args.latency_ms,
+        "queries_per_checkout": statistics.mean(queries),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "status_codes": statuses,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--cart-size", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated database round trip")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    print(
+        f"checkout @ {result['git_revision']}: {result['queries_per_checkout']:.2f} queries/checkout, "
+        f"mean {result['mean_ms']}ms, p50 {result['p50_ms']}ms "
+        f"({args.latency_ms}ms per round trip)  {result['status_codes']}"
+    )
+    if failed_requests(result["status_codes"]):
+        print(f"FAIL {failed_requests(result['status_codes'])} checkouts did not succeed")
+        sys.exit(1)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cold-start cost of the app: how long `import main` takes in a fresh interpreter.
+
+    python -m benchmarks.bench_coldstart
+    python -m benchmarks.bench_coldstart --runs 10 --budget-ms 800 --top 15
+
+Each run imports main in a new process with `-X importtime`, as a serverless
+cold start does, and reports the median wall time together with the
+packages that cost the most. Exits non-zero when the median exceeds
+--budget-ms or when one of the --lazy modules (used by only a few
+requests) was actually executed during import, so a stray top-level
+import shows up in CI instead of in production tail latency.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.harness import ROOT_DIR, configure_environment, git_revision
+
+LAZY_MODULES = ["numpy", "qrcode", "PIL", "smtplib"]
+
+# Runs in the child: time the import, then report which lazy modules were
+# really loaded (a LazyLoader placeholder still has class _LazyModule)
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+names = json.loads(sys.argv[1])
+loaded = [n for n in names if n in sys.modules and type(sys.modules[n]).__name__ != "_LazyModule"]
+print(json.dumps({"import_ms": elapsed * 1000, "loaded": loaded}))
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Self time in microseconds per top-level package from -X importtime output.
+    """
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return totals
+
+
+def run_once(lazy: list) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, json.dumps(lazy)],
+        cwd=ROOT_DIR, env=dict(os.environ), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"importing main failed:\n{result.stderr[-2000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report, parse_importtime(result.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="fail when the median import exceeds this")
+    parser.add_argument("--lazy", default=",".join(LAZY_MODULES), help="modules that must not load at import")
+    parser.add_argument("--top", type=int, default=10, help="packages to list by import cost")
+    args = parser.parse_args(argv)
+
+    configure_environment()
+    lazy = [name.strip() for name in args.lazy.split(",") if name.strip()]
+    timings, loaded, packages = [], set(), defaultdict(list)
+    for _ in range(args.runs):
+        report, totals = run_once(lazy)
+        timings.append(report["import_ms"])
+        loaded.update(report["loaded"])
+        for name, us in totals.items():
+            packages[name].append(us)
+
+    median = statistics.median(timings)
+    print(f"cold start @ {git_revision()} ({args.runs} runs)")
+    print(f"  import main  median {median:.0f}ms  min {min(timings):.0f}ms  max {max(timings):.0f}ms  budget {args.budget_ms:.0f}ms")
+    ranked = sorted(packages.items(), key=lambda kv: -statistics.median(kv[1]))
+    for name, samples in ranked[:args.top]:
+        print(f"  {name:<24} {statistics.median(samples) / 1000:>8.1f}ms")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import {median:.0f}ms is over the {args.budget_ms:.0f}ms budget")
+    if loaded:
+        failures.append(f"loaded at import time: {', '.join(sorted(loaded))}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    return {"median_ms": median, "timings_ms": timings}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Flash-sale contention benchmark: thousands of concurrent buyers, one SKU.
+
+    python -m benchmarks.bench_inventory --buyers 5000 --stock 1000 --shards 1,8
+    python -m benchmarks.bench_inventory --backend mongod --mongo-uri mongodb://localhost:27017
+
+Every buyer calls InventoryService.reserve for the same product at once.
+For each shard count it reports throughput, latency percentiles, how many
+reservations succeeded and the final stock, and fails loudly on overselling.
+On the in-memory backend, `--latency-ms` simulates the network round trip;
+real single-document write contention only shows up against mongod.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.harness import app_client, boot_app, git_revision
+from benchmarks.load import percentile
+
+
+async def flash_sale(service, product_id: str, buyers: int, quantity: int):
+    from fastapi import HTTPException
+
+    latencies = []
+
+    async def buy(n: int) -> bool:
+        started = time.perf_counter()
+        try:
+            await service.reserve(f"bench-{n}", [(product_id, quantity)])
+            return True
+        except HTTPException as e:
+            if e.status_code != 409:
+                raise
+            return False
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(buy(n) for n in range(buyers)))
+    elapsed = time.perf_counter() - started
+    return sum(outcomes), elapsed, sorted(latencies)
+
+
+async def run(args) -> list:
+    app, database, counter = boot_app(args.backend, args.mongo_uri, latency_ms=args.latency_ms)
+    from services.inventory_service import InventoryService
+
+    service = InventoryService()
+    results = []
+    async with app_client(app):
+        for shards in [int(s) for s in args.shards.split(",")]:
+            product_id = f"flash-sale-{shards}"
+            async with counter.pause():
+                await service.set_stock(product_id, args.stock, shards=shards)
+
+            before = counter.count
+            sold, elapsed, latencies = await flash_sale(service, product_id, args.buyers, args.quantity)
+            queries = counter.count - before
+            remaining = await service.get_stock(product_id)
+
+            expected = min(args.buyers, args.stock // args.quantity)
+            if sold * args.quantity + remaining != args.stock or remaining < 0:
+                raise SystemExit(f"stock mismatch: sold {sold} x {args.quantity}, {remaining} left of {args.stock}")
+            results.append({
+                "shards": shards,
+                "buyers": args.buyers,
+                "stock": args.stock,
+                "sold": sold,
+                "expected_sold": expected,
+                "remaining": remaining,
+                "throughput_rps": round(args.buyers / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "queries_per_buyer": round(queries / args.buyers, 2),
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["memory", "mongod"], default="memory")
+    parser.add_argument("--mongo-uri", default=None)
+    parser.add_argument("--buyers", type=int, default=5000)
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--shards", default="1,8", help="comma-separated shard counts to compare")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    print(f"flash sale @ {git_revision()}: {args.buyers} buyers, {args.stock} units")
+    for r in results:
+        print(
+            f"  shards={r['shards']:<3} sold {r['sold']:>6}/{r['expected_sold']:<6} left {r['remaining']:>5}  "
+            f"{r['throughput_rps']:>9.1f} buyers/s  p50 {r['p50_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms  "
+            f"q/buyer {r['queries_per_buyer']:.2f}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Before/after microbenchmark for the response layer.
+
+    python -m benchmarks.bench_serialization --items 100
+
+"before" is what FastAPI did for these handlers: jsonable_encoder + json.dumps
+for raw search documents, and response_model re-validation + serialisation for
+handler-built models. "after" is utils.responses (orjson / compiled
+serializers, no second validation).
+"""
+import argparse
+import asyncio
+import json
+import random
+import timeit
+
+from benchmarks.harness import configure_environment
+from benchmarks.seed import make_product
+
+
+def search_page(items: int) -> dict:
+    rng = random.Random(7)
+    products = []
+    for i in range(items):
+        doc = make_product(rng, i, 6)
+        doc["_id"] = f"{i:024x}"
+        doc["Product Photo"] = doc["Product Photo"].split("\n")
+        products.append(doc)
+    return {
+        "page": 1, "limit": items, "total_products": items * 40, "max_pages": 40,
+        "has_next": True, "has_prev": False, "products": products,
+    }
+
+
+def cart_model(items: int):
+    from models.cart import CartProduct, CartResponse, CartTotals
+
+    cart = [
+        CartProduct(
+            product_id=f"{i:024x}",
+            name=f"Product {i}",
+            price=999.0 + i,
+            quantity=1 + i % 3,
+            image_urls=[f"https://images.example.com/products/{i}/{n}.jpg" for n in range(4)],
+        )
+        for i in range(items)
+    ]
+    return CartResponse(cart=cart, totals=CartTotals(subtotal=1.0, delivery_fee=0.0, total=1.0))
+
+
+def measure(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    configure_environment()
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from models.cart import CartResponse
+    from utils.responses import ModelResponse, ORJSONResponse
+
+    page = search_page(args.items)
+    cart = cart_model(args.items)
+    cart_field = create_model_field("Response_get_cart", CartResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def search_before():
+        return JSONResponse(jsonable_encoder(page)).body
+
+    def search_after():
+        return ORJSONResponse(page).body
+
+    def cart_before():
+        content = loop.run_until_complete(serialize_response(field=cart_field, response_content=cart))
+        return JSONResponse(content).body
+
+    def cart_after():
+        return ModelResponse(cart).body
+
+    assert json.loads(search_before()) == json.loads(search_after())
+    assert json.loads(cart_before()) == json.loads(cart_after())
+
+    report = {}
+    for name, before, after in [
+        (f"search page ({args.items} products)", search_before, search_after),
+        (f"cart response ({args.items} lines)", cart_before, cart_after),
+    ]:
+        b = measure(before, args.number)
+        a = measure(after, args.number)
+        report[name] = {"before_us": round(b, 1), "after_us": round(a, 1), "speedup": round(b / a, 2)}
+        print(f"{name:<32} before {b:>9.1f}us  after {a:>9.1f}us  x{b / a:.2f}")
+    loop.close()
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Payment webhook ingestion under a sale-peak burst.
+
+    python -m benchmarks.bench_webhooks --events 500 --latency-ms 2
+    python -m benchmarks.bench_webhooks --backend mongod --events 20000
+
+Creates pending-payment orders, then fires signed provider callbacks at
+POST /payment/webhook concurrently (with a share of duplicate deliveries
+and failed payments). Compares the buffered endpoint against applying
+each event on its own, as a one-update-per-request handler would, and
+checks every order ended in the right state. The in-memory backend has no
+indexes, so its absolute throughput is dominated by collection scans; the
+queries-per-event figure is what carries over. Use mongod for real rates.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import orjson
+
+from benchmarks.harness import app_client, boot_app, git_revision
+from benchmarks.load import percentile
+
+WEBHOOK_PATH = "/payment/webhook"
+
+
+def make_orders(count: int):
+    created = datetime.utcnow() - timedelta(minutes=1)
+    return [
+        {
+            "order_id": f"BENCH{i:06d}",
+            "email": f"bench{i % 200}@example.com",
+            "status": "pending_payment",
+            "payment": {"status": "pending", "payment_id": f"pay_bench_{i:06d}"},
+            "shipping": {"status": "pending"},
+            "created_at": created,
+            "updated_at": created,
+        }
+        for i in range(count)
+    ]
+
+
+def make_events(orders, duplicate_rate: float, failure_rate: float, rng: random.Random):
+    events = []
+    for order in orders:
+        failed = rng.random() < failure_rate
+        event = {
+            "id": f"evt_{uuid.uuid4().hex}",
+            "type": "payment.failed" if failed else "payment.succeeded",
+            "payment_id": order["payment"]["payment_id"],
+            "order_id": order["order_id"],
+            "transaction_id": f"txn_{uuid.uuid4().hex[:10]}",
+        }
+        events.append(event)
+        if rng.random() < duplicate_rate:
+            events.append(event)
+    rng.shuffle(events)
+    return events
+
+
+async def run_mode(mode: str, client, database, counter, args):
+    from config import PAYMENT_WEBHOOK_SECRET
+    from models.payment import PaymentWebhookEvent
+    from services.payment_event_service import PaymentEventService
+    from utils.signing import sign_webhook
+
+    rng = random.Random(args.seed)
+    async with counter.pause():
+        await database.orders_collection.delete_many({"order_id": {"$regex": "^BENCH"}})
+        await database.payment_events_collection.delete_many({})
+        orders = make_orders(args.events)
+        await database.orders_collection.insert_many(orders)
+    events = make_events(orders, args.duplicate_rate, args.failure_rate, rng)
+
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def deliver(event):
+        async with semaphore:
+            started = time.perf_counter()
+            if mode == "buffered":
+                body = orjson.dumps(event)
+                ts = int(time.time())
+                r = await client.post(WEBHOOK_PATH, content=body, headers={
+                    "Content-Type": "application/json",
+                    "X-Webhook-Timestamp": str(ts),
+                    "X-Webhook-Signature": sign_webhook(body, ts, PAYMENT_WEBHOOK_SECRET),
+                })
+                assert r.status_code == 200, r.text
+            else:
+                await PaymentEventService().process([PaymentWebhookEvent.model_validate(event)])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(deliver(e) for e in events))
+    elapsed = time.perf_counter() - started
+    queries = counter.count - before
+
+    async with counter.pause():
+        expected = {e["order_id"]: ("payment_failed" if e["type"] == "payment.failed" else "confirmed") for e in events}
+        wrong = 0
+        async for order in database.orders_collection.find({"order_id": {"$regex": "^BENCH"}}, {"order_id": 1, "status": 1}):
+            wrong += order["status"] != expected[order["order_id"]]
+        if wrong:
+            raise SystemExit(f"{mode}: {wrong} orders in the wrong state")
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "deliveries": len(events),
+        "throughput_eps": round(len(events) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "queries_per_event": round(queries / len(events), 3),
+    }
+
+
+async def run(args):
+    app, database, counter = boot_app(args.backend, args.mongo_uri, latency_ms=args.latency_ms)
+    results = []
+    async with app_client(app) as client:
+        for mode in ("per-event", "buffered"):
+            results.append(await run_mode(mode, client, database, counter, args))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["memory", "mongod"], default="memory")
+    parser.add_argument("--mongo-uri", default=None)
+    parser.add_argument("--events", type=int, default=500, help="orders, one callback each")
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated database round trip")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    print(f"payment webhooks @ {git_revision()}")
+    for r in results:
+        print(
+            f"  {r['mode']:<10} {r['deliveries']:>6} deliveries  {r['throughput_eps']:>9.1f} events/s  "
+            f"p50 {r['p50_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms  q/event {r['queries_per_event']:.3f}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Throughput of the hot read endpoints as the worker count grows.
+
+    python -m benchmarks.bench_workers --workers 1,2,4
+    python -m benchmarks.bench_workers --backend mongod --workers 1,2,4,8 --requests 20000
+
+Starts the production launcher (serve.py) for each worker count, drives it
+over real TCP from several client processes so the load generator is not
+the bottleneck, and reports requests/s and the speedup over one worker.
+With the in-memory backend every worker seeds its own copy of the
+catalog (see benchmarks/worker_app.py); with mongod they share one
+database, seeded once here. Scaling is bounded by the cores available:
+run on a machine with at least as many cores as the largest worker count
+plus the client processes.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.harness import ROOT_DIR, configure_environment, git_revision
+from benchmarks.load import failed_requests, summarize
+from benchmarks.seed import SEARCH_TERMS
+
+SCENARIOS = ["ping", "search", "search_hot"]
+
+
+def scenario_requests(name: str, count: int, seed: int):
+    rng = random.Random(seed)
+    if name == "ping":
+        return [("/ping", None)] * count
+    if name == "search_hot":
+        return [("/search/api/v1/search/", {"page": 1, "limit": 20, "brand": SEARCH_TERMS[0], "sort_by": "price"})] * count
+    requests = []
+    for _ in range(count):
+        params = {"page": rng.randint(1, 5), "limit": 20}
+        if rng.random() < 0.6:
+            params["brand"] = rng.choice(SEARCH_TERMS)
+        if rng.random() < 0.5:
+            params["sort_by"] = rng.choice(["price", "rating"])
+        requests.append(("/search/api/v1/search/", params))
+    return requests
+
+
+def client_process(base_url: str, requests: list, concurrency: int):
+    """
+    One load-generating process: returns (latencies, status counts).
+    """
+    import httpx
+
+    async def run():
+        latencies, statuses = [], Counter()
+        queue = list(reversed(requests))
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            async def worker():
+                while queue:
+                    path, params = queue.pop()
+                    started = time.perf_counter()
+                    try:
+                        status = (await client.get(path, params=params)).status_code
+                    except httpx.HTTPError:
+                        status = "error"
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, statuses
+
+    return asyncio.run(run())
+
+
+def wait_ready(base_url: str, timeout: float = 120):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ping", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"server at {base_url} did not come up within {timeout}s")
+
+
+def start_server(workers: int, args) -> subprocess.Popen:
+    env = dict(os.environ)
+    if args.backend == "memory":
+        app = "benchmarks.worker_app:app"
+        env["BENCH_PRODUCTS"] = str(args.products)
+    else:
+        app = "main:app"
+        env["MONGO_URI"] = args.mongo_uri
+    return subprocess.Popen(
+        [sys.executable, "serve.py", "--app", app, "--workers", str(workers),
+         "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env
+    )
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def seed_mongod(args):
+    from benchmarks.harness import boot_app
+    from benchmarks.seed import SeedConfig, seed
+
+    _, database, _ = boot_app("mongod", args.mongo_uri)
+    await seed(database, SeedConfig(products=args.products, users=10, history_size=0))
+
+
+def run_scenario(name: str, base_url: str, args) -> dict:
+    requests = scenario_requests(name, args.requests, args.seed)
+    per_client = [requests[i::args.clients] for i in range(args.clients)]
+    concurrency = max(1, args.concurrency // args.clients)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.clients) as pool:
+        started = time.perf_counter()
+        results = pool.starmap(client_process, [(base_url, chunk, concurrency) for chunk in per_client])
+        elapsed = time.perf_counter() - started
+    latencies, statuses = [], Counter()
+    for lat, st in results:
+        latencies.extend(lat)
+        statuses.update(st)
+    return summarize(name, latencies, statuses, elapsed, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "mongod"], default="memory")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="comma-separated worker counts")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=4000, help="per scenario and worker count")
+    parser.add_argument("--concurrency", type=int, default=64, help="open connections across all clients")
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1), help="load-generating processes")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    configure_environment()
+    if args.backend == "mongod":
+        asyncio.run(seed_mongod(args))
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    worker_counts = sorted({int(n) for n in args.workers.split(",")})
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    results = {}
+    for workers in worker_counts:
+        server = start_server(workers, args)
+        try:
+            wait_ready(base_url)
+            run_scenario("ping", base_url, argparse.Namespace(**{**vars(args), "requests": 200}))  # warm up
+            for name in scenarios:
+                results[(name, workers)] = run_scenario(name, base_url, args)
+        finally:
+            stop_server(server)
+
+    print(f"worker scaling @ {git_revision()} ({args.backend}, {os.cpu_count()} cpus, {args.clients} client processes)")
+    failed = False
+    for name in scenarios:
+        baseline = results[(name, worker_counts[0])]["throughput_rps"]
+        for workers in worker_counts:
+            r = results[(name, workers)]
+            errors = failed_requests(r["status_codes"])
+            failed |= bool(errors)
+            print(
+                f"  {name:<11} {workers:>3} workers  {r['throughput_rps']:>9.1f} req/s  "
+                f"x{r['throughput_rps'] / baseline:>5.2f}  p50 {r['latency_ms']['p50']:>7.2f}ms  "
+                f"p99 {r['latency_ms']['p99']:>7.2f}ms  non-2xx {errors}"
+            )
+    if failed:
+        print("FAIL non-2xx responses: the numbers above are not the endpoints' throughput")
+        sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compare two saved benchmark runs scenario by scenario.
+
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(old: float, new: float) -> str:
+    if not old:
+        return "    n/a"
+    return f"{(new - old) / old * 100:+7.1f}%"
+
+
+def compare(old: dict, new: dict):
+    print(f"baseline {old['meta']['git_revision']}  vs  candidate {new['meta']['git_revision']}")
+    old_results = {r["scenario"]: r for r in old["results"]}
+    for result in new["results"]:
+        name = result["scenario"]
+        before = old_results.get(name)
+        if not before:
+            print(f"{name:<10} (no baseline)")
+            continue
+        print(
+            f"{name:<10} "
+            f"req/s {before['throughput_rps']:>9.1f} -> {result['throughput_rps']:>9.1f} "
+            f"{change(before['throughput_rps'], result['throughput_rps'])}  "
+            f"p95 {before['latency_ms']['p95']:>8.2f} -> {result['latency_ms']['p95']:>8.2f}ms "
+            f"{change(before['latency_ms']['p95'], result['latency_ms']['p95'])}  "
+            f"q/req {before['queries_per_request']:>6.2f} -> {result['queries_per_request']:>6.2f}"
+        )
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        raise SystemExit("usage: python -m benchmarks.compare OLD.json NEW.json")
+    compare(load(argv[0]), load(argv[1]))
+
+
+if __name__ == "__main__":
+    main()
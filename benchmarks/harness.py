@@ -0,0 +1,203 @@
+import os
+import sys
+import importlib
+import subprocess
+from contextlib import asynccontextmanager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Commands that belong to connection management rather than to a handler's
+# own work. They are not counted as queries.
+IGNORED_COMMANDS = {
+    "hello", "ismaster", "isMaster", "ping", "buildinfo", "buildInfo",
+    "endSessions", "saslStart", "saslContinue", "killCursors",
+}
+
+# Collection methods that cost one round trip to the server.
+COUNTED_METHODS = [
+    "aggregate",
+    "bulk_write",
+    "count_documents",
+    "delete_many",
+    "delete_one",
+    "distinct",
+    "estimated_document_count",
+    "find",
+    "find_one",
+    "find_one_and_delete",
+    "find_one_and_replace",
+    "find_one_and_update",
+    "insert_many",
+    "insert_one",
+    "replace_one",
+    "update_many",
+    "update_one",
+]
+
+
+class QueryCounter:
+    """
+    Counts database round trips issued by the application.
+    Against a real mongod this listens to pymongo command events; against the
+    in-memory backend it wraps the Motor-compatible collection methods.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.paused = False
+
+    def hit(self):
+        if not self.paused:
+            self.count += 1
+
+    @asynccontextmanager
+    async def pause(self):
+        self.paused = True
+        try:
+            yield
+        finally:
+            self.paused = False
+
+    def install_command_listener(self):
+        from pymongo import monitoring
+
+        counter = self
+
+        class _Listener(monitoring.CommandListener):
+            def started(self, event):
+                if event.command_name not in IGNORED_COMMANDS:
+                    counter.hit()
+
+            def succeeded(self, event):
+                pass
+
+            def failed(self, event):
+                pass
+
+        monitoring.register(_Listener())
+
+    def install_mock_wrappers(self, collection_cls, latency_ms: float = 0.0):
+        """
+        `latency_ms` delays every awaited call to emulate a network round
+        trip, so sequential and concurrent awaits show up in wall time.
+        """
+        import asyncio
+        import inspect
+
+        counter = self
+
+        async def delayed(result):
+            await asyncio.sleep(latency_ms / 1000)
+            return await result
+
+        def wrap(method):
+            def wrapper(*args, **kwargs):
+                counter.hit()
+                result = method(*args, **kwargs)
+                if latency_ms and inspect.isawaitable(result):
+                    return delayed(result)
+                return result
+            return wrapper
+
+        for name in COUNTED_METHODS:
+            method = getattr(collection_cls, name, None)
+            if method is not None:
+                setattr(collection_cls, name, wrap(method))
+
+
+def configure_environment():
+    """
+    Provide the settings config.py expects so the app can boot without a .env.
+    """
+    os.environ.setdefault("ACCESS_SECRET_KEY", "bench-access-secret")
+    os.environ.setdefault("REFRESH_SECRET_KEY", "bench-refresh-secret")
+    os.environ.setdefault("ACCESS_EXPIRE_MINUTES", "360")
+    # All load comes from one client IP and a few seeded accounts; limits
+    # sized for real users would turn most of it into 429s and 503s
+    for name, value in {
+        "IP_RATE_PER_MINUTE": "100000000", "IP_RATE_BURST": "1000000",
+        "ACCOUNT_RATE_PER_MINUTE": "100000000", "ACCOUNT_RATE_BURST": "1000000",
+        "OTP_RATE_PER_HOUR": "100000000", "OTP_RATE_BURST": "1000000",
+        "AUTH_MAX_QUEUE": "100000", "OTP_MAX_QUEUE": "100000", "CHECKOUT_MAX_QUEUE": "100000",
+        "ADMISSION_QUEUE_TIMEOUT_MS": "600000",
+    }.items():
+        os.environ.setdefault(name, value)
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+
+
+def patch_mongomock_bulk():
+    """
+    pymongo >= 4.11 passes `sort=` to bulk update/replace builders, which
+    mongomock predates. Drop it (the app never sorts bulk updates).
+    """
+    from mongomock.collection import BulkOperationBuilder
+
+    def drop_sort(method):
+        def wrapper(self, *args, sort=None, **kwargs):
+            return method(self, *args, **kwargs)
+        return wrapper
+
+    for name in ("add_update", "add_replace"):
+        setattr(BulkOperationBuilder, name, drop_sort(getattr(BulkOperationBuilder, name)))
+
+
+def boot_app(backend: str = "memory", mongo_uri: str = None, latency_ms: float = 0.0):
+    """
+    Import `main:app` in-process against the selected database backend.
+
+    `memory` swaps Motor for mongomock-motor before `database` is imported,
+    `mongod` points MONGO_URI at a local (or given) mongod instance.
+    `latency_ms` adds a simulated round-trip delay to the memory backend.
+    Returns (app, database_module, QueryCounter).
+    """
+    configure_environment()
+    counter = QueryCounter()
+
+    if "database" in sys.modules:
+        raise RuntimeError("boot_app() must run before the application is imported")
+
+    if backend == "memory":
+        try:
+            import mongomock_motor
+        except ImportError:
+            raise SystemExit(
+                "The in-memory backend needs mongomock-motor: "
+                "pip install -r benchmarks/requirements.txt"
+            )
+        import motor.motor_asyncio
+
+        motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+        patch_mongomock_bulk()
+        counter.install_mock_wrappers(mongomock_motor.AsyncMongoMockCollection, latency_ms)
+    elif backend == "mongod":
+        os.environ["MONGO_URI"] = mongo_uri or os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017")
+        counter.install_command_listener()
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    database = importlib.import_module("database")
+    main = importlib.import_module("main")
+    return main.app, database, counter
+
+
+@asynccontextmanager
+async def app_client(app):
+    """
+    Run the app lifespan and yield an httpx client bound to it in-process.
+    """
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
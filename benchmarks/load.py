@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(name: str, latencies: List[float], statuses: Counter, elapsed: float, queries: int) -> Dict:
+    latencies = sorted(latencies)
+    total = len(latencies)
+    return {
+        "scenario": name,
+        "requests": total,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / total * 1000, 3) if total else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if total else 0.0,
+        },
+        "queries_per_request": round(queries / total, 3) if total else 0.0,
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+def failed_requests(status_codes: Dict) -> int:
+    """
+    Responses outside 2xx. A 429 or 503 means the run measured the rate
+    limiter or admission queue, not the endpoint.
+    """
+    return sum(n for code, n in status_codes.items() if not str(code).startswith("2"))
+
+
+async def run_load(
+    name: str,
+    send: Callable[[int], Awaitable[int]],
+    requests: int,
+    concurrency: int,
+    counter=None,
+) -> Dict:
+    """
+    Drive `send(i)` for i in range(requests) from `concurrency` workers.
+    `send` returns the HTTP status code; latency is measured around it.
+    """
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                status = await send(i)
+            except Exception:
+                status = "error"
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    queries_before = counter.count if counter else 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    queries = (counter.count - queries_before) if counter else 0
+
+    return summarize(name, latencies, statuses, elapsed, queries)
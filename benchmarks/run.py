@@ -0,0 +1,267 @@
+"""
+Load-test the hot endpoints in-process and save the results as JSON.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --backend mongod --mongo-uri mongodb://localhost:27017
+    python -m benchmarks.run --scenarios search,cart --requests 2000 --concurrency 64
+
+Compare two saved runs with `python -m benchmarks.compare old.json new.json`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+from datetime import datetime
+
+from benchmarks.harness import ROOT_DIR, app_client, boot_app, git_revision
+from benchmarks.load import failed_requests, run_load
+from benchmarks.seed import SEARCH_TERMS, SeedConfig, reset_carts, seed
+
+PATHS = {
+    "search": "/search/api/v1/search/",
+    "cart": "/cart/api/v1/cart/",
+    "wishlist": "/wishlist/api/v1/wishlist/",
+    "history": "/history/api/v1/history/filter",
+    "login": "/auth/api/v1/auth/login",
+    "checkout": "/checkout/api/v1/checkout/",
+}
+
+DEFAULT_SCENARIOS = ["search", "search_hot", "cart", "wishlist", "history", "login", "checkout"]
+
+
+def auth(fixture, i: int) -> dict:
+    return {"Authorization": f"Bearer {fixture.tokens[i % len(fixture.tokens)]}"}
+
+
+async def scenario_search(client, fixture, args, counter):
+    rng = random.Random(args.seed)
+    queries = []
+    for _ in range(256):
+        params = {"page": rng.randint(1, 5), "limit": args.page_size}
+        if rng.random() < 0.6:
+            params["brand"] = rng.choice(SEARCH_TERMS)
+        if rng.random() < 0.3:
+            params["min_price"] = rng.randrange(5000, 50000, 5000)
+            params["max_price"] = params["min_price"] + 40000
+        if rng.random() < 0.5:
+            params["sort_by"] = rng.choice(["price", "rating"])
+        queries.append(params)
+
+    async def send(i):
+        r = await client.get(PATHS["search"], params=queries[i % len(queries)])
+        return r.status_code
+
+    return send
+
+
+async def scenario_search_hot(client, fixture, args, counter):
+    """
+    Every client asks for the same page at once, as during a sale.
+    """
+    params = {"page": 1, "limit": args.page_size, "brand": SEARCH_TERMS[0], "sort_by": "price"}
+
+    async def send(i):
+        r = await client.get(PATHS["search"], params=params)
+        return r.status_code
+
+    return send
+
+
+async def scenario_cart(client, fixture, args, counter):
+    async def send(i):
+        r = await client.get(PATHS["cart"], headers=auth(fixture, i))
+        return r.status_code
+
+    return send
+
+
+async def scenario_wishlist(client, fixture, args, counter):
+    async def send(i):
+        r = await client.get(PATHS["wishlist"], headers=auth(fixture, i))
+        return r.status_code
+
+    return send
+
+
+async def scenario_history(client, fixture, args, counter):
+    brands = [None, None, "a", "sam", "pro"]
+
+    async def send(i):
+        params = {}
+        brand = brands[i % len(brands)]
+        if brand:
+            params["brand"] = brand
+        r = await client.get(PATHS["history"], params=params, headers=auth(fixture, i))
+        return r.status_code
+
+    return send
+
+
+async def scenario_login(client, fixture, args, counter):
+    async def send(i):
+        email = fixture.emails[i % len(fixture.emails)]
+        r = await client.post(PATHS["login"], json={"email": email, "password": fixture.password})
+        return r.status_code
+
+    return send
+
+
+async def scenario_checkout(client, fixture, args, counter):
+    """
+    Each checkout consumes one user's cart, so every request uses a different
+    user and the carts are restored (untimed, uncounted) beforehand. The
+    client-side pricing comes from GET /cart exactly as a real client would.
+    """
+    import database
+
+    bodies = []
+    async with counter.pause():
+        await reset_carts(database, fixture)
+        for i, email in enumerate(fixture.emails):
+            r = await client.get(PATHS["cart"], headers=auth(fixture, i))
+            body = r.json() if r.status_code == 200 else {}
+            totals = body.get("totals") or {"subtotal": 0.0, "delivery_fee": 0.0, "total": 0.0}
+            bodies.append({
+                "customer_info": {"name": f"Bench User {i}", "email": email, "phone": f"9{i:09d}"},
+                "shipping_address": {
+                    "full_name": f"Bench User {i}",
+                    "mobile": f"9{i:09d}",
+                    "address_line_1": "1 Benchmark Street",
+                    "city": "Bengaluru",
+                    "state": "Karnataka",
+                    "pincode": "560001",
+                },
+                "pricing": totals,
+                "delivery_option": "standard",
+                "payment_method": "cod",
+                "payment_data": {"confirm": True},
+                "quote": body.get("quote"),
+            })
+
+    async def send(i):
+        r = await client.post(PATHS["checkout"], json=bodies[i], headers=auth(fixture, i))
+        return r.status_code
+
+    return send
+
+
+SCENARIOS = {
+    "search": scenario_search,
+    "search_hot": scenario_search_hot,
+    "cart": scenario_cart,
+    "wishlist": scenario_wishlist,
+    "history": scenario_history,
+    "login": scenario_login,
+    "checkout": scenario_checkout,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Shopcart API load benchmark")
+    parser.add_argument("--backend", choices=["memory", "mongod"], default="memory")
+    parser.add_argument("--mongo-uri", default=None, help="disposable mongod; its shop collections are wiped")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="login is bcrypt-bound")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--cart-size", type=int, default=5)
+    parser.add_argument("--wishlist-size", type=int, default=10)
+    parser.add_argument("--history-size", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="JSON output path")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> dict:
+    app, database, counter = boot_app(args.backend, args.mongo_uri)
+    config = SeedConfig(
+        products=args.products,
+        users=args.users,
+        cart_size=args.cart_size,
+        wishlist_size=args.wishlist_size,
+        history_size=args.history_size,
+        random_seed=args.seed,
+    )
+
+    results = []
+    async with app_client(app) as client:
+        async with counter.pause():
+            if args.backend == "mongod":
+                for collection in (database.products_collection, database.users_collection, database.orders_collection):
+                    await collection.delete_many({})
+            fixture = await seed(database, config)
+
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            if name not in SCENARIOS:
+                raise SystemExit(f"Unknown scenario: {name}")
+            send = await SCENARIOS[name](client, fixture, args, counter)
+            requests = args.requests
+            if name == "login":
+                requests = args.login_requests
+            elif name == "checkout":
+                requests = min(args.requests, len(fixture.emails))
+            result = await run_load(name, send, requests, args.concurrency, counter)
+            metrics = await client.get("/metrics")
+            if metrics.status_code == 200:
+                result["app_metrics"] = metrics.json()
+            results.append(result)
+            print_result(result)
+
+    return {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "concurrency": args.concurrency,
+            "seed": vars(config),
+        },
+        "results": results,
+    }
+
+
+def print_result(result: dict):
+    lat = result["latency_ms"]
+    print(
+        f"{result['scenario']:<10} {result['requests']:>6} req "
+        f"{result['throughput_rps']:>9.1f} req/s  "
+        f"p50 {lat['p50']:>8.2f}ms  p95 {lat['p95']:>8.2f}ms  p99 {lat['p99']:>8.2f}ms  "
+        f"q/req {result['queries_per_request']:>6.2f}  {result['status_codes']}"
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+
+    output = args.output
+    if not output:
+        results_dir = os.path.join(ROOT_DIR, "benchmarks", "results")
+        os.makedirs(results_dir, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(results_dir, f"{stamp}-{report['meta']['git_revision']}.json")
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {output}")
+
+    # Throughput of failed requests is not the endpoint's throughput
+    failures = [
+        f"{result['scenario']}: {failed_requests(result['status_codes'])} non-2xx responses {result['status_codes']}"
+        for result in report["results"] if failed_requests(result["status_codes"])
+    ]
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+import bcrypt
+from bson import ObjectId
+
+BENCH_PASSWORD = "bench-password"
+
+BRANDS = ["Apple", "Samsung", "Xiaomi", "OnePlus", "Realme", "Vivo", "OPPO", "Motorola", "Nokia", "Google"]
+COLORS = ["Black", "Blue", "Silver", "Green", "Red", "White", "Gold", "Purple"]
+MEMORY = ["4 GB", "6 GB", "8 GB", "12 GB"]
+STORAGE = ["64 GB", "128 GB", "256 GB", "512 GB"]
+SEARCH_TERMS = BRANDS + ["Galaxy", "Note", "Pro", "Max"]
+
+
+@dataclass
+class SeedConfig:
+    products: int = 2000
+    users: int = 200
+    cart_size: int = 5
+    wishlist_size: int = 10
+    history_size: int = 50
+    photos_per_product: int = 4
+    random_seed: int = 42
+
+
+@dataclass
+class Fixture:
+    config: SeedConfig
+    product_ids: List[str] = field(default_factory=list)
+    emails: List[str] = field(default_factory=list)
+    tokens: List[str] = field(default_factory=list)
+    password: str = BENCH_PASSWORD
+
+
+def make_product(rng: random.Random, index: int, photos: int) -> dict:
+    brand = rng.choice(BRANDS)
+    model = f"{rng.choice(['Galaxy', 'Note', 'Pro', 'Max', 'Lite', 'Neo'])} {index % 97}"
+    original = rng.randrange(6000, 150000, 100)
+    selling = original - rng.randrange(0, original // 3, 100)
+    return {
+        "Name": f"{brand} {model}",
+        "Brand": brand,
+        "Model": model,
+        "Color": rng.choice(COLORS),
+        "Memory": rng.choice(MEMORY),
+        "Storage": rng.choice(STORAGE),
+        "Rating": round(rng.uniform(2.5, 5.0), 1),
+        "Original Price": original,
+        "Selling Price": selling,
+        "Product Photo": "\n".join(
+            f"https://images.example.com/products/{index}/{n}.jpg" for n in range(photos)
+        ),
+    }
+
+
+def make_user(rng: random.Random, index: int, product_ids: List[str], config: SeedConfig, hashed_pw: str) -> dict:
+    now = datetime.utcnow()
+    cart_ids = rng.sample(product_ids, min(config.cart_size, len(product_ids)))
+    wishlist_ids = rng.sample(product_ids, min(config.wishlist_size, len(product_ids)))
+    history = [
+        {
+            "product_id": rng.choice(product_ids),
+            "viewed_at": now - timedelta(minutes=config.history_size - n),
+        }
+        for n in range(config.history_size)
+    ]
+    return {
+        "name": f"Bench User {index}",
+        "email": f"bench{index}@example.com",
+        "phone": f"9{index:09d}",
+        "hashed_password": hashed_pw,
+        "refresh_token": None,
+        "cart": [{"product_id": pid, "quantity": rng.randint(1, 3)} for pid in cart_ids],
+        "wishlist": wishlist_ids,
+        "cards": [],
+        "history": history,
+        "created_at": now,
+    }
+
+
+async def seed(database, config: SeedConfig) -> Fixture:
+    """
+    Populate the catalog and user collections with synthetic data.
+    The bcrypt hash is computed once and shared so seeding stays fast.
+    """
+    from utils.tokens import create_access_token
+
+    rng = random.Random(config.random_seed)
+    fixture = Fixture(config=config)
+
+    products = []
+    for i in range(config.products):
+        doc = make_product(rng, i, config.photos_per_product)
+        doc["_id"] = ObjectId()
+        products.append(doc)
+    if products:
+        await database.products_collection.insert_many(products)
+    fixture.product_ids = [str(p["_id"]) for p in products]
+
+    hashed_pw = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt()).decode()
+    users = [make_user(rng, i, fixture.product_ids, config, hashed_pw) for i in range(config.users)]
+    # Wishlists live in their own collection, most recently added last
+    now = datetime.utcnow()
+    wishlist = []
+    for user in users:
+        product_ids = user.pop("wishlist")
+        wishlist += [
+            {"email": user["email"], "product_id": pid, "added_at": now - timedelta(minutes=len(product_ids) - n)}
+            for n, pid in enumerate(product_ids)
+        ]
+    if users:
+        await database.users_collection.insert_many(users)
+    if wishlist:
+        await database.wishlists_collection.insert_many(wishlist)
+    fixture.emails = [u["email"] for u in users]
+    fixture.tokens = [create_access_token({"sub": email}) for email in fixture.emails]
+
+    return fixture
+
+
+async def reset_carts(database, fixture: Fixture):
+    """
+    Restore every seeded cart, e.g. after a checkout scenario emptied them.
+    """
+    rng = random.Random(fixture.config.random_seed + 1)
+    for email in fixture.emails:
+        cart_ids = rng.sample(fixture.product_ids, min(fixture.config.cart_size, len(fixture.product_ids)))
+        await database.users_collection.update_one(
+            {"email": email},
+            {"$set": {"cart": [{"product_id": pid, "quantity": rng.randint(1, 3)} for pid in cart_ids]}}
+        )
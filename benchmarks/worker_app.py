@@ -0,0 +1,25 @@
+"""
+ASGI app for bench_workers' in-memory backend. Every worker process boots
+the app against its own mongomock store and seeds the same synthetic
+catalog before serving, so read endpoints answer identically from any
+worker. Not for writes: workers do not share state.
+"""
+import os
+from contextlib import asynccontextmanager
+
+from benchmarks.harness import boot_app
+from benchmarks.seed import SeedConfig, seed
+
+app, database, _ = boot_app("memory")
+_app_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def seeded_lifespan(app_):
+    config = SeedConfig(products=int(os.getenv("BENCH_PRODUCTS", 2000)), users=10, history_size=0)
+    await seed(database, config)
+    async with _app_lifespan(app_) as state:
+        yield state
+
+
+app.router.lifespan_context = seeded_lifespan
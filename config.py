@@ -11,3 +11,80 @@ REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY")
 ALGORITHM = "HS256"  # standard for JWT
 ACCESS_EXPIRE_MINUTES = int(os.getenv("ACCESS_EXPIRE_MINUTES", 360))
 REFRESH_EXPIRE_DAYS = int(os.getenv("REFRESH_EXPIRE_DAYS", 7))
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # bytes
+CATALOG_VERSION_TTL = float(os.getenv("CATALOG_VERSION_TTL", 5))  # seconds
+SEARCH_CACHE_MAX_AGE = int(os.getenv("SEARCH_CACHE_MAX_AGE", 60))  # seconds
+STATIC_CACHE_MAX_AGE = int(os.getenv("STATIC_CACHE_MAX_AGE", 86400))  # seconds
+SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", 5))  # seconds
+QUOTE_SECRET_KEY = os.getenv("QUOTE_SECRET_KEY") or ACCESS_SECRET_KEY
+QUOTE_TTL_SECONDS = int(os.getenv("QUOTE_TTL_SECONDS", 900))
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24))
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", 30))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+PENDING_PAYMENT_TIMEOUT_MINUTES = int(os.getenv("PENDING_PAYMENT_TIMEOUT_MINUTES", 15))  # unpaid orders expire after this
+ORDER_SWEEP_SECONDS = float(os.getenv("ORDER_SWEEP_SECONDS", 60))
+ORDER_SWEEP_BATCH = int(os.getenv("ORDER_SWEEP_BATCH", 500))  # orders per bulk_write
+WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", 180))  # leader lease, renewed every sweep
+INVENTORY_HOLD_LOG = int(os.getenv("INVENTORY_HOLD_LOG", 100))  # recent reservation ids kept per stock counter
+PAYMENT_WEBHOOK_SECRET = os.getenv("PAYMENT_WEBHOOK_SECRET") or ACCESS_SECRET_KEY
+PAYMENT_WEBHOOK_TOLERANCE_SECONDS = int(os.getenv("PAYMENT_WEBHOOK_TOLERANCE_SECONDS", 300))  # max signature age
+PAYMENT_EVENT_BATCH = int(os.getenv("PAYMENT_EVENT_BATCH", 500))  # events per bulk_write
+PAYMENT_EVENT_FLUSH_MS = float(os.getenv("PAYMENT_EVENT_FLUSH_MS", 20))  # max buffering delay
+PAYMENT_EVENT_TTL_DAYS = int(os.getenv("PAYMENT_EVENT_TTL_DAYS", 7))  # dedupe window
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))  # documents per cursor batch
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", 65536))  # bytes per streamed chunk
+ROLLUP_SWEEP_SECONDS = float(os.getenv("ROLLUP_SWEEP_SECONDS", 10))  # dashboard lag behind order writes
+ROLLUP_BATCH = int(os.getenv("ROLLUP_BATCH", 1000))  # orders folded per pass
+RECS_TOP_K = int(os.getenv("RECS_TOP_K", 20))  # neighbours kept per product
+RECS_MAX_BASKET = int(os.getenv("RECS_MAX_BASKET", 50))  # most recent distinct views per user that co-occur
+RECS_ORDER_WEIGHT = float(os.getenv("RECS_ORDER_WEIGHT", 3))  # a co-purchase counts this many co-views
+RECS_REFRESH_SECONDS = float(os.getenv("RECS_REFRESH_SECONDS", 900))  # incremental rebuild interval
+RECS_VERSION_TTL = float(os.getenv("RECS_VERSION_TTL", 30))  # seconds between published-table checks
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", 2000))  # max wait for a slot before 503
+AUTH_MAX_CONCURRENCY = int(os.getenv("AUTH_MAX_CONCURRENCY", 4))  # bcrypt hashes in flight per worker
+AUTH_MAX_QUEUE = int(os.getenv("AUTH_MAX_QUEUE", 32))
+OTP_MAX_CONCURRENCY = int(os.getenv("OTP_MAX_CONCURRENCY", 4))  # SMTP sends in flight per worker
+OTP_MAX_QUEUE = int(os.getenv("OTP_MAX_QUEUE", 16))
+CHECKOUT_MAX_CONCURRENCY = int(os.getenv("CHECKOUT_MAX_CONCURRENCY", 16))
+CHECKOUT_MAX_QUEUE = int(os.getenv("CHECKOUT_MAX_QUEUE", 64))
+IP_RATE_PER_MINUTE = float(os.getenv("IP_RATE_PER_MINUTE", 60))  # per route class
+IP_RATE_BURST = float(os.getenv("IP_RATE_BURST", 20))
+ACCOUNT_RATE_PER_MINUTE = float(os.getenv("ACCOUNT_RATE_PER_MINUTE", 10))  # logins or checkouts per account
+ACCOUNT_RATE_BURST = float(os.getenv("ACCOUNT_RATE_BURST", 5))
+OTP_RATE_PER_HOUR = float(os.getenv("OTP_RATE_PER_HOUR", 6))  # OTP requests per account
+OTP_RATE_BURST = float(os.getenv("OTP_RATE_BURST", 3))
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")  # memory (per worker) or mongo (shared)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))  # in-memory buckets kept
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() == "true"  # client IP from X-Forwarded-For
+OTP_SECRET_KEY = os.getenv("OTP_SECRET_KEY") or ACCESS_SECRET_KEY
+OTP_TTL_MINUTES = int(os.getenv("OTP_TTL_MINUTES", 10))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 5))  # wrong guesses before the code is void
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8080))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))  # worker processes; 0 sizes from the CPU quota
+MONGO_POOL_BUDGET = int(os.getenv("MONGO_POOL_BUDGET", 200))  # connections per instance, split across workers
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))  # connections per worker process
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))  # connections kept warm per worker
+GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", 30))  # in-flight requests may finish
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", 5))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")  # proxies trusted for X-Forwarded-*
+EMAIL_USER = os.getenv("EMAIL_USER")
+EMAIL_PASS = os.getenv("EMAIL_PASS")
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 100))  # items per bulk cart or wishlist request
+CART_WRITE_RETRIES = int(os.getenv("CART_WRITE_RETRIES", 3))  # re-reads when a cart changes mid-update
+CART_SUMMARY_REFRESH_SECONDS = float(os.getenv("CART_SUMMARY_REFRESH_SECONDS", 30))  # re-price summaries after catalog changes
+CART_SUMMARY_BATCH = int(os.getenv("CART_SUMMARY_BATCH", 500))  # carts re-priced per bulk_write
+PRICE_ALERT_SECONDS = float(os.getenv("PRICE_ALERT_SECONDS", 300))  # how often price changes are checked
+PRICE_ALERT_BATCH = int(os.getenv("PRICE_ALERT_BATCH", 500))  # changed products per pass
+PRICE_ALERT_LAG_SECONDS = float(os.getenv("PRICE_ALERT_LAG_SECONDS", 5))  # leave room for in-flight catalog writes
+PRICE_ALERT_MIN_DROP_PERCENT = float(os.getenv("PRICE_ALERT_MIN_DROP_PERCENT", 1))  # smaller drops are not announced
+NOTIFY_BACKEND = os.getenv("NOTIFY_BACKEND", "outbox")  # outbox (local JSON lines file) or smtp
+NOTIFY_OUTBOX_PATH = os.getenv("NOTIFY_OUTBOX_PATH", "outbox.jsonl")
+NOTIFY_SWEEP_SECONDS = float(os.getenv("NOTIFY_SWEEP_SECONDS", 10))
+NOTIFY_BATCH = int(os.getenv("NOTIFY_BATCH", 100))  # notifications sent per pass
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", 5))
+NOTIFY_RETRY_SECONDS = float(os.getenv("NOTIFY_RETRY_SECONDS", 60))  # backoff step between attempts
+NOTIFY_RETENTION_DAYS = int(os.getenv("NOTIFY_RETENTION_DAYS", 30))  # sent or failed notifications kept
+SERVICEABILITY_VERSION_TTL = float(os.getenv("SERVICEABILITY_VERSION_TTL", 30))  # seconds between published-table checks
+PROMOTIONS_TTL_SECONDS = float(os.getenv("PROMOTIONS_TTL_SECONDS", 60))  # promotion edits without a catalog bump show up within this
+WORKER_READY_TIMEOUT_SECONDS = float(os.getenv("WORKER_READY_TIMEOUT_SECONDS", 60))  # replacement startup allowed during a rolling restart
@@ -1,14 +1,144 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from config import MONGO_URI
-from motor.motor_asyncio import AsyncIOMotorClient
+from config import MONGO_URI, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE
+
+DATABASE_NAME = "fastapi_auth"
+
+# Created on first use and then shared by every request this process (or
+# warm serverless instance) serves
+_client = {"client": None}
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    The process-wide Motor client. Building it resolves mongodb+srv
+    records and starts monitor threads, so it waits until a request
+    actually needs the database instead of running at import time.
+    """
+    if _client["client"] is None:
+        _client["client"] = AsyncIOMotorClient(
+            MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE
+        )
+    return _client["client"]
+
+
+def close_client():
+    if _client["client"] is not None:
+        _client["client"].close()
+        _client["client"] = None
+
+
+class LazyCollection:
+    """
+    Stands in for a Motor collection so modules can bind collections at
+    import time without opening a client. The real collection is looked
+    up on first attribute access and kept while the client lives.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._client = None
+        self._collection = None
+
+    def __getattr__(self, attr):
+        client = get_client()
+        if self._client is not client:
+            self._client, self._collection = client, client[DATABASE_NAME][self._name]
+        return getattr(self._collection, attr)
+
+    def __repr__(self) -> str:
+        return f"LazyCollection({self._name!r})"
+
+
+products_collection = LazyCollection("Product")
+users_collection = LazyCollection("users")
+orders_collection = LazyCollection("orders")
+meta_collection = LazyCollection("meta")
+promotions_collection = LazyCollection("promotions")
+idempotency_collection = LazyCollection("idempotency_keys")
+inventory_collection = LazyCollection("inventory")
+payment_events_collection = LazyCollection("payment_events")
+rollups_collection = LazyCollection("sales_rollups")
+recommendations_collection = LazyCollection("recommendations")
+rate_limits_collection = LazyCollection("rate_limits")
+otps_collection = LazyCollection("otps")
+wishlists_collection = LazyCollection("wishlists")
+notifications_collection = LazyCollection("notifications")
+serviceability_collection = LazyCollection("serviceability")
+
+# Whether the deployment can run multi-document transactions; probed once
+_topology = {"transactions": None}
+
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["fastapi_auth"]
-products_collection = db["Product"]
-users_collection = db["users"]
-orders_collection = db["orders"]
+async def ensure_indexes():
+    """
+    Create the indexes the app relies on. Safe to run on every startup.
+    """
+    await idempotency_collection.create_index("expires_at", expireAfterSeconds=0)
+    await orders_collection.create_index(
+        [("email", 1), ("idempotency_key", 1)],
+        unique=True,
+        partialFilterExpression={"idempotency_key": {"$type": "string"}}
+    )
+    await inventory_collection.create_index([("product_id", 1), ("shard", 1)])
+    await orders_collection.create_index("payment.payment_id")
+    await orders_collection.create_index("order_id", unique=True, sparse=True)
+    # Confirmed orders not yet folded into the sales rollups
+    await orders_collection.create_index("rollup", partialFilterExpression={"rollup": "pending"})
+    await recommendations_collection.create_index([("version", 1), ("n", 1)])
+    await serviceability_collection.create_index([("version", 1), ("start", 1)])
+    await rate_limits_collection.create_index("expires_at", expireAfterSeconds=0)
+    await otps_collection.create_index("expires_at", expireAfterSeconds=0)
+    # Date-range exports walk orders in (created_at, _id) order
+    await orders_collection.create_index([("created_at", 1), ("_id", 1)])
+    # Covers GET /orders: filter, sort and every projected summary field
+    await orders_collection.create_index([
+        ("email", 1), ("created_at", -1), ("order_id", -1),
+        ("status", 1), ("pricing.total", 1), ("updated_at", 1)
+    ])
+    await payment_events_collection.create_index("expires_at", expireAfterSeconds=0)
+    # Every authenticated request looks users up by email; GET /cart/summary
+    # is answered from this index alone
+    await users_collection.create_index([("email", 1), ("cart_version", 1), ("cart_summary", 1)])
+    # Password resets match an address in any case, as OTPs are keyed
+    await users_collection.create_index("email_lower")
+    # Wishlist pages and counts are range reads on (email, added_at)
+    await wishlists_collection.create_index([("email", 1), ("added_at", -1), ("product_id", -1)])
+    await wishlists_collection.create_index([("email", 1), ("product_id", 1)], unique=True)
+    # Who wishlisted a product, for price-drop alerts (covered)
+    await wishlists_collection.create_index([("product_id", 1), ("email", 1)])
+    # The price-drop job tails repriced products from its watermark
+    await products_collection.create_index(
+        [("price_updated_at", 1), ("_id", 1)],
+        partialFilterExpression={"price_updated_at": {"$exists": True}}
+    )
+    await notifications_collection.create_index(
+        [("status", 1), ("next_attempt_at", 1)],
+        partialFilterExpression={"status": "pending"}
+    )
+    await notifications_collection.create_index("expires_at", expireAfterSeconds=0)
+    # Only non-empty carts carry a catalog version, so re-pricing after a
+    # catalog or promotions change scans just those, from the index alone
+    await users_collection.create_index(
+        [("cart_summary.catalog_version", 1), ("cart_summary.promotions", 1)],
+        partialFilterExpression={"cart_summary.catalog_version": {"$type": "number"}}
+    )
+    # Only unpaid orders are indexed, so the lifecycle worker's scan stays
+    # small no matter how many orders have completed
+    await orders_collection.create_index(
+        [("status", 1), ("created_at", 1)],
+        partialFilterExpression={"status": "pending_payment"}
+    )
 
 
-client = AsyncIOMotorClient("mongodb://localhost:27017")
-db = client["your_db_name"]
-orders_collection = db["orders"]
+async def supports_transactions() -> bool:
+    """
+    True when connected to a replica set or sharded cluster. Standalone
+    servers (and in-memory test backends) cannot run transactions.
+    """
+    if _topology["transactions"] is None:
+        try:
+            hello = await get_client().admin.command("hello")
+            _topology["transactions"] = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+        except Exception:
+            _topology["transactions"] = False
+    return _topology["transactions"]
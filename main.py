@@ -1,7 +1,32 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from utils.responses import ORJSONResponse
+from utils.compression import CompressionMiddleware
+from utils.admission import AdmissionMiddleware, RouteClass, admission_stats
+from utils.ratelimit import rate_limit_stats
+from config import (
+    COMPRESSION_MIN_SIZE,
+    AUTH_MAX_CONCURRENCY, AUTH_MAX_QUEUE,
+    OTP_MAX_CONCURRENCY, OTP_MAX_QUEUE,
+    CHECKOUT_MAX_CONCURRENCY, CHECKOUT_MAX_QUEUE
+)
+from utils.singleflight import singleflight_stats
+from database import close_client, ensure_indexes
+from services.order_lifecycle_service import run_order_lifecycle_worker, order_lifecycle_stats
+from services.payment_event_service import payment_event_buffer
+from services.rollup_service import run_rollup_worker, rollup_stats
+from services.cart_service import run_cart_summary_worker, cart_summary_stats
+from services.price_alert_service import run_price_alert_worker, price_alert_stats
+from services.notification_service import run_notification_worker, notification_stats
+from services.recommendation_service import run_recommendation_worker, recommendation_stats
+from services.serviceability_service import serviceability_stats
+
+logger = logging.getLogger(__name__)
 
 # Import routers
 from router.auth import router as auth_router
@@ -13,11 +38,44 @@ from router.payments import router as payments_router
 from router.history import router as history_router
 from router.checkout import router as checkout_router
 from router.otp import router as otp_router
+from router.exports import router as exports_router
+from router.analytics import router as analytics_router
+from router.recommendations import router as recommendations_router
+from router.delivery import router as delivery_router
+
+# Startup and shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("🚀 Bipul's Shopping API is starting...")
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Index creation skipped: {e}")
+    workers = [
+        asyncio.create_task(run_order_lifecycle_worker()),
+        asyncio.create_task(run_rollup_worker()),
+        asyncio.create_task(run_recommendation_worker()),
+        asyncio.create_task(run_cart_summary_worker()),
+        asyncio.create_task(run_price_alert_worker()),
+        asyncio.create_task(run_notification_worker())
+    ]
+
+    yield
+
+    print("🛑 API shutting down gracefully.")
+    for worker in workers:
+        worker.cancel()
+    for worker in workers:
+        with suppress(asyncio.CancelledError, Exception):
+            await worker
+    close_client()
 
 app = FastAPI(
     title="Bipul's Shopping API",
     description="Modular FastAPI backend for e-commerce features",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Healthcheck and root
@@ -29,6 +87,34 @@ def read_root():
 def ping():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "singleflight": singleflight_stats(),
+        "order_lifecycle": order_lifecycle_stats(),
+        "payment_events": payment_event_buffer.stats(),
+        "sales_rollup": rollup_stats(),
+        "recommendations": recommendation_stats(),
+        "serviceability": serviceability_stats(),
+        "cart_summaries": cart_summary_stats(),
+        "price_alerts": price_alert_stats(),
+        "notifications": notification_stats(),
+        "admission": admission_stats(),
+        "rate_limits": rate_limit_stats()
+    }
+
+# Expensive and abuse-prone routes get their own concurrency limits and
+# per-IP rate limits. Added before CORS so rejections still carry CORS headers.
+app.add_middleware(AdmissionMiddleware, classes=[
+    RouteClass(
+        "auth",
+        [("POST", "/auth/api/v1/auth/login"), ("POST", "/auth/api/v1/auth/signup"), ("POST", "/auth/api/v1/auth/reset-password")],
+        AUTH_MAX_CONCURRENCY, AUTH_MAX_QUEUE
+    ),
+    RouteClass("otp", [("POST", "/api/v1/otp/")], OTP_MAX_CONCURRENCY, OTP_MAX_QUEUE),
+    RouteClass("checkout", [("POST", "/checkout/api/v1/checkout/")], CHECKOUT_MAX_CONCURRENCY, CHECKOUT_MAX_QUEUE),
+])
+
 # CORS setup
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +127,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large payloads such as search pages and history
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # Global validation error handler
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -49,15 +138,6 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors(), "body": exc.body}
     )
 
-# Startup and shutdown events
-@app.on_event("startup")
-async def startup_event():
-    print("🚀 Bipul's Shopping API is starting...")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    print("🛑 API shutting down gracefully.")
-
 # Mount routers with tags for Swagger grouping
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(otp_router)
@@ -68,6 +148,10 @@ app.include_router(orders_router, prefix="/orders", tags=["Orders"])
 app.include_router(payments_router, prefix="/payment", tags=["Payments"])
 app.include_router(history_router, prefix="/history", tags=["History"])
 app.include_router(checkout_router, prefix="/checkout", tags=["Checkout"])
+app.include_router(exports_router, prefix="/exports", tags=["Exports"])
+app.include_router(analytics_router, prefix="/analytics", tags=["Analytics"])
+app.include_router(recommendations_router, prefix="/recommendations", tags=["Recommendations"])
+app.include_router(delivery_router, prefix="/delivery", tags=["Delivery"])
 
 
 
@@ -0,0 +1,120 @@
+"""
+Operational commands that run against the configured database.
+
+    python manage.py rebuild-rollups --start 2025-01-01 --end 2025-02-01
+    python manage.py build-recommendations
+    python manage.py migrate-wishlists
+    python manage.py backfill-email-lower
+    python manage.py set-price 64f1c2... 18999
+    python manage.py load-serviceability pincodes.csv
+"""
+import argparse
+import asyncio
+import csv
+from datetime import date
+
+from services.rollup_service import ROLLUP_LEASE, RollupService
+from services.recommendation_service import CoOccurrenceMatrix, RecommendationService
+from services.wishlist_service import WishlistService
+from services.catalog_service import CatalogService
+from services.serviceability_service import DELIVERY_OPTIONS, ServiceabilityService
+from database import users_collection
+from utils.lease import Lease
+from config import WORKER_LEASE_SECONDS, RECS_TOP_K
+
+
+async def rebuild_rollups(args):
+    # Hold the worker's lease so no incremental batch lands mid-rebuild
+    lease = Lease(ROLLUP_LEASE, ttl=WORKER_LEASE_SECONDS)
+    if not await lease.acquire():
+        raise SystemExit("sales rollup worker holds the lease; retry once it expires")
+    try:
+        counted = await RollupService().rebuild(args.start, args.end)
+    finally:
+        await lease.release()
+    print(f"rebuilt sales rollups from {counted} orders")
+
+
+async def build_recommendations(args):
+    matrix = CoOccurrenceMatrix()
+    baskets = await matrix.refresh()
+    table = matrix.top_k(args.top_k)
+    version = await RecommendationService().publish(table)
+    print(f"published recommendations v{version}: {len(table.ids)} products from {baskets} baskets, {table.nbytes} bytes")
+
+
+async def migrate_wishlists(args):
+    # Accounts also migrate on their first wishlist request; this finishes the rest
+    users, moved = await WishlistService().migrate_all()
+    print(f"moved {moved} wishlist entries from {users} users")
+
+
+async def backfill_email_lower(args):
+    # Accounts created before signup stored the lowercased address
+    users = 0
+    async for user in users_collection.find({"email_lower": {"$exists": False}}, {"email": 1}):
+        await users_collection.update_one({"_id": user["_id"]}, {"$set": {"email_lower": user["email"].lower()}})
+        users += 1
+    print(f"set email_lower on {users} users")
+
+
+async def set_price(args):
+    # Goes through the catalog service so price-drop alerts see the change
+    if not await CatalogService().update_product(args.product_id, {"Selling Price": args.price}):
+        raise SystemExit(f"no product {args.product_id}")
+    print(f"set {args.product_id} to {args.price}")
+
+
+async def load_serviceability(args):
+    # Columns: start, end, zone, warehouse and one lead-time column per
+    # delivery option; a blank lead time means the option is not offered
+    with open(args.path, newline="") as f:
+        ranges = [
+            {
+                "start": int(row["start"]), "end": int(row["end"]),
+                "zone": row["zone"], "warehouse": row["warehouse"],
+                "lead_days": {option: int(row[option]) for option in DELIVERY_OPTIONS if (row.get(option) or "").strip()}
+            }
+            for row in csv.DictReader(f)
+        ]
+    try:
+        version = await ServiceabilityService().publish(ranges)
+    except ValueError as e:
+        raise SystemExit(f"{args.path}: {e}")
+    print(f"published serviceability v{version}: {len(ranges)} PIN code ranges")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="recompute sales rollups from orders")
+    rebuild.add_argument("--start", type=date.fromisoformat, default=None, help="first day (default: beginning)")
+    rebuild.add_argument("--end", type=date.fromisoformat, default=None, help="day after the last one (default: tomorrow)")
+    rebuild.set_defaults(handler=rebuild_rollups)
+
+    recs = commands.add_parser("build-recommendations", help="full rebuild of the also-viewed table")
+    recs.add_argument("--top-k", type=int, default=RECS_TOP_K, help="neighbours kept per product")
+    recs.set_defaults(handler=build_recommendations)
+
+    wishlists = commands.add_parser("migrate-wishlists", help="move wishlist arrays into the wishlists collection")
+    wishlists.set_defaults(handler=migrate_wishlists)
+
+    emails = commands.add_parser("backfill-email-lower", help="store the lowercased address password resets look up")
+    emails.set_defaults(handler=backfill_email_lower)
+
+    price = commands.add_parser("set-price", help="change a product's selling price")
+    price.add_argument("product_id")
+    price.add_argument("price", type=float)
+    price.set_defaults(handler=set_price)
+
+    serviceability = commands.add_parser("load-serviceability", help="publish PIN code ranges from a CSV file")
+    serviceability.add_argument("path")
+    serviceability.set_defaults(handler=load_serviceability)
+
+    args = parser.parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+from enum import Enum
+
+class RollupPeriod(str, Enum):
+    day = "day"
+    hour = "hour"
+
+class RevenueBucket(BaseModel):
+    start: datetime
+    orders: int
+    revenue: float
+    items: int
+
+class RevenueSeries(BaseModel):
+    period: RollupPeriod
+    buckets: List[RevenueBucket]
+    orders: int
+    revenue: float
+
+class PaymentMethodStat(BaseModel):
+    payment_method: str
+    orders: int
+    revenue: float
+
+class TopProduct(BaseModel):
+    product_id: str
+    name: str
+    quantity: int
+    revenue: float
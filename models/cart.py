@@ -1,5 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from datetime import datetime
+from config import BULK_MAX_ITEMS
 
 class CartItem(BaseModel):
     product_id: str
@@ -11,18 +13,48 @@ class CartProduct(BaseModel):
     price: float
     quantity: int
     image_urls: Optional[list[str]] = []
+    line_subtotal: Optional[float] = None
+    discount: float = 0.0
+    line_total: Optional[float] = None
+    promotion_id: Optional[str] = None
 
 class CartResponse(BaseModel):
     cart: list[CartProduct]
 
 class CartTotals(BaseModel):
     subtotal: float
+    discount: float = 0.0
     delivery_fee: float
     total: float
 
 class CartResponse(BaseModel):
     cart: list[CartProduct]
     totals: Optional[CartTotals] = None
+    quote: Optional[str] = None  # signed price quote to send back with checkout
+    quote_expires_at: Optional[datetime] = None
 
 class RemoveCartItemRequest(BaseModel):
-    product_id: str
\ No newline at end of file
+    product_id: str
+
+class BulkCartRequest(BaseModel):
+    # quantity 0 removes the product; later entries for the same product win
+    items: list[CartItem] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class BulkItemResult(BaseModel):
+    product_id: str
+    status: str  # added, updated, removed, unchanged, not_found, invalid
+
+class BulkCartResponse(BaseModel):
+    results: list[BulkItemResult]
+    cart_size: int
+
+class CartSummary(BaseModel):
+    item_count: int  # units across all lines
+    line_count: int
+    subtotal: float
+    discount: float = 0.0
+    delivery_fee: float  # standard delivery
+    total: float
+    version: int  # cart_version the summary describes
+    stale: bool = False  # prices changed since; a refresh is on its way
+    updated_at: Optional[datetime] = None
@@ -51,6 +51,7 @@ class CartItem(BaseModel):
 
 class PricingSummary(BaseModel):
     subtotal: float
+    discount: float = 0.0
     delivery_fee: float
     total: float
 
@@ -66,6 +67,7 @@ class CheckoutRequest(BaseModel):
         NetBankingPaymentData,
         CODPaymentData
     ]
+    quote: Optional[str] = None  # from GET /cart; skips re-pricing if still valid
 
 class CardPaymentRequest(BaseModel):
     email: EmailStr
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+class ServiceabilityRange(BaseModel):
+    start: int = Field(..., ge=100000, le=999999)
+    end: int = Field(..., ge=100000, le=999999)
+    zone: str
+    warehouse: str
+    # Days from order to delivery per option; a missing or null option is not offered
+    lead_days: Dict[str, Optional[int]]
+
+class ServiceabilityUpload(BaseModel):
+    ranges: List[ServiceabilityRange] = Field(..., min_length=1)
+
+class ServiceabilityStatus(BaseModel):
+    version: Optional[int]
+    ranges: int
+    bytes: int
+
+class DeliveryOptionEstimate(BaseModel):
+    delivery_option: str
+    available: bool
+    days: Optional[int] = None
+    estimated_delivery: Optional[str] = None
+    fee: float
+
+class DeliveryEstimate(BaseModel):
+    pincode: str
+    serviceable: bool
+    zone: Optional[str] = None
+    warehouse: Optional[str] = None
+    version: Optional[int]
+    options: List[DeliveryOptionEstimate]
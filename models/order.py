@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 from models.checkout import PricingSummary, CartItem, CustomerInfo, ShippingAddress
@@ -37,3 +37,10 @@ class OrderDetailResponse(BaseModel):
     payment_status: str
     created_at: datetime
     updated_at: datetime
+
+class OrderPage(BaseModel):
+    orders: List[OrderSummary]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+    has_more: bool
+
+checkout_responses_adapter = TypeAdapter(List[CheckoutResponse])
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from enum import Enum
 from typing import Optional
+from datetime import datetime
 
 class PaymentMethod(str, Enum):
     CARD = "card"
@@ -20,3 +21,17 @@ class NetBankingPaymentData(BaseModel):
 
 class CODPaymentData(BaseModel):
     confirm: bool = True
+
+class PaymentEventType(str, Enum):
+    SUCCEEDED = "payment.succeeded"
+    FAILED = "payment.failed"
+
+class PaymentWebhookEvent(BaseModel):
+    id: str  # provider event id, unique per delivery attempt group
+    type: PaymentEventType
+    payment_id: str
+    order_id: Optional[str] = None
+    transaction_id: Optional[str] = None
+    amount: Optional[float] = None
+    failure_reason: Optional[str] = None
+    created_at: Optional[datetime] = None
@@ -0,0 +1,48 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from enum import Enum
+
+from models.checkout import PricingSummary
+
+class PromotionType(str, Enum):
+    percent = "percent"      # value % off matching lines
+    flat = "flat"            # value off each matching unit
+    bundle = "bundle"        # every bundle_qty matching units cost value in total
+    threshold = "threshold"  # value off the order once merchandise >= min_subtotal
+
+class PromotionRule(BaseModel):
+    id: str
+    type: PromotionType
+    value: float = Field(..., ge=0)
+    product_ids: List[str] = []  # empty applies to every product
+    bundle_qty: Optional[int] = Field(None, gt=1)
+    min_subtotal: float = 0.0
+    active: bool = True
+
+class PriceLine(BaseModel):
+    product_id: str
+    name: str
+    unit_price: float
+    quantity: int
+    line_subtotal: float
+    discount: float
+    line_total: float
+    promotion_id: Optional[str] = None
+    image_urls: List[str] = []
+
+class PriceBreakdown(BaseModel):
+    lines: List[PriceLine]
+    subtotal: float
+    discount: float
+    delivery_fee: float
+    total: float
+    delivery_option: str
+    applied_promotions: List[str] = []
+
+    def summary(self) -> PricingSummary:
+        return PricingSummary(
+            subtotal=self.subtotal,
+            discount=self.discount,
+            delivery_fee=self.delivery_fee,
+            total=self.total
+        )
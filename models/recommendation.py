@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class RecommendedProduct(BaseModel):
+    product_id: str
+    score: float
+
+class RecommendationResponse(BaseModel):
+    product_id: str
+    version: Optional[int]
+    recommendations: List[RecommendedProduct]
@@ -22,3 +22,7 @@ class MobileSearchQuery(BaseModel):
     order: SortOrder = Field(SortOrder.asc)
     page: int = Field(1, gt=0)
     limit: int = Field(10, gt=0)
+    fields: Optional[str] = Field(
+        None,
+        description="Comma-separated product fields to return, e.g. name,price,photos"
+    )
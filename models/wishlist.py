@@ -1,11 +1,23 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Optional, List
+from datetime import datetime
+from models.cart import BulkItemResult
+from config import BULK_MAX_ITEMS
 
 class WishlistItem(BaseModel):
     product_id: str
     name: str
     price: float
     image_url: HttpUrl
+    added_at: Optional[datetime] = None
+
+class WishlistPage(BaseModel):
+    items: List[WishlistItem]  # most recently added first
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+    has_more: bool
+
+class WishlistCount(BaseModel):
+    count: int
 
 class RemoveItem(BaseModel):
     product_id: str
@@ -13,3 +25,11 @@ class RemoveItem(BaseModel):
 class CartItem(BaseModel):
     product_id: str
     quantity: int
+
+class BulkWishlistRequest(BaseModel):
+    add: List[str] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    remove: List[str] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+
+class BulkWishlistResponse(BaseModel):
+    results: List[BulkItemResult]
+    wishlist_size: int
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Query
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from models.analytics import RollupPeriod, RevenueSeries, PaymentMethodStat, TopProduct
+from services.rollup_service import RollupService
+from utils.tokens import get_admin_user
+
+router = APIRouter(prefix="/api/v1/analytics", tags=["Analytics"])
+
+def date_range(start: Optional[date], end: Optional[date], days: int = 30):
+    end = end or datetime.utcnow().date()
+    return start or end - timedelta(days=days - 1), end
+
+@router.get("/revenue", response_model=RevenueSeries)
+async def revenue(
+    period: RollupPeriod = Query(RollupPeriod.day),
+    start: Optional[date] = Query(None, description="first day, UTC (default: 30 days before end)"),
+    end: Optional[date] = Query(None, description="last day, UTC (default: today)"),
+    admin: dict = Depends(get_admin_user)
+):
+    start, end = date_range(start, end, days=30 if period == RollupPeriod.day else 1)
+    return await RollupService().revenue(period, start, end)
+
+@router.get("/payment-methods", response_model=List[PaymentMethodStat])
+async def payment_methods(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    admin: dict = Depends(get_admin_user)
+):
+    return await RollupService().payment_methods(*date_range(start, end))
+
+@router.get("/top-products", response_model=List[TopProduct])
+async def top_products(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    admin: dict = Depends(get_admin_user)
+):
+    start, end = date_range(start, end)
+    return await RollupService().top_products(start, end, limit=limit)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 from models.auth import UserIn, UserOut, LoginRequest, Token, RefreshRequest, UserProfile, PasswordResetRequest
 from database import users_collection
 from utils.tokens import (
@@ -6,6 +7,9 @@ from utils.tokens import (
     create_refresh_token,
     get_current_user
 )
+from utils.ratelimit import login_limiter, otp_verify_limiter
+from services.otp_service import OTPService
+from services.cart_service import empty_summary
 from datetime import datetime
 from jose import jwt, JWTError
 import bcrypt
@@ -21,19 +25,34 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode(), hashed.encode())
 
+async def find_account(email: str):
+    """
+    The user an OTP for `email` belongs to. Codes are keyed on the
+    lowercased address but accounts keep the case they signed up with, so
+    the indexed `email_lower` copy is matched when it is unambiguous.
+    """
+    user = await users_collection.find_one({"email": email}, {"_id": 1})
+    if user:
+        return user
+    matches = await users_collection.find({"email_lower": email.lower()}, {"_id": 1}).limit(2).to_list(2)
+    return matches[0] if len(matches) == 1 else None
+
 @router.post("/signup", response_model=UserOut, status_code=201)
 async def signup(user: UserIn):
     if await users_collection.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_pw = hash_password(user.password)
+    # bcrypt runs in the thread pool so it does not stall the event loop
+    hashed_pw = await run_in_threadpool(hash_password, user.password)
     await users_collection.insert_one({
         "name": user.name,
         "email": user.email,
+        "email_lower": user.email.lower(),
         "hashed_password": hashed_pw,
         "refresh_token": None,
         "cart": [],
-        "wishlist": [],
+        "cart_version": 0,
+        "cart_summary": empty_summary(),
         "cards": [],
         "history": [],
         "created_at": datetime.utcnow()
@@ -42,8 +61,9 @@ async def signup(user: UserIn):
 
 @router.post("/login", response_model=Token, status_code=200)
 async def login(user: LoginRequest):
+    await login_limiter.enforce(user.email)
     db_user = await users_collection.find_one({"email": user.email})
-    if not db_user or not verify_password(user.password, db_user["hashed_password"]):
+    if not db_user or not await run_in_threadpool(verify_password, user.password, db_user["hashed_password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token = create_access_token({"sub": user.email})
@@ -101,25 +121,21 @@ async def get_profile(current_user: dict = Depends(get_current_user)):
 
 @router.post("/reset-password", status_code=200)
 async def reset_password(data: PasswordResetRequest):
-    user = await users_collection.find_one({"email": data.email})
-    if not user:
+    await otp_verify_limiter.enforce(data.email)
+    # Resolved before the code is used up, so a miss does not burn it
+    user = await find_account(data.email)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    # Single use: the code is deleted as it is checked
+    await OTPService().consume(data.email, data.otp)
 
-    stored_otp = user.get("otp")
-    otp_expiry = user.get("otp_expires")
-
-    if not stored_otp or stored_otp != data.otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-
-    if not otp_expiry or datetime.utcnow() > otp_expiry:
-        raise HTTPException(status_code=400, detail="OTP expired")
-
-    hashed_pw = hash_password(data.new_password)
+    hashed_pw = await run_in_threadpool(hash_password, data.new_password)
 
     await users_collection.update_one(
-        {"email": data.email},
+        {"_id": user["_id"]},
         {
             "$set": {"hashed_password": hashed_pw},
+            # OTP fields from before codes moved to their own collection
             "$unset": {"otp": "", "otp_expires": ""}
         }
     )
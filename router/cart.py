@@ -1,79 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException
-from bson import ObjectId
-from datetime import datetime
-from models.cart import CartItem, CartProduct, CartResponse, CartTotals, RemoveCartItemRequest
-from database import users_collection, products_collection
-from utils.tokens import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from models.cart import (
+    BulkCartRequest, BulkCartResponse, CartItem, CartProduct, CartResponse, CartSummary, CartTotals,
+    RemoveCartItemRequest
+)
+from utils.tokens import get_current_email, get_current_user
+from utils.responses import ModelResponse
+from utils.etag import conditional, version_etag
+from services.cart_service import CartService
+from services.catalog_service import CatalogService
+from services.pricing_service import PricingService, quote_window
 
 router = APIRouter(prefix="/api/v1/cart", tags=["Cart"])
 
+# Carts are per-user: clients may cache but must revalidate with the ETag
+CART_CACHE_CONTROL = "private, no-cache"
+
 @router.post("/add", status_code=200)
 async def add_to_cart(item: CartItem, current_user: dict = Depends(get_current_user)):
-    product = await products_collection.find_one({"_id": ObjectId(item.product_id)})
+    product = await CatalogService().get_product(item.product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    user = await users_collection.find_one({"email": current_user["email"]})
-    cart = user.get("cart", [])
-
-    for i in cart:
-        if i["product_id"] == item.product_id:
-            i["quantity"] = item.quantity
-            break
-    else:
-        cart.append({"product_id": item.product_id, "quantity": item.quantity})
-
-    await users_collection.update_one(
-        {"email": current_user["email"]},
-        {"$set": {"cart": cart}}
-    )
-
+    await CartService().set_quantity(current_user, item.product_id, item.quantity)
     return {"message": f"Added {item.quantity} unit(s) to cart"}
 
-@router.get("/", response_model=CartResponse, status_code=200)
-async def get_cart(current_user: dict = Depends(get_current_user)):
-    user = await users_collection.find_one({"email": current_user["email"]})
-    raw_cart = user.get("cart", [])
-    cart_items = []
-    subtotal = 0.0
+@router.post("/bulk", response_model=BulkCartResponse, status_code=200)
+async def bulk_update_cart(data: BulkCartRequest, current_user: dict = Depends(get_current_user)):
+    # One catalog query for every product id, one guarded write for the cart
+    results, cart = await CartService().bulk_set(current_user, data.items)
+    return ModelResponse(BulkCartResponse(results=results, cart_size=len(cart)))
+
+@router.get("/summary", response_model=CartSummary, status_code=200)
+async def get_cart_summary(request: Request, email: str = Depends(get_current_email)):
+    # Count and totals for the header badge: one projected read, no pricing
+    summary = await CartService().get_summary(email)
+    etag = version_etag("cart-summary", email, summary.version, summary.updated_at, summary.stale)
+    cached = conditional(request, etag, CART_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+    return ModelResponse(summary, headers={"ETag": etag, "Cache-Control": CART_CACHE_CONTROL})
 
-    for item in raw_cart:
-        product = await products_collection.find_one({"_id": ObjectId(item["product_id"])})
-        if product:
-            product_id = str(product["_id"])
-            name = product.get("name", "")
-            price = float(product.get("price", 0))
-            quantity = item["quantity"]
-            image_urls = product.get("Product Photo", "").strip().split("\n")
-
-            subtotal += price * quantity
-
-            cart_items.append(CartProduct(
-                product_id=product_id,
-                name=name,
-                price=price,
-                quantity=quantity,
-                image_urls=image_urls
-            ))
+@router.get("/", response_model=CartResponse, status_code=200)
+async def get_cart(
+    request: Request,
+    delivery_option: str = Query("standard"),
+    current_user: dict = Depends(get_current_user)
+):
+    # The cart body depends only on the cart contents and catalog prices
+    catalog_version = await CatalogService().get_version()
+    cart_version = current_user.get("cart_version", 0)
+    etag = version_etag(
+        "cart", current_user["email"], cart_version, catalog_version, delivery_option, quote_window()
+    )
+    cached = conditional(request, etag, CART_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    pricing_service = PricingService()
+    pricing = await pricing_service.price_cart(current_user.get("cart", []), delivery_option)
+    quote, quote_expires_at = pricing_service.issue_quote(
+        pricing, current_user["email"], cart_version, catalog_version
+    )
 
-    delivery_fee = 50.0 if subtotal < 500 else 0.0
-    total = subtotal + delivery_fee
+    cart_items = [
+        CartProduct(
+            product_id=line.product_id,
+            name=line.name,
+            price=line.unit_price,
+            quantity=line.quantity,
+            image_urls=line.image_urls,
+            line_subtotal=line.line_subtotal,
+            discount=line.discount,
+            line_total=line.line_total,
+            promotion_id=line.promotion_id
+        )
+        for line in pricing.lines
+    ]
 
-    return CartResponse(
+    return ModelResponse(CartResponse(
         cart=cart_items,
         totals=CartTotals(
-            subtotal=round(subtotal, 2),
-            delivery_fee=round(delivery_fee, 2),
-            total=round(total, 2)
-        )
-    )
+            subtotal=pricing.subtotal,
+            discount=pricing.discount,
+            delivery_fee=pricing.delivery_fee,
+            total=pricing.total
+        ),
+        quote=quote,
+        quote_expires_at=quote_expires_at
+    ), headers={"ETag": etag, "Cache-Control": CART_CACHE_CONTROL})
 
 @router.post("/clear", status_code=200)
 async def clear_cart(current_user: dict = Depends(get_current_user)):
-    await users_collection.update_one(
-        {"email": current_user["email"]},
-        {"$set": {"cart": []}}
-    )
+    await CartService().clear(current_user)
     return {"message": "Cart cleared"}
 
 @router.delete("/remove", status_code=200)
@@ -81,19 +99,5 @@ async def remove_from_cart(
     data: RemoveCartItemRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    user = await users_collection.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    cart = user.get("cart", [])
-    updated_cart = [item for item in cart if item.get("product_id") != data.product_id]
-
-    if len(cart) == len(updated_cart):
-        raise HTTPException(status_code=404, detail="Item not found in cart")
-
-    await users_collection.update_one(
-        {"email": current_user["email"]},
-        {"$set": {"cart": updated_cart}}
-    )
-
+    await CartService().remove(current_user, data.product_id)
     return {"message": "Item removed from cart"}
@@ -1,65 +1,179 @@
-from fastapi import APIRouter, HTTPException, Depends
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from datetime import datetime
+from typing import Optional
 import uuid
 import logging
+from pymongo.errors import DuplicateKeyError
 
 from models.order import CheckoutResponse
 from models.checkout import CheckoutRequest, CardPaymentRequest
-from database import users_collection, orders_collection
 from services.payment_service import PaymentService
 from services.order_service import OrderService
+from services.pricing_service import PricingService
+from services.catalog_service import CatalogService
+from services.inventory_service import InventoryService
+from services.serviceability_service import ServiceabilityService
+from services.idempotency_service import IdempotencyService, request_fingerprint
+from services.rollup_service import COUNTED_STATUSES
 from utils.tokens import get_current_user
+from utils.ratelimit import checkout_limiter
+from utils.etag import StaticJSON
+from utils.responses import ModelResponse
+from config import STATIC_CACHE_MAX_AGE
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/checkout", tags=["Checkout"])
 
+STATIC_CACHE_CONTROL = f"public, max-age={STATIC_CACHE_MAX_AGE}"
+
+# Reference data: body and ETag are built once at import
+SUPPORTED_BANKS = StaticJSON({
+    "banks": [
+        {"code": "SBI", "name": "State Bank of India"},
+        {"code": "HDFC", "name": "HDFC Bank"},
+        {"code": "ICICI", "name": "ICICI Bank"},
+        {"code": "AXIS", "name": "Axis Bank"},
+        {"code": "KOTAK", "name": "Kotak Mahindra Bank"},
+        {"code": "PNB", "name": "Punjab National Bank"},
+        {"code": "BOB", "name": "Bank of Baroda"},
+        {"code": "CANARA", "name": "Canara Bank"},
+        {"code": "UNION", "name": "Union Bank of India"},
+        {"code": "IOB", "name": "Indian Overseas Bank"},
+    ]
+}, cache_control=STATIC_CACHE_CONTROL)
+
+SUPPORTED_UPI_APPS = StaticJSON({
+    "upi_apps": [
+        {"code": "GPAY", "name": "Google Pay"},
+        {"code": "PHONEPE", "name": "PhonePe"},
+        {"code": "PAYTM", "name": "Paytm"},
+        {"code": "BHIM", "name": "BHIM UPI"},
+        {"code": "AMAZONPAY", "name": "Amazon Pay"},
+        {"code": "CRED", "name": "CRED UPI"},
+        {"code": "MOBIKWIK", "name": "MobiKwik"},
+    ]
+}, cache_control=STATIC_CACHE_CONTROL)
+
 @router.post("/", response_model=CheckoutResponse, status_code=200)
 async def place_order(
     checkout_data: CheckoutRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user: dict = Depends(get_current_user)
 ):
+    await checkout_limiter.enforce(current_user["email"])
+    if not idempotency_key:
+        return await create_checkout_order(checkout_data, current_user)
+
+    # Retries with the same key wait for the first attempt and replay its
+    # stored response instead of pricing, charging and inserting again.
+    email = current_user["email"]
+    idempotency = IdempotencyService()
+    replay = await idempotency.begin(email, idempotency_key, request_fingerprint(checkout_data.model_dump_json()))
+    if replay is not None:
+        return ModelResponse(CheckoutResponse.model_validate(replay), headers={"Idempotent-Replayed": "true"})
+
+    try:
+        async with idempotency.hold(email, idempotency_key):
+            response = await create_checkout_order(checkout_data, current_user, idempotency_key)
+    except DuplicateKeyError:
+        # We took over a key whose first attempt was slow, not dead, and
+        # its order landed first: answer with that order
+        stored = await OrderService().find_by_idempotency_key(email, idempotency_key)
+        if stored is None:
+            await idempotency.release(email, idempotency_key)
+            raise HTTPException(status_code=500, detail="Internal server error. Please try again later.")
+        await idempotency.complete(email, idempotency_key, stored.model_dump(mode="json"))
+        return ModelResponse(stored, headers={"Idempotent-Replayed": "true"})
+    except BaseException:
+        await idempotency.release(email, idempotency_key)
+        raise
+
+    await idempotency.complete(email, idempotency_key, response.model_dump(mode="json"))
+    return response
+
+async def create_checkout_order(
+    checkout_data: CheckoutRequest,
+    current_user: dict,
+    idempotency_key: Optional[str] = None
+) -> CheckoutResponse:
     try:
-        logger.info(f"Checkout request for user {current_user['email']}: {checkout_data.model_dump()}")
+        # get_current_user already loaded the full user document
+        user = current_user
+        logger.info(
+            "checkout email=%s payment_method=%s delivery_option=%s items=%d",
+            user["email"], checkout_data.payment_method,
+            checkout_data.delivery_option, len(user.get("cart", []))
+        )
 
-        user = await users_collection.find_one({"email": current_user["email"]})
         cart = user.get("cart", [])
         if not cart:
             raise HTTPException(status_code=400, detail="Cart is empty")
 
-        delivery_days = {"standard": 7, "express": 3, "same-day": 1}
+        # Answered from the in-memory serviceability index; also rejects
+        # options (say same-day) that the address's PIN code cannot get
         delivery_option = checkout_data.delivery_option
-        if delivery_option not in delivery_days:
-            raise HTTPException(status_code=400, detail="Invalid delivery option")
+        estimated_delivery = await ServiceabilityService().delivery_date(
+            checkout_data.shipping_address.pincode, delivery_option
+        )
 
         order_id = f"ORD{uuid.uuid4().hex[:8].upper()}"
         tracking_id = f"TRK{uuid.uuid4().hex[:8].upper()}"
-        estimated_delivery = (
-            datetime.utcnow() + timedelta(days=delivery_days[delivery_option])
-        ).strftime("%Y-%m-%d")
 
-        order_service = OrderService()
-        calculated_pricing = await order_service.calculate_pricing_from_cart(cart, delivery_option)
+        # A valid quote from GET /cart means nothing moved since it was
+        # priced; only fall back to a full pricing pass when it did.
+        pricing_service = PricingService()
+        pricing = None
+        if checkout_data.quote:
+            pricing = pricing_service.redeem_quote(
+                checkout_data.quote,
+                email=user["email"],
+                cart_version=user.get("cart_version", 0),
+                catalog_version=await CatalogService().get_version(),
+                delivery_option=delivery_option
+            )
+        if pricing is None:
+            pricing = await pricing_service.price_cart(cart, delivery_option)
+        calculated_pricing = pricing.summary()
 
         if abs(calculated_pricing.total - checkout_data.pricing.total) > 1:
             raise HTTPException(status_code=400, detail="Price mismatch. Please refresh cart and try again.")
 
-        payment_service = PaymentService()
-        payment_result = await payment_service.process_payment(
-            order_id=order_id,
-            payment_method=checkout_data.payment_method,
-            payment_data=checkout_data.payment_data,
-            amount=checkout_data.pricing.total,
-            customer_info=checkout_data.customer_info,
-            user=user
-        )
+        # Stock is taken before charging so a sold-out item fails fast with
+        # 409 instead of after payment; any later failure gives it back.
+        inventory = InventoryService()
+        allocations = await inventory.reserve(order_id, [(line.product_id, line.quantity) for line in pricing.lines])
+        try:
+            payment_service = PaymentService()
+            payment_result = await payment_service.process_payment(
+                order_id=order_id,
+                payment_method=checkout_data.payment_method,
+                payment_data=checkout_data.payment_data,
+                amount=calculated_pricing.total,
+                customer_info=checkout_data.customer_info,
+                user=user
+            )
+        except BaseException:
+            await inventory.release(allocations)
+            raise
 
         order = {
             "order_id": order_id,
             "email": user["email"],
             "customer_info": checkout_data.customer_info.model_dump(),
             "shipping_address": checkout_data.shipping_address.model_dump(),
-            "items": cart,
-            "pricing": checkout_data.pricing.model_dump(),
+            "items": [
+                {
+                    "product_id": line.product_id,
+                    "name": line.name,
+                    "price": line.unit_price,
+                    "quantity": line.quantity,
+                    "discount": line.discount,
+                    "line_total": line.line_total
+                }
+                for line in pricing.lines
+            ],
+            "pricing": calculated_pricing.model_dump(),
+            "applied_promotions": pricing.applied_promotions,
             "delivery_option": delivery_option,
             "payment_method": checkout_data.payment_method,
             "payment": {
@@ -77,14 +191,22 @@ async def place_order(
             "updated_at": datetime.utcnow(),
             "status": payment_result["order_status"]
         }
-
-        await orders_collection.insert_one(order)
-
-        if payment_result["status"] in ["completed", "pending", "cod_confirmed"]:
-            await users_collection.update_one(
-                {"email": user["email"]},
-                {"$set": {"cart": []}}
+        if idempotency_key:
+            order["idempotency_key"] = idempotency_key
+        if allocations:
+            order["reservation"] = inventory.reservation(allocations, payment_result["order_status"])
+        if order["status"] in COUNTED_STATUSES:
+            # Picked up by the sales rollup worker
+            order["rollup"] = "pending"
+
+        try:
+            await OrderService().place_order(
+                order,
+                clear_cart=payment_result["status"] in ["completed", "pending", "cod_confirmed"]
             )
+        except BaseException:
+            await inventory.release(allocations)
+            raise
 
         return CheckoutResponse(
             success=True,
@@ -102,42 +224,20 @@ async def place_order(
             updated_at=order["updated_at"].isoformat()
         )
 
-    except HTTPException:
+    except (HTTPException, DuplicateKeyError):
+        # A duplicate Idempotency-Key order: the route replays the stored one
         raise
     except Exception as e:
         logger.error(f"Checkout error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error. Please try again later.")
 
 @router.get("/payment-methods/banks", status_code=200)
-async def get_supported_banks() -> dict:
-    return {
-        "banks": [
-            {"code": "SBI", "name": "State Bank of India"},
-            {"code": "HDFC", "name": "HDFC Bank"},
-            {"code": "ICICI", "name": "ICICI Bank"},
-            {"code": "AXIS", "name": "Axis Bank"},
-            {"code": "KOTAK", "name": "Kotak Mahindra Bank"},
-            {"code": "PNB", "name": "Punjab National Bank"},
-            {"code": "BOB", "name": "Bank of Baroda"},
-            {"code": "CANARA", "name": "Canara Bank"},
-            {"code": "UNION", "name": "Union Bank of India"},
-            {"code": "IOB", "name": "Indian Overseas Bank"},
-        ]
-    }
+async def get_supported_banks(request: Request) -> Response:
+    return SUPPORTED_BANKS.response(request)
 
 @router.get("/payment-methods/upi-apps", status_code=200)
-async def get_supported_upi_apps() -> dict:
-    return {
-        "upi_apps": [
-            {"code": "GPAY", "name": "Google Pay"},
-            {"code": "PHONEPE", "name": "PhonePe"},
-            {"code": "PAYTM", "name": "Paytm"},
-            {"code": "BHIM", "name": "BHIM UPI"},
-            {"code": "AMAZONPAY", "name": "Amazon Pay"},
-            {"code": "CRED", "name": "CRED UPI"},
-            {"code": "MOBIKWIK", "name": "MobiKwik"},
-        ]
-    }
+async def get_supported_upi_apps(request: Request) -> Response:
+    return SUPPORTED_UPI_APPS.response(request)
 
 @router.post("/card", status_code=200)
 async def card_checkout(data: CardPaymentRequest):
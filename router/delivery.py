@@ -0,0 +1,44 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from models.delivery import DeliveryEstimate, ServiceabilityStatus, ServiceabilityUpload
+from services.serviceability_service import ServiceabilityService
+from utils.etag import conditional, version_etag
+from utils.responses import ModelResponse
+from utils.tokens import get_admin_user
+from config import SEARCH_CACHE_MAX_AGE
+
+router = APIRouter(prefix="/api/v1/delivery", tags=["Delivery"])
+
+ESTIMATE_CACHE_CONTROL = f"public, max-age={SEARCH_CACHE_MAX_AGE}"
+
+def status(index, version) -> ServiceabilityStatus:
+    return ServiceabilityStatus(version=version, ranges=len(index) if index else 0, bytes=index.nbytes if index else 0)
+
+@router.get("/estimate", response_model=DeliveryEstimate, status_code=200)
+async def delivery_estimate(request: Request, pincode: str = Query(..., pattern=r"^\d{6}$")):
+    service = ServiceabilityService()
+    _, version = await service.get_index()
+    # Dates move at midnight even when the table does not
+    etag = version_etag("delivery", version, pincode, datetime.utcnow().date())
+    cached = conditional(request, etag, ESTIMATE_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    return ModelResponse(
+        await service.estimate(pincode),
+        headers={"ETag": etag, "Cache-Control": ESTIMATE_CACHE_CONTROL}
+    )
+
+@router.put("/serviceability", response_model=ServiceabilityStatus, status_code=200)
+async def publish_serviceability(upload: ServiceabilityUpload, admin: dict = Depends(get_admin_user)):
+    service = ServiceabilityService()
+    try:
+        await service.publish([r.model_dump() for r in upload.ranges])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return status(*await service.get_index())
+
+@router.post("/serviceability/refresh", response_model=ServiceabilityStatus, status_code=200)
+async def refresh_serviceability(admin: dict = Depends(get_admin_user)):
+    # Reloads this process only; the others pick a new version up within SERVICEABILITY_VERSION_TTL
+    return status(*await ServiceabilityService().refresh())
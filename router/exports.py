@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Literal, Optional
+from services.export_service import ExportService, EXPORT_FORMATS
+from utils.tokens import get_admin_user
+
+router = APIRouter(prefix="/api/v1/exports", tags=["Exports"])
+
+ExportFormat = Literal["ndjson", "csv"]
+
+def export_response(stream, name: str, fmt: str) -> StreamingResponse:
+    filename = f"{name}-{datetime.utcnow():%Y%m%dT%H%M%S}.{fmt}"
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
+
+@router.get("/orders", status_code=200)
+async def export_orders(
+    format: ExportFormat = Query("ndjson"),
+    start: Optional[datetime] = Query(None, description="created_at >= start (UTC)"),
+    end: Optional[datetime] = Query(None, description="created_at < end (UTC)"),
+    after_id: Optional[str] = Query(None, description="resume after the row with this id"),
+    admin: dict = Depends(get_admin_user)
+):
+    stream = await ExportService().orders(format, start=start, end=end, after_id=after_id)
+    return export_response(stream, "orders", format)
+
+@router.get("/products", status_code=200)
+async def export_products(
+    format: ExportFormat = Query("ndjson"),
+    after_id: Optional[str] = Query(None, description="resume after the row with this id"),
+    admin: dict = Depends(get_admin_user)
+):
+    stream = await ExportService().products(format, after_id=after_id)
+    return export_response(stream, "products", format)
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
 from datetime import datetime
-from bson import ObjectId
 from models.history import EnrichedHistoryItem, FilteredHistoryResponse
-from database import users_collection, products_collection
+from database import users_collection
 from utils.tokens import get_current_user
+from utils.responses import ModelResponse
+from services.catalog_service import CatalogService
 
 router = APIRouter(prefix="/api/v1/history", tags=["History"])
 
+# Only the product fields an EnrichedHistoryItem needs
+HISTORY_PRODUCT_PROJECTION = {"name": 1, "Brand": 1, "Model": 1, "price": 1, "Product Photo": 1}
+
 
 
 @router.get("/filter", response_model=FilteredHistoryResponse, status_code=200)
@@ -26,16 +30,18 @@ async def filter_history(
 
     user = await users_collection.find_one({"email": current_user["email"]})
     history = user.get("history", [])
-    filtered = []
-
-    for entry in reversed(history):
-        ts = entry["viewed_at"]
-        if start_dt and ts < start_dt:
-            continue
-        if end_dt and ts > end_dt:
-            continue
+    entries = [
+        entry for entry in reversed(history)
+        if not (start_dt and entry["viewed_at"] < start_dt) and not (end_dt and entry["viewed_at"] > end_dt)
+    ]
+    # One $in query for every product in the window, however long the history
+    products = await CatalogService().get_products(
+        [str(entry["product_id"]) for entry in entries], HISTORY_PRODUCT_PROJECTION
+    )
 
-        product = await products_collection.find_one({"_id": ObjectId(entry["product_id"])})
+    filtered = []
+    for entry in entries:
+        product = products.get(str(entry["product_id"]))
         if not product:
             continue
         if brand and brand.lower() not in product.get("Brand", "").lower():
@@ -49,8 +55,8 @@ async def filter_history(
             brand=product.get("Brand"),
             model=product.get("Model"),
             price=float(product.get("price", 0)),
-            viewed_at=ts,
+            viewed_at=entry["viewed_at"],
             image_urls=product.get("Product Photo", "").strip().split("\n")
         ))
 
-    return FilteredHistoryResponse(filtered_history=filtered[:20])
+    return ModelResponse(FilteredHistoryResponse(filtered_history=filtered[:20]))
@@ -1,16 +1,28 @@
-from fastapi import APIRouter, Depends
-from database import orders_collection
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
 from utils.tokens import get_current_user
-from models.order import CheckoutResponse  # ✅ updated import
-from datetime import datetime
+from models.order import CheckoutResponse, OrderPage, OrderDetailResponse, checkout_responses_adapter
+from services.order_service import OrderService
+from utils.responses import ModelResponse
 
 router = APIRouter(prefix="/api/v1/orders", tags=["Orders"])
 
-@router.get("/recent", response_model=list[CheckoutResponse], status_code=200)
+@router.get("/", response_model=OrderPage, status_code=200)
+async def list_orders(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: dict = Depends(get_current_user)
+):
+    page = await OrderService().list_orders(current_user["email"], limit=limit, cursor=cursor)
+    return ModelResponse(page)
+
+@router.get("/recent", response_model=list[CheckoutResponse], status_code=200, deprecated=True)
 async def get_recent_orders(current_user: dict = Depends(get_current_user)):
-    cursor = orders_collection.find({"email": current_user["email"]}).sort("created_at", -1).limit(5)
-    recent_orders = []
-    async for order in cursor:
-        order["_id"] = str(order["_id"])  # optional: remove if not needed in response
-        recent_orders.append(CheckoutResponse(**order))  # ✅ parse into model
-    return recent_orders
+    # Kept for older clients in its original array shape; new clients page GET /orders
+    orders = await OrderService().recent_orders(current_user["email"], limit=5)
+    return ModelResponse(orders, adapter=checkout_responses_adapter)
+
+@router.get("/{order_id}", response_model=OrderDetailResponse, status_code=200)
+async def get_order(order_id: str, current_user: dict = Depends(get_current_user)):
+    order = await OrderService().get_order(current_user["email"], order_id)
+    return ModelResponse(order)
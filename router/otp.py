@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
 from database import users_collection
-from utils.otp import generate_otp, get_expiry
+from services.otp_service import OTPService
 from utils.email import send_email  # ✅ Email sending is active
+from utils.ratelimit import otp_limiter, otp_verify_limiter
 
 router = APIRouter(prefix="/api/v1/otp", tags=["OTP"])
 
@@ -16,31 +17,19 @@ class OTPVerify(BaseModel):
 
 @router.post("/request", status_code=200)
 async def request_otp(data: OTPRequest):
-    user = await users_collection.find_one({"email": data.email})
-    if not user:
+    await otp_limiter.enforce(data.email)
+    if not await users_collection.find_one({"email": data.email}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="User not found")
 
-    otp = generate_otp()
-    expiry = get_expiry()
-
-    await users_collection.update_one(
-        {"email": data.email},
-        {"$set": {"otp": otp, "otp_expires": expiry}}
-    )
+    otp = await OTPService().issue(data.email)
 
     # ✅ Send OTP via email
-    send_email(to=data.email, subject="Your OTP", body=f"Your OTP is: {otp}")
-    print(f"Sent OTP {otp} to {data.email}")  # Optional: for debugging
+    await run_in_threadpool(send_email, to=data.email, subject="Your OTP", body=f"Your OTP is: {otp}")
 
     return {"message": "OTP sent successfully"}
 
 @router.post("/verify", status_code=200)
 async def verify_otp(data: OTPVerify):
-    user = await users_collection.find_one({"email": data.email})
-    if not user or user.get("otp") != data.otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-
-    if datetime.utcnow() > user.get("otp_expires"):
-        raise HTTPException(status_code=400, detail="OTP expired")
-
+    await otp_verify_limiter.enforce(data.email)
+    await OTPService().verify(data.email, data.otp)
     return {"message": "OTP verified"}
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from pydantic import ValidationError
+from models.payment import PaymentWebhookEvent
 from services.payment_service import PaymentService
+from services.payment_event_service import payment_event_buffer
+from utils.signing import verify_webhook
 from utils.tokens import get_current_user
+from config import PAYMENT_WEBHOOK_SECRET, PAYMENT_WEBHOOK_TOLERANCE_SECONDS
 
+logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Payments"])
 
 @router.post("/verify", status_code=200)
@@ -12,14 +19,45 @@ async def verify_payment(
     current_user: dict = Depends(get_current_user)
 ):
     payment_service = PaymentService()
-    result = await payment_service.verify_payment(order_id, payment_id, signature)
+    result = await payment_service.verify_payment(order_id, payment_id, signature, email=current_user["email"])
 
     if not result["verified"]:
         raise HTTPException(status_code=400, detail="Payment verification failed")
 
     return {
         "message": "Payment verified successfully",
-        "status": result["status"]
+        "status": result["status"],
+        "order_status": result["order_status"]
     }
 
-# Optional: Add refund or webhook routes here later
+@router.post("/webhook", status_code=200)
+async def payment_webhook(
+    request: Request,
+    x_webhook_timestamp: str = Header(None),
+    x_webhook_signature: str = Header(None)
+):
+    """
+    Payment provider callbacks. The body must be signed (see
+    utils.signing.sign_webhook); events are applied in buffered batches and
+    the response is only sent once this event has been stored and applied,
+    so a non-2xx reply means the provider should retry.
+    """
+    body = await request.body()
+    if not verify_webhook(
+        body, x_webhook_timestamp, x_webhook_signature,
+        PAYMENT_WEBHOOK_SECRET, PAYMENT_WEBHOOK_TOLERANCE_SECONDS
+    ):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        event = PaymentWebhookEvent.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    try:
+        duplicate = await payment_event_buffer.submit(event)
+    except Exception as e:
+        logger.error(f"Webhook event {event.id} not applied: {e}")
+        raise HTTPException(status_code=503, detail="Event not processed, retry later")
+
+    return {"received": True, "duplicate": duplicate}
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Query, Request
+from models.recommendation import RecommendationResponse, RecommendedProduct
+from services.recommendation_service import RecommendationService
+from utils.etag import conditional, version_etag
+from utils.responses import ModelResponse
+from config import SEARCH_CACHE_MAX_AGE
+
+router = APIRouter(prefix="/api/v1/recommendations", tags=["Recommendations"])
+
+RECS_CACHE_CONTROL = f"public, max-age={SEARCH_CACHE_MAX_AGE}"
+
+@router.get("/{product_id}/also-viewed", response_model=RecommendationResponse, status_code=200)
+async def customers_also_viewed(request: Request, product_id: str, limit: int = Query(10, ge=1, le=50)):
+    service = RecommendationService()
+    _, version = await service.get_table()
+    etag = version_etag("recs", version, product_id, limit)
+    cached = conditional(request, etag, RECS_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    version, neighbours = await service.also_viewed(product_id, limit)
+    return ModelResponse(
+        RecommendationResponse(
+            product_id=product_id,
+            version=version,
+            recommendations=[RecommendedProduct(product_id=pid, score=round(score, 4)) for pid, score in neighbours]
+        ),
+        headers={"ETag": etag, "Cache-Control": RECS_CACHE_CONTROL}
+    )
@@ -1,12 +1,87 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Optional
 from models.search import MobileSearchQuery
 from database import products_collection
+from utils.responses import ORJSONResponse
+from utils.etag import conditional, version_etag
+from services.catalog_service import CatalogService
+from utils.singleflight import SingleFlight
+from config import SEARCH_CACHE_MAX_AGE, SINGLEFLIGHT_TIMEOUT
 
 router = APIRouter(prefix="/api/v1/search", tags=["Search"])
 
+SEARCH_CACHE_CONTROL = f"public, max-age={SEARCH_CACHE_MAX_AGE}"
+search_flight = SingleFlight("search", timeout=SINGLEFLIGHT_TIMEOUT)
+
+# Public field names accepted by `fields=` mapped to product document fields
+SEARCH_FIELDS = {
+    "name": "Name",
+    "brand": "Brand",
+    "model": "Model",
+    "color": "Color",
+    "memory": "Memory",
+    "storage": "Storage",
+    "rating": "Rating",
+    "price": "Selling Price",
+    "original_price": "Original Price",
+    "photos": "Product Photo",
+}
+DOCUMENT_FIELDS = {v.lower(): v for v in SEARCH_FIELDS.values()}
+
+def build_projection(fields: Optional[str]) -> Optional[dict]:
+    """
+    Turn a `fields=` value into a Mongo projection so unrequested fields
+    are never read from the database. None means the full document.
+    """
+    if not fields:
+        return None
+
+    projection = {}
+    unknown = []
+    for name in fields.split(","):
+        key = name.strip().lower()
+        if not key:
+            continue
+        field = SEARCH_FIELDS.get(key) or DOCUMENT_FIELDS.get(key)
+        if field:
+            projection[field] = 1
+        else:
+            unknown.append(name.strip())
+
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return projection or None
+
+async def fetch_page(
+    filters: dict, projection: Optional[dict], sort_field: Optional[str],
+    direction: int, skip: int, limit: int
+) -> tuple:
+    cursor = products_collection.find(filters, projection).skip(skip).limit(limit)
+    if sort_field:
+        cursor = cursor.sort(sort_field, direction)
+
+    results = []
+    async for doc in cursor:
+        doc["_id"] = str(doc["_id"])
+        if projection is None or "Product Photo" in projection:
+            doc["Product Photo"] = doc.get("Product Photo", "").strip().split("\n")
+        results.append(doc)
+
+    total = await products_collection.count_documents(filters)
+    return results, total
+
 @router.get("/", status_code=200)
-async def search_mobiles(query: MobileSearchQuery = Depends()):
+async def search_mobiles(request: Request, query: MobileSearchQuery = Depends()):
     skip = (query.page - 1) * query.limit
+    projection = build_projection(query.fields)
+
+    # Results only change with the catalog, so the ETag is known up front
+    catalog_version = await CatalogService().get_version()
+    etag = version_etag("search", catalog_version, query.model_dump_json())
+    cached = conditional(request, etag, SEARCH_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
     filters = {}
 
     if query.brand:
@@ -31,20 +106,15 @@ async def search_mobiles(query: MobileSearchQuery = Depends()):
         "rating": "Rating"
     }.get(query.sort_by)
 
-    cursor = products_collection.find(filters).skip(skip).limit(query.limit)
-    if sort_field:
-        cursor = cursor.sort(sort_field, 1 if query.order == "asc" else -1)
-
-    results = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        doc["Product Photo"] = doc.get("Product Photo", "").strip().split("\n")
-        results.append(doc)
-
-    total = await products_collection.count_documents(filters)
+    # Identical concurrent searches share one database round trip
+    results, total = await search_flight.do(
+        (catalog_version, query.model_dump_json()),
+        lambda: fetch_page(filters, projection, sort_field, 1 if query.order == "asc" else -1, skip, query.limit)
+    )
     max_pages = (total + query.limit - 1) // query.limit
 
-    return {
+    # Raw Mongo documents: render with orjson directly instead of jsonable_encoder
+    return ORJSONResponse({
         "page": query.page,
         "limit": query.limit,
         "total_products": total,
@@ -52,4 +122,4 @@ async def search_mobiles(query: MobileSearchQuery = Depends()):
         "has_next": query.page < max_pages,
         "has_prev": query.page > 1,
         "products": results
-    }
+    }, headers={"ETag": etag, "Cache-Control": SEARCH_CACHE_CONTROL})
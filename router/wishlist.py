@@ -1,78 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
-from bson import ObjectId
-from models.wishlist import RemoveItem, WishlistItem
-from database import users_collection, products_collection
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models.wishlist import (
+    BulkWishlistRequest, BulkWishlistResponse, RemoveItem, WishlistCount, WishlistPage
+)
 from utils.tokens import get_current_user
-from typing import List
+from utils.responses import ModelResponse
+from services.cart_service import CartService
+from services.wishlist_service import WishlistService
+from typing import Optional
 
 router = APIRouter(prefix="/api/v1/wishlist", tags=["Wishlist"])
 
 # ✅ Add product to wishlist
 @router.post("/add", status_code=200)
 async def add_to_wishlist(item: RemoveItem, current_user: dict = Depends(get_current_user)):
-    await users_collection.update_one(
-        {"email": current_user["email"]},
-        {"$addToSet": {"wishlist": item.product_id}}
-    )
+    await WishlistService().add(current_user, item.product_id)
     return {"message": "Product added to wishlist"}
 
+# ✅ Add and remove many products at once
+@router.post("/bulk", response_model=BulkWishlistResponse, status_code=200)
+async def bulk_update_wishlist(data: BulkWishlistRequest, current_user: dict = Depends(get_current_user)):
+    results, size = await WishlistService().bulk_update(current_user, data.add, data.remove)
+    return ModelResponse(BulkWishlistResponse(results=results, wishlist_size=size))
+
 # ✅ Remove product from wishlist
 @router.post("/remove", status_code=200)
 async def remove_from_wishlist(item: RemoveItem, current_user: dict = Depends(get_current_user)):
-    await users_collection.update_one(
-        {"email": current_user["email"]},
-        {"$pull": {"wishlist": item.product_id}}
-    )
+    await WishlistService().remove(current_user, item.product_id)
     return {"message": "Product removed from wishlist"}
 
-# ✅ Get wishlist items
-@router.get("/", response_model=List[WishlistItem], status_code=200)
-async def get_wishlist(current_user: dict = Depends(get_current_user)):
-    user = await users_collection.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    product_ids = user.get("wishlist", [])
-    wishlist_items = []
-
-    for pid in product_ids:
-        product = await products_collection.find_one({"_id": ObjectId(pid)})
-        if product:
-            wishlist_items.append(WishlistItem(
-                product_id=str(product["_id"]),
-                name=product["Name"],
-                price=product["Selling Price"],
-                image_url=product["Product Photo"].strip().split("\n")[0]
-            ))
-
-    return wishlist_items
+# ✅ Get wishlist items, most recently added first
+@router.get("/", response_model=WishlistPage, status_code=200)
+async def get_wishlist(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: dict = Depends(get_current_user)
+):
+    page = await WishlistService().list_page(current_user, limit=limit, cursor=cursor)
+    return ModelResponse(page)
+
+# ✅ Number of saved products
+@router.get("/count", response_model=WishlistCount, status_code=200)
+async def count_wishlist(current_user: dict = Depends(get_current_user)):
+    return ModelResponse(WishlistCount(count=await WishlistService().count(current_user)))
 
 # ✅ Move product from wishlist to cart
 @router.post("/move-to-cart", status_code=200)
 async def move_wishlist_to_cart(item: RemoveItem, current_user: dict = Depends(get_current_user)):
-    user = await users_collection.find_one({"email": current_user["email"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    wishlist = user.get("wishlist", [])
-    cart = user.get("cart", [])
-
-    if item.product_id not in wishlist:
+    wishlist = WishlistService()
+    if not await wishlist.contains(current_user, item.product_id):
         raise HTTPException(status_code=404, detail="Product not in wishlist")
 
-    for i in cart:
-        if i["product_id"] == item.product_id:
-            i["quantity"] += 1
-            break
-    else:
+    def mutate(cart: list):
+        for line in cart:
+            if line["product_id"] == item.product_id:
+                line["quantity"] += 1
+                return
         cart.append({"product_id": item.product_id, "quantity": 1})
 
-    await users_collection.update_one(
-        {"email": current_user["email"]},
-        {
-            "$set": {"cart": cart},
-            "$pull": {"wishlist": item.product_id}
-        }
-    )
-
+    # Cart first: if the second write fails the product is in both lists, not neither
+    await CartService().update(current_user, mutate)
+    await wishlist.remove(current_user, item.product_id)
     return {"message": "Product moved to cart"}
@@ -0,0 +1,166 @@
+"""
+Production entrypoint: a supervisor process plus one uvicorn worker per CPU.
+
+    python serve.py                      # workers sized from the CPU quota
+    python serve.py --workers 4 --port 8080
+    kill -HUP <supervisor pid>           # rolling restart, e.g. after a deploy
+    kill -TERM <supervisor pid>          # graceful shutdown
+
+Workers share one listening socket. uvloop and httptools are used when
+installed. Each worker gets an equal share of MONGO_POOL_BUDGET
+connections and runs the app lifespan, so background workers stop and
+the Mongo client closes cleanly on shutdown.
+"""
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+
+import uvicorn
+from uvicorn.supervisors.multiprocess import Multiprocess, Process
+
+from config import (
+    HOST, PORT, WEB_CONCURRENCY, MONGO_POOL_BUDGET,
+    GRACEFUL_SHUTDOWN_SECONDS, KEEPALIVE_SECONDS, FORWARDED_ALLOW_IPS, WORKER_READY_TIMEOUT_SECONDS
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def cpu_limit() -> float:
+    """
+    CPUs this process may actually use: the scheduler affinity mask,
+    capped by a cgroup v2 or v1 CPU quota (as set by Docker or Kubernetes).
+    """
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    return min(cpus, quota) if quota else cpus
+
+
+def default_workers() -> int:
+    # The app is async: one worker per usable core keeps every core busy
+    # without processes fighting over them
+    return max(1, math.ceil(cpu_limit()))
+
+
+def pool_size(workers: int) -> int:
+    # Split the instance's connection budget so adding workers does not
+    # multiply the connections each mongod has to hold open
+    return max(10, MONGO_POOL_BUDGET // workers)
+
+
+class ReadyProcess(Process):
+    """
+    A uvicorn worker that reports when it is serving: the app imported,
+    lifespan startup finished and the shared socket accepting. uvicorn's
+    own ping is answered by a thread started before any of that.
+    """
+
+    def __init__(self, config, target, sockets):
+        # Workers are spawned, so the event must come from a spawn context
+        self.ready = multiprocessing.get_context("spawn").Event()
+        super().__init__(config, target, sockets)
+
+    def target(self, sockets=None):
+        server = self.real_target.__self__
+        threading.Thread(target=self._signal_ready, args=(server,), daemon=True).start()
+        return super().target(sockets)
+
+    def _signal_ready(self, server: uvicorn.Server):
+        while not server.started and not server.should_exit:
+            time.sleep(0.05)
+        if server.started:
+            self.ready.set()
+
+    def wait_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.ready.wait(0.1):
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                return False
+        return True
+
+
+class RollingMultiprocess(Multiprocess):
+    """
+    uvicorn's supervisor, with SIGHUP replacing workers one at a time. Each
+    replacement must finish its startup before the worker it replaces is
+    stopped, so capacity never drops during a restart. A replacement that
+    fails to start within WORKER_READY_TIMEOUT_SECONDS is discarded and
+    the old worker kept.
+    """
+
+    def restart_all(self) -> None:
+        for idx, process in enumerate(self.processes):
+            replacement = ReadyProcess(self.config, self.target, self.sockets)
+            replacement.start()
+            if not replacement.wait_ready(WORKER_READY_TIMEOUT_SECONDS):
+                logger.error("Replacement worker [%s] did not start; keeping [%s]", replacement.pid, process.pid)
+                replacement.terminate()
+                replacement.join()
+                continue
+            process.terminate()
+            process.join()
+            self.processes[idx] = replacement
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY, help="default: usable CPUs")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or default_workers()
+    # Read by config.py in every worker; an explicit setting wins
+    os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(pool_size(workers)))
+
+    config = uvicorn.Config(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        timeout_keep_alive=KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+        log_level=args.log_level,
+        access_log=False,
+    )
+    logger.info(
+        "Starting %d workers (cpu limit %.2f, mongo pool %s per worker)",
+        workers, cpu_limit(), os.environ["MONGO_MAX_POOL_SIZE"]
+    )
+    server = uvicorn.Server(config)
+    sock = config.bind_socket()
+    RollingMultiprocess(config, target=server.run, sockets=[sock]).run()
+
+
+if __name__ == "__main__":
+    main()
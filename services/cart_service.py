@@ -0,0 +1,240 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from database import users_collection
+from models.cart import BulkItemResult, CartItem, CartSummary
+from models.pricing import PriceBreakdown
+from services.catalog_service import CatalogService
+from services.pricing_service import PricingService
+from utils.lease import Lease, run_leader_loop, worker_stats
+from config import CART_WRITE_RETRIES, CART_SUMMARY_REFRESH_SECONDS, CART_SUMMARY_BATCH
+
+CART_SUMMARY_LEASE = "cart_summaries"
+
+# The header badge shows standard-delivery totals, matching GET /cart's default
+SUMMARY_DELIVERY_OPTION = "standard"
+
+_worker_stats = worker_stats()
+
+
+def cart_summary_stats() -> dict:
+    return dict(_worker_stats)
+
+
+def empty_summary() -> dict:
+    # An empty cart does not depend on prices, so it is never refreshed
+    return {
+        "item_count": 0, "line_count": 0, "subtotal": 0.0, "discount": 0.0,
+        "delivery_fee": 0.0, "total": 0.0, "catalog_version": None, "promotions": None,
+        "updated_at": datetime.utcnow()
+    }
+
+
+def summary_document(breakdown: PriceBreakdown, catalog_version: int, promotions: str) -> dict:
+    if not breakdown.lines:
+        return empty_summary()
+    return {
+        "item_count": sum(line.quantity for line in breakdown.lines),
+        "line_count": len(breakdown.lines),
+        "subtotal": breakdown.subtotal,
+        "discount": breakdown.discount,
+        "delivery_fee": breakdown.delivery_fee,
+        "total": breakdown.total,
+        "catalog_version": catalog_version,
+        "promotions": promotions,
+        "updated_at": datetime.utcnow()
+    }
+
+
+class CartService:
+    """
+    Cart changes applied to a user's document as a whole, together with a
+    denormalised cart_summary (counts and standard-delivery totals) so the
+    header badge never has to price the cart.
+
+    Every write is guarded by cart_version: if the cart changed since it
+    was read, the write matches nothing and is recomputed on a fresh read,
+    so concurrent updates from other tabs or devices are never silently
+    overwritten and the summary always describes the stored cart.
+    """
+
+    async def update(
+        self,
+        user: dict,
+        mutate: Callable[[list], Any],
+        products: Optional[Dict[str, dict]] = None
+    ) -> Tuple[Any, list]:
+        """
+        Apply `mutate` to a copy of the user's cart and store the result
+        with a fresh summary in one update. `products` may carry prices
+        already loaded by the caller; only the rest are fetched. Returns
+        whatever `mutate` returned and the cart as written.
+        """
+        pricing = PricingService()
+        products = dict(products or {})
+
+        for _ in range(CART_WRITE_RETRIES):
+            stored = user.get("cart", [])
+            cart = [dict(line) for line in stored]
+            outcome = mutate(cart)
+            if cart == stored and "cart_summary" in user:
+                return outcome, cart
+
+            missing = [line["product_id"] for line in cart if line["product_id"] not in products]
+            if missing:
+                products.update(await pricing.fetch_products(missing))
+            summary = await self.summarize(cart, products)
+
+            written = await users_collection.update_one(
+                {"_id": user["_id"], "cart_version": user.get("cart_version")},
+                {"$set": {"cart": cart, "cart_summary": summary}, "$inc": {"cart_version": 1}}
+            )
+            if written.matched_count:
+                return outcome, cart
+            user = await users_collection.find_one({"_id": user["_id"]}, {"cart": 1, "cart_version": 1})
+
+        raise HTTPException(status_code=409, detail="Cart changed during the update, try again")
+
+    async def summarize(self, cart: list, products: Dict[str, dict]) -> dict:
+        if not cart:
+            return empty_summary()
+        pricing = PricingService()
+        catalog_version = await CatalogService().get_version()
+        promotions, fingerprint = await pricing.current_promotions()
+        breakdown = pricing.compute(cart, products, promotions, SUMMARY_DELIVERY_OPTION)
+        return summary_document(breakdown, catalog_version, fingerprint)
+
+    async def get_summary(self, email: str) -> CartSummary:
+        """
+        The stored summary, read with one projection on the email index.
+        Carts written before summaries existed are summarised once here.
+        """
+        user = await users_collection.find_one({"email": email}, {"_id": 0, "cart_summary": 1, "cart_version": 1})
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        if "cart_summary" not in user:
+            user = await users_collection.find_one({"email": email}, {"cart": 1, "cart_version": 1})
+            await self.update(user, lambda cart: None)
+            user = await users_collection.find_one({"email": email}, {"_id": 0, "cart_summary": 1, "cart_version": 1})
+
+        summary = user["cart_summary"]
+        priced_at = summary.get("catalog_version")
+        stale = False
+        if priced_at is not None:
+            _, fingerprint = await PricingService().current_promotions()
+            stale = priced_at < await CatalogService().get_version() or summary.get("promotions") != fingerprint
+        return CartSummary(
+            **{k: v for k, v in summary.items() if k not in ("catalog_version", "promotions")},
+            version=user.get("cart_version", 0),
+            stale=stale
+        )
+
+    async def set_quantity(self, user: dict, product_id: str, quantity: int):
+        def mutate(cart: list):
+            for line in cart:
+                if line["product_id"] == product_id:
+                    line["quantity"] = quantity
+                    return
+            cart.append({"product_id": product_id, "quantity": quantity})
+
+        await self.update(user, mutate)
+
+    async def remove(self, user: dict, product_id: str):
+        def mutate(cart: list):
+            kept = [line for line in cart if line.get("product_id") != product_id]
+            if len(kept) == len(cart):
+                raise HTTPException(status_code=404, detail="Item not found in cart")
+            cart[:] = kept
+
+        await self.update(user, mutate)
+
+    async def clear(self, user: dict):
+        await self.update(user, lambda cart: cart.clear())
+
+    async def bulk_set(self, user: dict, items: List[CartItem]) -> Tuple[List[BulkItemResult], list]:
+        """
+        Set the quantity of every product in `items` (0 removes it), after
+        validating all of them with one catalog query that also loads the
+        prices for the summary. Returns the per-item results and the cart
+        as written.
+        """
+        product_ids = [item.product_id for item in items] + [line["product_id"] for line in user.get("cart", [])]
+        products = await PricingService().fetch_products(product_ids)
+        return await self.update(user, lambda cart: [self._apply(cart, item, products) for item in items], products)
+
+    async def refresh_summaries(self, lease: Optional[Lease] = None) -> int:
+        """
+        Re-price summaries computed against an older catalog version or a
+        different set of promotions, i.e. after prices or promotions
+        changed. Only non-empty carts carry a catalog version, so the
+        partial index holds just those. Each write
+        is guarded by cart_version; a cart edited meanwhile already got a
+        fresh summary from that edit.
+        """
+        pricing = PricingService()
+        refreshed = 0
+        while True:
+            if lease is not None and not await lease.acquire():
+                break
+            catalog_version = await CatalogService().get_version(max_age=0)
+            promotions, fingerprint = await pricing.current_promotions(max_age=0)
+            users = await users_collection.find(
+                {"$or": [
+                    {"cart_summary.catalog_version": {"$lt": catalog_version}},
+                    {"cart_summary.catalog_version": {"$type": "number"}, "cart_summary.promotions": {"$ne": fingerprint}}
+                ]},
+                {"cart": 1, "cart_version": 1}
+            ).limit(CART_SUMMARY_BATCH).to_list(CART_SUMMARY_BATCH)
+            if not users:
+                break
+
+            products = await pricing.fetch_products(
+                {line["product_id"] for user in users for line in user.get("cart", [])}
+            )
+            ops = [
+                UpdateOne(
+                    {"_id": user["_id"], "cart_version": user.get("cart_version")},
+                    {"$set": {"cart_summary": summary_document(
+                        pricing.compute(user.get("cart", []), products, promotions, SUMMARY_DELIVERY_OPTION),
+                        catalog_version, fingerprint
+                    )}}
+                )
+                for user in users
+            ]
+            await users_collection.bulk_write(ops, ordered=False)
+            refreshed += len(users)
+            if len(users) < CART_SUMMARY_BATCH:
+                break
+        return refreshed
+
+    def _apply(self, cart: list, item: CartItem, products: dict) -> BulkItemResult:
+        if not ObjectId.is_valid(item.product_id) or item.quantity < 0:
+            return BulkItemResult(product_id=item.product_id, status="invalid")
+        if item.product_id not in products:
+            return BulkItemResult(product_id=item.product_id, status="not_found")
+
+        for idx, line in enumerate(cart):
+            if line["product_id"] == item.product_id:
+                if item.quantity == 0:
+                    del cart[idx]
+                    status = "removed"
+                elif line["quantity"] == item.quantity:
+                    status = "unchanged"
+                else:
+                    line["quantity"] = item.quantity
+                    status = "updated"
+                break
+        else:
+            if item.quantity == 0:
+                status = "unchanged"
+            else:
+                cart.append({"product_id": item.product_id, "quantity": item.quantity})
+                status = "added"
+        return BulkItemResult(product_id=item.product_id, status=status)
+
+
+async def run_cart_summary_worker(interval: float = CART_SUMMARY_REFRESH_SECONDS):
+    service = CartService()
+    await run_leader_loop(CART_SUMMARY_LEASE, service.refresh_summaries, interval, _worker_stats)
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime
+from pymongo import ReturnDocument
+from typing import Dict, Iterable, Optional
+from bson import ObjectId
+from database import meta_collection, products_collection
+from config import CATALOG_VERSION_TTL, SINGLEFLIGHT_TIMEOUT
+from utils.singleflight import SingleFlight
+
+CATALOG_META_ID = "catalog"
+
+# Process-local copy of the catalog version so hot paths (ETags, quotes)
+# do not pay a database read on every request.
+_version_cache = {"version": None, "checked_at": 0.0}
+
+# Concurrent lookups of the same product share one find_one
+_product_flight = SingleFlight("product_by_id", timeout=SINGLEFLIGHT_TIMEOUT)
+
+
+class CatalogService:
+
+    async def get_version(self, max_age: float = CATALOG_VERSION_TTL) -> int:
+        """
+        Return the catalog version, a counter bumped whenever product data
+        changes. Served from memory for up to `max_age` seconds.
+        """
+        now = time.monotonic()
+        if _version_cache["version"] is not None and now - _version_cache["checked_at"] < max_age:
+            return _version_cache["version"]
+
+        doc = await meta_collection.find_one({"_id": CATALOG_META_ID}, {"version": 1})
+        version = int(doc.get("version", 0)) if doc else 0
+        _version_cache.update(version=version, checked_at=now)
+        return version
+
+    async def bump_version(self) -> int:
+        """
+        Record a catalog change. Call after any write to products_collection.
+        """
+        doc = await meta_collection.find_one_and_update(
+            {"_id": CATALOG_META_ID},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        _version_cache.update(version=int(doc["version"]), checked_at=time.monotonic())
+        return _version_cache["version"]
+
+    async def update_product(self, product_id: str, changes: dict) -> bool:
+        """
+        Apply catalog edits to one product and bump the catalog version.
+        A changed Selling Price also records `previous_price` and
+        `price_updated_at`, which the price-drop alert job tails. Returns
+        False when the product does not exist.
+        """
+        _id = ObjectId(product_id)
+        while True:
+            current = await products_collection.find_one({"_id": _id}, {"Selling Price": 1})
+            if current is None:
+                return False
+            now = datetime.utcnow()
+            update = {**changes, "updated_at": now}
+            old_price = current.get("Selling Price")
+            if "Selling Price" in changes and changes["Selling Price"] != old_price:
+                update.update(previous_price=old_price, price_updated_at=now)
+            # Guarded on the price just read, so previous_price is always the
+            # one this edit replaced even when two edits race
+            result = await products_collection.update_one({"_id": _id, "Selling Price": old_price}, {"$set": update})
+            if result.matched_count:
+                break
+        await self.bump_version()
+        return True
+
+    async def get_product(self, product_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        """
+        Fetch one product by id. The returned document may be shared with
+        other concurrent callers and must not be mutated.
+        """
+        key = (product_id, tuple(sorted(projection)) if projection else None)
+        return await _product_flight.do(
+            key,
+            lambda: products_collection.find_one({"_id": ObjectId(product_id)}, projection)
+        )
+
+    async def get_products(self, product_ids: Iterable[str], projection: Optional[dict] = None) -> Dict[str, dict]:
+        """
+        Fetch many products with one $in query, keyed by id string.
+        Ids that are malformed or not in the catalog are simply absent.
+        """
+        object_ids = list({ObjectId(pid) for pid in product_ids if ObjectId.is_valid(pid)})
+        if not object_ids:
+            return {}
+        cursor = products_collection.find({"_id": {"$in": object_ids}}, projection)
+        return {str(doc["_id"]): doc async for doc in cursor}
@@ -0,0 +1,151 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from database import orders_collection, products_collection
+from utils.responses import dumps
+from config import EXPORT_BATCH_SIZE, EXPORT_CHUNK_BYTES
+
+# Internal bookkeeping that finance has no use for
+ORDER_EXPORT_PROJECTION = {
+    "idempotency_key": 0,
+    "reservation": 0,
+    "expired_by": 0,
+    "rollup": 0,
+    "payment.details": 0,
+    "payment.last_event_id": 0
+}
+
+ORDER_CSV_COLUMNS = [
+    ("id", lambda o: o["_id"]),
+    ("order_id", lambda o: o.get("order_id")),
+    ("email", lambda o: o.get("email")),
+    ("created_at", lambda o: o.get("created_at")),
+    ("updated_at", lambda o: o.get("updated_at")),
+    ("status", lambda o: o.get("status")),
+    ("payment_method", lambda o: o.get("payment_method", o.get("method"))),
+    ("payment_status", lambda o: o.get("payment", {}).get("status")),
+    ("payment_id", lambda o: o.get("payment", {}).get("payment_id")),
+    ("transaction_id", lambda o: o.get("payment", {}).get("transaction_id")),
+    ("delivery_option", lambda o: o.get("delivery_option")),
+    ("item_count", lambda o: sum(item.get("quantity", 0) for item in o.get("items", []))),
+    ("subtotal", lambda o: o.get("pricing", {}).get("subtotal")),
+    ("discount", lambda o: o.get("pricing", {}).get("discount")),
+    ("delivery_fee", lambda o: o.get("pricing", {}).get("delivery_fee")),
+    ("total", lambda o: o.get("pricing", {}).get("total", o.get("amount"))),
+    ("applied_promotions", lambda o: ";".join(o.get("applied_promotions", []))),
+    ("city", lambda o: o.get("shipping_address", {}).get("city")),
+    ("state", lambda o: o.get("shipping_address", {}).get("state")),
+    ("pincode", lambda o: o.get("shipping_address", {}).get("pincode")),
+    ("tracking_id", lambda o: o.get("shipping", {}).get("tracking_id")),
+]
+
+PRODUCT_FIELDS = [
+    "Name", "Brand", "Model", "Color", "Memory", "Storage",
+    "Rating", "Selling Price", "Original Price"
+]
+
+PRODUCT_CSV_COLUMNS = [("id", lambda p: p["_id"])] + [
+    (field, lambda p, field=field: p.get(field)) for field in PRODUCT_FIELDS
+]
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Spreadsheets run a cell starting with one of these as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ExportService:
+    """
+    Streams collections straight from a Mongo cursor. Documents are pulled
+    EXPORT_BATCH_SIZE at a time and written out in chunks of roughly
+    EXPORT_CHUNK_BYTES, so memory stays flat whatever the export size.
+
+    Exports are ordered by an indexed key ending in _id, so an interrupted
+    download resumes with `after_id` set to the id of the last row received.
+    """
+
+    async def orders(
+        self, fmt: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+        after_id: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        query = {}
+        if start or end:
+            query["created_at"] = {}
+            if start:
+                query["created_at"]["$gte"] = start
+            if end:
+                query["created_at"]["$lt"] = end
+
+        if after_id:
+            last = await orders_collection.find_one({"_id": self._object_id(after_id)}, {"created_at": 1})
+            if not last:
+                raise HTTPException(status_code=400, detail="Unknown after_id")
+            query = {"$and": [query, {"$or": [
+                {"created_at": {"$gt": last["created_at"]}},
+                {"created_at": last["created_at"], "_id": {"$gt": last["_id"]}}
+            ]}]}
+
+        cursor = orders_collection.find(
+            query, ORDER_EXPORT_PROJECTION, batch_size=EXPORT_BATCH_SIZE
+        ).sort([("created_at", 1), ("_id", 1)])
+        return self._stream(cursor, fmt, ORDER_CSV_COLUMNS)
+
+    async def products(self, fmt: str, after_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        query = {"_id": {"$gt": self._object_id(after_id)}} if after_id else {}
+        projection = {field: 1 for field in PRODUCT_FIELDS}
+        cursor = products_collection.find(query, projection, batch_size=EXPORT_BATCH_SIZE).sort("_id", 1)
+        return self._stream(cursor, fmt, PRODUCT_CSV_COLUMNS)
+
+    async def _stream(self, cursor, fmt: str, columns: List[tuple]) -> AsyncIterator[bytes]:
+        chunk = bytearray()
+        if fmt == "csv":
+            encode = self._csv_encoder(columns)
+            header = io.StringIO()
+            csv.writer(header).writerow([name for name, _ in columns])
+            chunk += header.getvalue().encode()
+        else:
+            encode = self._ndjson_row
+        try:
+            async for doc in cursor:
+                chunk += encode(doc)
+                if len(chunk) >= EXPORT_CHUNK_BYTES:
+                    yield bytes(chunk)
+                    chunk.clear()
+            if chunk:
+                yield bytes(chunk)
+        finally:
+            # Client went away mid-download: free the server-side cursor now
+            await cursor.close()
+
+    def _ndjson_row(self, doc: dict) -> bytes:
+        doc["id"] = str(doc.pop("_id"))
+        return dumps(doc) + b"\n"
+
+    def _csv_encoder(self, columns: List[tuple]) -> Callable[[dict], bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def encode(doc: dict) -> bytes:
+            row = []
+            for _, get in columns:
+                value = get(doc)
+                if isinstance(value, datetime):
+                    value = value.isoformat()
+                elif isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+                    # Customer-entered text (names, addresses) opens as plain text
+                    value = "'" + value
+                row.append("" if value is None else value)
+            writer.writerow(row)
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return line.encode()
+        return encode
+
+    def _object_id(self, value: str) -> ObjectId:
+        if not ObjectId.is_valid(value):
+            raise HTTPException(status_code=400, detail="Invalid after_id")
+        return ObjectId(value)
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import logging
+import uuid
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+from database import idempotency_collection
+from config import IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_LEASE_SECONDS, IDEMPOTENCY_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Same-process duplicates wait on these instead of polling the database
+_local_waiters: Dict[str, asyncio.Future] = {}
+
+POLL_INTERVAL = 0.05  # seconds
+
+
+def request_fingerprint(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Idempotency-Key support backed by the idempotency_keys collection.
+    A key's _id is "<email>:<key>" (unique by construction) and documents
+    expire through a TTL index on expires_at.
+
+    The request that claims a key stamps it with its own owner token and
+    renews the locked_until lease while it runs (see `hold`), so a slow
+    request is not mistaken for a dead one. Only the current owner can
+    complete or release a key: an owner whose key was taken over finds
+    its writes ignored.
+    """
+
+    def __init__(self):
+        self.owner = uuid.uuid4().hex
+
+    async def begin(self, email: str, key: str, fingerprint: str) -> Optional[dict]:
+        """
+        Claim `key` for this request. Returns None when the caller owns the
+        key and should run the request, or the stored response to replay.
+        """
+        doc_id = f"{email}:{key}"
+        deadline = asyncio.get_running_loop().time() + IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            if await self._claim(doc_id, email, key, fingerprint):
+                _local_waiters[doc_id] = asyncio.get_running_loop().create_future()
+                return None
+
+            doc = await idempotency_collection.find_one({"_id": doc_id})
+            if doc is None:
+                continue  # released or expired between our insert and read
+            if doc["fingerprint"] != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+            if doc["status"] == "completed":
+                return doc["response"]
+            if doc["locked_until"] < datetime.utcnow() and await self._take_over(doc_id, doc.get("owner")):
+                _local_waiters[doc_id] = asyncio.get_running_loop().create_future()
+                return None
+
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            waiter = _local_waiters.get(doc_id)
+            try:
+                if waiter is not None:
+                    await asyncio.wait_for(asyncio.shield(waiter), remaining)
+                else:
+                    await asyncio.sleep(min(POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    @asynccontextmanager
+    async def hold(self, email: str, key: str):
+        """
+        Renew this owner's lease on `key` every third of
+        IDEMPOTENCY_LEASE_SECONDS for as long as the block runs.
+        """
+        renewer = asyncio.create_task(self._renew(f"{email}:{key}"))
+        try:
+            yield
+        finally:
+            renewer.cancel()
+            with suppress(asyncio.CancelledError):
+                await renewer
+
+    async def complete(self, email: str, key: str, response: dict) -> bool:
+        """
+        Store the response to replay. False when another request took the
+        key over, in which case nothing is written.
+        """
+        doc_id = f"{email}:{key}"
+        result = await idempotency_collection.update_one(
+            {"_id": doc_id, "status": "in_progress", "owner": self.owner},
+            {"$set": {"status": "completed", "response": response, "completed_at": datetime.utcnow()}}
+        )
+        if result.modified_count:
+            self._wake(doc_id)
+        return result.modified_count == 1
+
+    async def release(self, email: str, key: str):
+        """
+        Forget a key whose request failed so the client can retry it.
+        """
+        doc_id = f"{email}:{key}"
+        result = await idempotency_collection.delete_one({"_id": doc_id, "owner": self.owner, "status": "in_progress"})
+        if result.deleted_count:
+            self._wake(doc_id)
+
+    async def _claim(self, doc_id: str, email: str, key: str, fingerprint: str) -> bool:
+        now = datetime.utcnow()
+        try:
+            await idempotency_collection.insert_one({
+                "_id": doc_id,
+                "email": email,
+                "key": key,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "owner": self.owner,
+                "locked_until": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+                "created_at": now,
+                "expires_at": now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _take_over(self, doc_id: str, owner: str) -> bool:
+        """
+        Claim a key whose owner died mid-request (lease expired).
+        """
+        now = datetime.utcnow()
+        result = await idempotency_collection.update_one(
+            {"_id": doc_id, "status": "in_progress", "owner": owner, "locked_until": {"$lt": now}},
+            {"$set": {"owner": self.owner, "locked_until": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}}
+        )
+        return result.modified_count == 1
+
+    async def _renew(self, doc_id: str):
+        while True:
+            await asyncio.sleep(IDEMPOTENCY_LEASE_SECONDS / 3)
+            try:
+                result = await idempotency_collection.update_one(
+                    {"_id": doc_id, "status": "in_progress", "owner": self.owner},
+                    {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}}
+                )
+            except Exception as e:
+                logger.warning(f"idempotency lease renewal failed for {doc_id}: {e}")
+                continue
+            if result.matched_count == 0:
+                return  # completed, released or taken over
+
+    def _wake(self, doc_id: str):
+        waiter = _local_waiters.pop(doc_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
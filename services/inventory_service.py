@@ -0,0 +1,195 @@
+import asyncio
+import random
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from database import inventory_collection, orders_collection
+from services.catalog_service import CatalogService
+from config import INVENTORY_HOLD_LOG
+
+# Stock-tracked products and their counter shard count, reloaded whenever
+# the catalog version moves. Products absent here are not stock-limited.
+_tracked_cache = {"version": None, "shards": {}}
+
+
+def shard_id(product_id: str, shard: int) -> str:
+    return f"{product_id}:{shard}"
+
+
+class InventoryService:
+    """
+    Stock levels live in the inventory collection, one counter document per
+    (product, shard). Ordinary products have a single shard; ultra-hot SKUs
+    can be spread over N shards so concurrent buyers update different
+    documents instead of queueing on one.
+    """
+
+    async def tracked_products(self) -> Dict[str, int]:
+        version = await CatalogService().get_version()
+        if _tracked_cache["version"] != version:
+            shards = {
+                doc["product_id"]: doc.get("shards", 1)
+                async for doc in inventory_collection.find({"shard": 0}, {"product_id": 1, "shards": 1})
+            }
+            _tracked_cache.update(version=version, shards=shards)
+        return _tracked_cache["shards"]
+
+    async def set_stock(self, product_id: str, stock: int, shards: int = 1):
+        """
+        Replace a product's stock level, split evenly across `shards` counter
+        documents. Meant for restocking, not for use during a live sale:
+        reservations held against the old counters are not carried over.
+        """
+        now = datetime.utcnow()
+        docs = [
+            {
+                "_id": shard_id(product_id, n),
+                "product_id": product_id,
+                "shard": n,
+                "shards": shards,
+                "stock": stock // shards + (1 if n < stock % shards else 0),
+                "holds": [],
+                "updated_at": now
+            }
+            for n in range(shards)
+        ]
+        await inventory_collection.delete_many({"product_id": product_id})
+        await inventory_collection.insert_many(docs)
+        # Tracking changes must reach every worker's cache
+        await CatalogService().bump_version()
+
+    async def get_stock(self, product_id: str) -> int:
+        pipeline = [
+            {"$match": {"product_id": product_id}},
+            {"$group": {"_id": None, "stock": {"$sum": "$stock"}}}
+        ]
+        result = await inventory_collection.aggregate(pipeline).to_list(1)
+        return result[0]["stock"] if result else 0
+
+    async def reserve(self, reservation_id: str, items: Iterable[Tuple[str, int]]) -> List[dict]:
+        """
+        Atomically take stock for every tracked line of a cart, or none of it.
+
+        All lines are decremented concurrently, one conditional
+        find_one_and_update each, whose filters require `stock >= quantity`,
+        so a counter can never go negative. Each call reports whether its
+        own line was taken, so when some lines fail exactly the ones that
+        succeeded are put back. `reservation_id` is also logged in the
+        counter's bounded `holds` list for auditing. Returns the allocations
+        to store on the order, or raises 409 naming the products that are
+        out of stock.
+        """
+        tracked = await self.tracked_products()
+        wanted = defaultdict(int)
+        for product_id, quantity in items:
+            if product_id in tracked:
+                wanted[product_id] += quantity
+        if not wanted:
+            return []
+
+        allocations = [
+            {"product_id": pid, "shard": random.randrange(tracked[pid]), "quantity": qty}
+            for pid, qty in wanted.items()
+        ]
+        taken = await asyncio.gather(*[
+            inventory_collection.find_one_and_update(*self._take(a, reservation_id), projection={"_id": 1})
+            for a in allocations
+        ], return_exceptions=True)
+        errors = [doc for doc in taken if isinstance(doc, BaseException)]
+        if errors:
+            await self.release([a for a, doc in zip(allocations, taken) if isinstance(doc, dict)])
+            raise errors[0]
+        missing = [a for a, doc in zip(allocations, taken) if doc is None]
+        if not missing:
+            return allocations
+
+        # A sharded SKU may only have run dry on the shard we picked
+        unavailable = []
+        for allocation in missing:
+            if tracked[allocation["product_id"]] == 1 or not await self._take_from_other_shard(allocation, reservation_id):
+                unavailable.append(allocation)
+
+        if unavailable:
+            await self.release([a for a in allocations if a not in unavailable])
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Some items are out of stock",
+                    "product_ids": [a["product_id"] for a in unavailable]
+                }
+            )
+        return allocations
+
+    async def release(self, allocations: List[dict]):
+        """
+        Return reserved stock to its counters.
+        """
+        if not allocations:
+            return
+        await inventory_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": shard_id(a["product_id"], a["shard"])},
+                    {"$inc": {"stock": a["quantity"]}}
+                )
+                for a in allocations
+            ],
+            ordered=False
+        )
+
+    def reservation(self, allocations: List[dict], order_status: str) -> dict:
+        """
+        The `reservation` sub-document stored on an order. Stock for an order
+        awaiting payment stays held until the payment is confirmed or the
+        order lifecycle worker expires the order and releases it.
+        """
+        status = "held" if order_status == "pending_payment" else "committed"
+        return {"items": allocations, "status": status}
+
+    async def commit_reservation(self, order_id: str) -> bool:
+        """
+        Keep an order's held stock for good once its payment succeeds.
+        """
+        result = await orders_collection.update_one(
+            {"order_id": order_id, "reservation.status": "held"},
+            {"$set": {"reservation.status": "committed"}}
+        )
+        return result.modified_count == 1
+
+    def _take(self, allocation: dict, reservation_id: str) -> Tuple[dict, dict]:
+        return (
+            {
+                "_id": shard_id(allocation["product_id"], allocation["shard"]),
+                "stock": {"$gte": allocation["quantity"]}
+            },
+            {
+                "$inc": {"stock": -allocation["quantity"]},
+                "$push": {"holds": {"$each": [reservation_id], "$slice": -INVENTORY_HOLD_LOG}}
+            }
+        )
+
+    async def _take_from_other_shard(self, allocation: dict, reservation_id: str) -> bool:
+        """
+        Retry a failed line on the product's other shards that still hold
+        the full quantity, in random order. Lines are never split, so near
+        sell-out a line can fail while its units are spread over shards.
+        """
+        cursor = inventory_collection.find(
+            {
+                "product_id": allocation["product_id"],
+                "shard": {"$ne": allocation["shard"]},
+                "stock": {"$gte": allocation["quantity"]}
+            },
+            {"shard": 1}
+        )
+        candidates = [doc["shard"] async for doc in cursor]
+        random.shuffle(candidates)
+        for n in candidates:
+            candidate = dict(allocation, shard=n)
+            result = await inventory_collection.update_one(*self._take(candidate, reservation_id))
+            if result.modified_count == 1:
+                allocation["shard"] = n
+                return True
+        return False
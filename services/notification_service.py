@@ -0,0 +1,129 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+import orjson
+from starlette.concurrency import run_in_threadpool
+from database import notifications_collection
+from utils.email import send_email
+from utils.lease import Lease, run_leader_loop, worker_stats
+from config import (
+    NOTIFY_BACKEND, NOTIFY_OUTBOX_PATH, NOTIFY_SWEEP_SECONDS, NOTIFY_BATCH,
+    NOTIFY_MAX_ATTEMPTS, NOTIFY_RETRY_SECONDS, NOTIFY_RETENTION_DAYS
+)
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_LEASE = "notifications"
+
+_worker_stats = worker_stats()
+
+
+def notification_stats() -> dict:
+    return dict(_worker_stats)
+
+
+class OutboxSender:
+    """
+    Local stand-in for email: appends each message as a JSON line to
+    `path`, so development and tests can see exactly what would be sent.
+    """
+
+    def __init__(self, path: str = NOTIFY_OUTBOX_PATH):
+        self.path = path
+
+    async def send(self, to: str, subject: str, body: str) -> bool:
+        line = orjson.dumps({"to": to, "subject": subject, "body": body, "at": datetime.utcnow()})
+        await run_in_threadpool(self._append, line)
+        logger.info("outbox: %s to %s", subject, to)
+        return True
+
+    def _append(self, line: bytes):
+        with open(self.path, "ab") as f:
+            f.write(line + b"\n")
+
+
+class SmtpSender:
+    async def send(self, to: str, subject: str, body: str) -> bool:
+        # smtplib blocks, so it runs in the thread pool
+        return await run_in_threadpool(send_email, to, subject, body)
+
+
+def default_sender():
+    return SmtpSender() if NOTIFY_BACKEND == "smtp" else OutboxSender()
+
+
+class NotificationService:
+    """
+    Outgoing user notifications, queued in the notifications collection and
+    delivered by a background worker. Producers only insert documents, so
+    a slow or failing mail server never holds up the job that found
+    something to say. Failed sends are retried up to NOTIFY_MAX_ATTEMPTS
+    times; delivered and abandoned notifications expire after
+    NOTIFY_RETENTION_DAYS.
+    """
+
+    def __init__(self, sender=None):
+        self.sender = sender or default_sender()
+
+    async def enqueue(self, notifications: List[dict]) -> int:
+        """
+        Queue {email, kind, subject, body, ...} documents for delivery.
+        """
+        if not notifications:
+            return 0
+        now = datetime.utcnow()
+        await notifications_collection.insert_many([
+            {**notification, "status": "pending", "attempts": 0, "created_at": now, "next_attempt_at": now}
+            for notification in notifications
+        ])
+        return len(notifications)
+
+    async def deliver_pending(self, lease: Optional[Lease] = None) -> int:
+        """
+        Send due notifications oldest first, NOTIFY_BATCH at a time.
+        Returns the number delivered.
+        """
+        delivered = 0
+        while True:
+            if lease is not None and not await lease.acquire():
+                break
+            now = datetime.utcnow()
+            due = await notifications_collection.find(
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"email": 1, "subject": 1, "body": 1, "attempts": 1}
+            ).sort("next_attempt_at", 1).limit(NOTIFY_BATCH).to_list(NOTIFY_BATCH)
+            if not due:
+                break
+
+            for notification in due:
+                try:
+                    sent = await self.sender.send(notification["email"], notification["subject"], notification["body"])
+                except Exception as e:
+                    logger.warning(f"notification {notification['_id']} failed: {e}")
+                    sent = False
+                await self._record(notification, sent)
+                delivered += sent
+            if len(due) < NOTIFY_BATCH:
+                break
+        return delivered
+
+    async def _record(self, notification: dict, sent: bool):
+        now = datetime.utcnow()
+        attempts = notification.get("attempts", 0) + 1
+        if sent:
+            update = {"status": "sent", "sent_at": now}
+        elif attempts >= NOTIFY_MAX_ATTEMPTS:
+            update = {"status": "failed"}
+        else:
+            # Linear backoff keeps a flapping mail server from being hammered
+            update = {"next_attempt_at": now + timedelta(seconds=NOTIFY_RETRY_SECONDS * attempts)}
+        if "next_attempt_at" not in update:
+            update["expires_at"] = now + timedelta(days=NOTIFY_RETENTION_DAYS)
+        await notifications_collection.update_one(
+            {"_id": notification["_id"]}, {"$set": {**update, "attempts": attempts}}
+        )
+
+
+async def run_notification_worker(interval: float = NOTIFY_SWEEP_SECONDS):
+    service = NotificationService()
+    await run_leader_loop(NOTIFY_LEASE, service.deliver_pending, interval, _worker_stats)
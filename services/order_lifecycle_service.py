@@ -0,0 +1,98 @@
+import uuid
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from database import orders_collection
+from services.inventory_service import InventoryService
+from utils.lease import Lease, run_leader_loop, worker_stats
+from config import PENDING_PAYMENT_TIMEOUT_MINUTES, ORDER_SWEEP_SECONDS, ORDER_SWEEP_BATCH
+
+# Reported on /metrics
+_worker_stats = worker_stats()
+
+
+def order_lifecycle_stats() -> dict:
+    return dict(_worker_stats)
+
+
+class OrderLifecycleService:
+    """
+    Moves orders that were never paid out of `pending_payment`.
+    """
+
+    def __init__(self, batch_size: int = ORDER_SWEEP_BATCH):
+        self.batch_size = batch_size
+
+    async def expire_pending_orders(self, lease: Lease = None) -> int:
+        """
+        Expire every order left in pending_payment for longer than
+        PENDING_PAYMENT_TIMEOUT_MINUTES and release the stock it held.
+
+        Due orders are read oldest first through the partial (status,
+        created_at) index and updated in one bulk_write per batch. Each
+        update is still conditional on the order being unpaid, so a payment
+        confirmed mid-sweep wins; the batch id stamped on expired orders
+        tells which updates actually applied. Returns the number expired.
+        """
+        cutoff = datetime.utcnow() - timedelta(minutes=PENDING_PAYMENT_TIMEOUT_MINUTES)
+        expired = 0
+
+        while True:
+            # Renewing per batch keeps the lease alive through a long backlog
+            if lease is not None and not await lease.acquire():
+                break
+
+            due = await orders_collection.find(
+                {"status": "pending_payment", "created_at": {"$lte": cutoff}},
+                {"reservation": 1}
+            ).sort("created_at", 1).limit(self.batch_size).to_list(self.batch_size)
+            if not due:
+                break
+
+            batch_id = uuid.uuid4().hex
+            now = datetime.utcnow()
+            result = await orders_collection.bulk_write(
+                [self._expire(order, batch_id, now) for order in due], ordered=False
+            )
+
+            if result.modified_count == len(due):
+                applied = due
+            else:
+                ids = {
+                    doc["_id"]
+                    async for doc in orders_collection.find(
+                        {"_id": {"$in": [o["_id"] for o in due]}, "expired_by": batch_id}, {"_id": 1}
+                    )
+                }
+                applied = [order for order in due if order["_id"] in ids]
+
+            await InventoryService().release([
+                item
+                for order in applied
+                if order.get("reservation", {}).get("status") == "held"
+                for item in order["reservation"]["items"]
+            ])
+            expired += len(applied)
+
+            if len(due) < self.batch_size:
+                break
+
+        return expired
+
+    def _expire(self, order: dict, batch_id: str, now: datetime) -> UpdateOne:
+        update = {
+            "status": "expired",
+            "payment.status": "expired",
+            "shipping.status": "cancelled",
+            "expired_by": batch_id,
+            "updated_at": now
+        }
+        query = {"_id": order["_id"], "status": "pending_payment"}
+        if order.get("reservation", {}).get("status") == "held":
+            query["reservation.status"] = "held"
+            update["reservation.status"] = "released"
+        return UpdateOne(query, {"$set": update})
+
+
+async def run_order_lifecycle_worker(interval: float = ORDER_SWEEP_SECONDS):
+    service = OrderLifecycleService()
+    await run_leader_loop("order_lifecycle", service.expire_pending_orders, interval, _worker_stats)
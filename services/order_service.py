@@ -1,37 +1,43 @@
-from typing import List
+import asyncio
 from datetime import datetime
-from models.checkout import CartItem, PricingSummary
-from database import orders_collection
+from typing import List, Optional
+from fastapi import HTTPException
+from database import get_client, orders_collection, users_collection, supports_transactions
+from models.order import CheckoutResponse, OrderSummary, OrderPage, OrderDetailResponse
+from services.cart_service import empty_summary
+from utils.cursor import encode_cursor, decode_cursor
 
-class OrderService:
+# Every field here is in the (email, created_at, order_id, ...) index, so
+# listing orders is answered from the index without loading documents
+ORDER_SUMMARY_PROJECTION = {
+    "_id": 0, "order_id": 1, "status": 1, "pricing.total": 1, "created_at": 1, "updated_at": 1
+}
 
-    async def calculate_pricing_from_cart(
-        self, cart: List[CartItem], delivery_option: str
-    ) -> PricingSummary:
-        """
-        Calculate total pricing based on cart items and delivery option.
-        Includes subtotal, delivery fee, and total.
-        """
-        subtotal = sum(item.price * item.quantity for item in cart)
-        delivery_fee = self._get_delivery_fee(delivery_option)
-        total = subtotal + delivery_fee
+CHECKOUT_RESPONSE_PROJECTION = {
+    "_id": 0, "order_id": 1, "status": 1, "payment": 1, "shipping": 1, "created_at": 1, "updated_at": 1
+}
 
-        return PricingSummary(
-            subtotal=subtotal,
-            delivery_fee=delivery_fee,
-            total=total
-        )
 
-    def _get_delivery_fee(self, option: str) -> float:
-        """
-        Return delivery fee based on selected option.
-        """
-        delivery_fees = {
-            "standard": 40.0,
-            "express": 80.0,
-            "same-day": 120.0
-        }
-        return delivery_fees.get(option, 40.0)
+def checkout_response(doc: dict) -> CheckoutResponse:
+    """
+    A stored order in the CheckoutResponse shape, mapped from its payment
+    and shipping sub-documents.
+    """
+    payment, shipping = doc.get("payment", {}), doc.get("shipping", {})
+    return CheckoutResponse(
+        success=True,
+        order_id=doc["order_id"],
+        message=f"Order {doc['status'].replace('_', ' ')}",
+        payment_id=payment.get("payment_id"),
+        tracking_id=shipping.get("tracking_id"),
+        estimated_delivery=shipping.get("estimated_delivery"),
+        status=doc["status"],
+        payment_status=payment.get("status", "unknown"),
+        created_at=doc["created_at"],
+        updated_at=doc.get("updated_at", doc["created_at"])
+    )
+
+class OrderService:
 
     async def create_order(self, email: str, amount: float, method: str) -> dict:
         """
@@ -55,3 +61,110 @@ class OrderService:
             "amount": amount,
             "method": method
         }
+
+    async def place_order(self, order: dict, clear_cart: bool):
+        """
+        Persist a checkout order and, when `clear_cart`, empty the buyer's cart.
+        On replica sets both writes commit in one transaction; on standalone
+        servers they are issued concurrently so checkout waits for one round
+        trip instead of two.
+        """
+        cart_update = (
+            {"email": order["email"]},
+            {"$set": {"cart": [], "cart_summary": empty_summary()}, "$inc": {"cart_version": 1}}
+        )
+
+        if await supports_transactions():
+            async def write(session):
+                await orders_collection.insert_one(order, session=session)
+                if clear_cart:
+                    await users_collection.update_one(*cart_update, session=session)
+
+            async with await get_client().start_session() as session:
+                await session.with_transaction(write)
+            return
+
+        writes = [orders_collection.insert_one(order)]
+        if clear_cart:
+            writes.append(users_collection.update_one(*cart_update))
+        await asyncio.gather(*writes)
+
+    async def list_orders(self, email: str, limit: int = 20, cursor: Optional[str] = None) -> OrderPage:
+        """
+        A page of the user's orders, newest first. Pages are keyset-paginated
+        on (created_at, order_id), so deep pages cost the same as the first.
+        """
+        query = {"email": email, "order_id": {"$type": "string"}}
+        position = decode_cursor(cursor)
+        if position:
+            try:
+                created_at = datetime.fromisoformat(position["c"])
+                order_id = position["o"]
+            except (KeyError, TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            # The outer bound gives the planner an index range; $or breaks ties
+            query["created_at"] = {"$lte": created_at}
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "order_id": {"$lt": order_id}}
+            ]
+
+        docs = await orders_collection.find(query, ORDER_SUMMARY_PROJECTION).sort(
+            [("created_at", -1), ("order_id", -1)]
+        ).limit(limit + 1).to_list(limit + 1)
+
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        orders = [
+            OrderSummary(
+                order_id=doc["order_id"],
+                status=doc["status"],
+                total=doc.get("pricing", {}).get("total", 0.0),
+                created_at=doc["created_at"],
+                updated_at=doc.get("updated_at", doc["created_at"])
+            )
+            for doc in docs
+        ]
+        next_cursor = None
+        if has_more:
+            last = docs[-1]
+            next_cursor = encode_cursor({"c": last["created_at"].isoformat(), "o": last["order_id"]})
+        return OrderPage(orders=orders, next_cursor=next_cursor, has_more=has_more)
+
+    async def recent_orders(self, email: str, limit: int = 5) -> List[CheckoutResponse]:
+        """
+        The user's newest orders in the CheckoutResponse shape that
+        GET /orders/recent has always returned.
+        """
+        docs = await orders_collection.find(
+            {"email": email, "order_id": {"$type": "string"}}, CHECKOUT_RESPONSE_PROJECTION
+        ).sort([("created_at", -1), ("order_id", -1)]).limit(limit).to_list(limit)
+
+        return [checkout_response(doc) for doc in docs]
+
+    async def find_by_idempotency_key(self, email: str, key: str) -> Optional[CheckoutResponse]:
+        """
+        The order an earlier checkout with this Idempotency-Key placed.
+        """
+        doc = await orders_collection.find_one({"email": email, "idempotency_key": key}, CHECKOUT_RESPONSE_PROJECTION)
+        return checkout_response(doc) if doc else None
+
+    async def get_order(self, email: str, order_id: str) -> OrderDetailResponse:
+        order = await orders_collection.find_one({"order_id": order_id, "email": email})
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+
+        shipping = order.get("shipping", {})
+        return OrderDetailResponse(
+            order_id=order["order_id"],
+            items=order.get("items", []),
+            customer_info=order["customer_info"],
+            shipping_address=order["shipping_address"],
+            pricing=order["pricing"],
+            status=order["status"],
+            tracking_id=shipping.get("tracking_id"),
+            estimated_delivery=shipping.get("estimated_delivery"),
+            payment_status=order.get("payment", {}).get("status", "unknown"),
+            created_at=order["created_at"],
+            updated_at=order.get("updated_at", order["created_at"])
+        )
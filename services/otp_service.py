@@ -0,0 +1,68 @@
+from datetime import datetime
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from database import otps_collection
+from utils.otp import generate_otp, get_expiry, hash_otp
+from config import OTP_MAX_ATTEMPTS
+
+
+class OTPService:
+    """
+    One-time codes in the otps collection, one document per email holding
+    only an HMAC of the code. A TTL index removes expired codes, and every
+    check is a single keyed read or write that never touches the user.
+    """
+
+    async def issue(self, email: str) -> str:
+        """
+        Create a fresh code for `email`, replacing any earlier one.
+        Returns the plain code for delivery; only its hash is stored.
+        """
+        otp = generate_otp()
+        now = datetime.utcnow()
+        await otps_collection.replace_one(
+            {"_id": email.lower()},
+            {"code_hash": hash_otp(email, otp), "attempts": 0, "created_at": now, "expires_at": get_expiry()},
+            upsert=True
+        )
+        return otp
+
+    async def verify(self, email: str, otp: str):
+        """
+        Check a code without using it up. Raises 400 when it is wrong or
+        expired.
+        """
+        match = await otps_collection.find_one(self._valid(email, otp), {"_id": 1})
+        if not match:
+            await self._reject(email)
+
+    async def consume(self, email: str, otp: str):
+        """
+        Check a code and delete it in one atomic step, so it can be used
+        exactly once even by concurrent requests. Raises 400 otherwise.
+        """
+        match = await otps_collection.find_one_and_delete(self._valid(email, otp), projection={"_id": 1})
+        if not match:
+            await self._reject(email)
+
+    def _valid(self, email: str, otp: str) -> dict:
+        return {
+            "_id": email.lower(),
+            "code_hash": hash_otp(email, otp),
+            "expires_at": {"$gt": datetime.utcnow()},
+            "attempts": {"$lt": OTP_MAX_ATTEMPTS}
+        }
+
+    async def _reject(self, email: str):
+        # Count the failed guess; after OTP_MAX_ATTEMPTS the code stops matching
+        doc = await otps_collection.find_one_and_update(
+            {"_id": email.lower()},
+            {"$inc": {"attempts": 1}},
+            projection={"expires_at": 1, "attempts": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc and doc["expires_at"] <= datetime.utcnow():
+            raise HTTPException(status_code=400, detail="OTP expired")
+        if doc and doc["attempts"] >= OTP_MAX_ATTEMPTS:
+            raise HTTPException(status_code=400, detail="Too many attempts, request a new OTP")
+        raise HTTPException(status_code=400, detail="Invalid OTP")
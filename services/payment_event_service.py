@@ -0,0 +1,228 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from database import orders_collection, payment_events_collection
+from models.payment import PaymentEventType, PaymentWebhookEvent
+from services.inventory_service import InventoryService
+from services.rollup_service import COUNTED_STATUSES
+from config import PAYMENT_EVENT_BATCH, PAYMENT_EVENT_FLUSH_MS, PAYMENT_EVENT_TTL_DAYS
+
+logger = logging.getLogger(__name__)
+
+# Payment state machine: (event, current order status) -> (order status, payment status).
+# A payment captured after the order expired cannot be fulfilled (its
+# stock was released), so it is flagged for refund instead.
+PAYMENT_TRANSITIONS = {
+    (PaymentEventType.SUCCEEDED, "pending_payment"): ("confirmed", "completed"),
+    (PaymentEventType.SUCCEEDED, "expired"): ("refund_pending", "completed"),
+    (PaymentEventType.FAILED, "pending_payment"): ("payment_failed", "failed"),
+}
+
+
+class PaymentEventService:
+    """
+    Applies payment provider events to orders. Events are deduplicated by
+    id in the payment_events collection and applied in batches, each batch
+    as a single ordered bulk_write keyed on the indexed payment.payment_id.
+    """
+
+    async def process(self, events: List[PaymentWebhookEvent]) -> Dict[str, bool]:
+        """
+        Record and apply a batch of events. Returns {event_id: duplicate},
+        where duplicate means the event had already been applied earlier.
+        """
+        fresh, duplicates = await self._record(events)
+        if fresh:
+            await self.apply(fresh)
+            await payment_events_collection.update_many(
+                {"_id": {"$in": [e.id for e in fresh]}},
+                {"$set": {"status": "applied", "applied_at": datetime.utcnow()}}
+            )
+        return {e.id: e.id in duplicates for e in events}
+
+    async def apply(self, events: List[PaymentWebhookEvent]):
+        """
+        Run the state machine for `events`, in order. Every update is
+        conditional on the order's current status, so re-applying an event
+        (e.g. after a failed flush) is a no-op.
+        """
+        now = datetime.utcnow()
+        ops = []
+        for event in events:
+            for (event_type, current), (status, payment_status) in PAYMENT_TRANSITIONS.items():
+                if event_type != event.type:
+                    continue
+                update = {
+                    "status": status,
+                    "payment.status": payment_status,
+                    "payment.last_event_id": event.id,
+                    "updated_at": now
+                }
+                if status in COUNTED_STATUSES:
+                    update["rollup"] = "pending"
+                if event.transaction_id:
+                    update["payment.transaction_id"] = event.transaction_id
+                if event.type == PaymentEventType.SUCCEEDED:
+                    update["payment.paid_at"] = event.created_at or now
+                else:
+                    update["payment.failure_reason"] = event.failure_reason
+                ops.append(UpdateOne({"payment.payment_id": event.payment_id, "status": current}, {"$set": update}))
+
+            if event.type == PaymentEventType.SUCCEEDED:
+                # Stock held while the payment was pending now belongs to the order
+                ops.append(UpdateOne(
+                    {"payment.payment_id": event.payment_id, "status": "confirmed", "reservation.status": "held"},
+                    {"$set": {"reservation.status": "committed"}}
+                ))
+            else:
+                ops.append(UpdateOne(
+                    {"payment.payment_id": event.payment_id, "status": "payment_failed", "reservation.status": "held"},
+                    {"$set": {"reservation.status": "releasing"}}
+                ))
+
+        # ordered: events for the same payment apply in arrival order
+        await orders_collection.bulk_write(ops, ordered=True)
+
+        failed = [e.payment_id for e in events if e.type == PaymentEventType.FAILED]
+        if failed:
+            await self._release_failed(failed)
+
+    async def _record(self, events: List[PaymentWebhookEvent]) -> Tuple[List[PaymentWebhookEvent], set]:
+        """
+        Insert the events for deduplication. Events already stored but never
+        marked applied (their flush failed) are returned as fresh again.
+        """
+        now = datetime.utcnow()
+        docs = [
+            {
+                "_id": e.id,
+                "type": e.type.value,
+                "payment_id": e.payment_id,
+                "status": "received",
+                "received_at": now,
+                "expires_at": now + timedelta(days=PAYMENT_EVENT_TTL_DAYS)
+            }
+            for e in events
+        ]
+        existing = set()
+        try:
+            await payment_events_collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            existing = {docs[err["index"]]["_id"] for err in e.details["writeErrors"] if err["code"] == 11000}
+            if len(existing) != len(e.details["writeErrors"]):
+                raise
+
+        duplicates = set()
+        if existing:
+            duplicates = {
+                doc["_id"]
+                async for doc in payment_events_collection.find(
+                    {"_id": {"$in": list(existing)}, "status": "applied"}, {"_id": 1}
+                )
+            }
+        fresh, seen = [], set()
+        for event in events:
+            # The same event delivered twice within one batch applies once
+            if event.id not in duplicates and event.id not in seen:
+                fresh.append(event)
+            seen.add(event.id)
+        return fresh, duplicates | (seen - {e.id for e in fresh})
+
+    async def _release_failed(self, payment_ids: List[str]):
+        orders = await orders_collection.find(
+            {"payment.payment_id": {"$in": payment_ids}, "reservation.status": "releasing"},
+            {"_id": 1}
+        ).to_list(None)
+        # Another processor (a flush on another worker, or verify_payment)
+        # may be releasing the same orders: each one is claimed by flipping
+        # it, and only the orders this call flipped give their stock back.
+        # Flipping first means a crash leaks stock rather than returning it twice.
+        items = []
+        for order in orders:
+            claimed = await orders_collection.find_one_and_update(
+                {"_id": order["_id"], "reservation.status": "releasing"},
+                {"$set": {"reservation.status": "released"}},
+                projection={"reservation": 1}
+            )
+            if claimed is not None:
+                items.extend(claimed["reservation"]["items"])
+        if items:
+            await InventoryService().release(items)
+
+
+class PaymentEventBuffer:
+    """
+    Group commit for webhook deliveries. Each request adds its event and
+    waits; the buffer flushes after PAYMENT_EVENT_FLUSH_MS or once
+    PAYMENT_EVENT_BATCH events are queued, so a burst of callbacks costs a
+    few bulk writes instead of several round trips per callback. Only one
+    flush runs at a time: events arriving while a batch is being written
+    queue up and go out together in the next one, in arrival order.
+    """
+
+    def __init__(self, max_batch: int = PAYMENT_EVENT_BATCH, max_delay_ms: float = PAYMENT_EVENT_FLUSH_MS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.events = 0
+        self.flushes = 0
+        self._pending: List[Tuple[PaymentWebhookEvent, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing = False
+
+    async def submit(self, event: PaymentWebhookEvent) -> bool:
+        """
+        Queue `event` and wait until its batch is stored and applied.
+        Returns True when it was a duplicate delivery.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((event, future))
+        self.events += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush_now)
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "events": self.events,
+            "flushes": self.flushes,
+            "avg_batch": round(self.events / self.flushes, 2) if self.flushes else 0.0,
+            "queued": len(self._pending)
+        }
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._flushing and self._pending:
+            self._flushing = True
+            asyncio.ensure_future(self._drain())
+
+    async def _drain(self):
+        try:
+            while self._pending:
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                await self._flush(batch)
+        finally:
+            self._flushing = False
+
+    async def _flush(self, batch: List[Tuple[PaymentWebhookEvent, asyncio.Future]]):
+        self.flushes += 1
+        try:
+            duplicates = await PaymentEventService().process([event for event, _ in batch])
+        except Exception as e:
+            logger.error(f"Payment event flush failed ({len(batch)} events): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for event, future in batch:
+            if not future.done():
+                future.set_result(duplicates[event.id])
+
+payment_event_buffer = PaymentEventBuffer()
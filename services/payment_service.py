@@ -1,10 +1,11 @@
 import uuid
-import qrcode
 import io
 import base64
+import hmac
 import logging
 from typing import Dict, Any, Union
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 from models.checkout import (
     PaymentMethod,
     CardPaymentData,
@@ -12,9 +13,27 @@ from models.checkout import (
     NetBankingPaymentData,
     CODPaymentData
 )
+from models.payment import PaymentEventType, PaymentWebhookEvent
+from database import orders_collection
+from services.payment_event_service import PaymentEventService
+from utils.signing import hmac_hex
+from config import PAYMENT_WEBHOOK_SECRET
 
 logger = logging.getLogger(__name__)
 
+def render_qr_data_url(data: str) -> str:
+    # qrcode pulls in PIL; only UPI checkouts pay for that import
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    img_buffer = io.BytesIO()
+    img.save(img_buffer, format='PNG')
+    return f"data:image/png;base64,{base64.b64encode(img_buffer.getvalue()).decode()}"
+
+
 class PaymentService:
     
     async def process_payment(
@@ -80,14 +99,8 @@ class PaymentService:
     ) -> Dict[str, Any]:
         payment_id = f"upi_{uuid.uuid4().hex[:8]}"
         upi_string = f"upi://pay?pa=merchant@ybl&pn=Shopcart&am={amount}&cu=INR&tn=Order-{order_id}"
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(upi_string)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        qr_code_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        qr_code_url = f"data:image/png;base64,{qr_code_base64}"
+        # PNG rendering is CPU-bound; keep it off the event loop
+        qr_code_url = await run_in_threadpool(render_qr_data_url, upi_string)
         return {
             "status": "pending",
             "order_status": "pending_payment", 
@@ -125,9 +138,34 @@ class PaymentService:
         }
 
     async def verify_payment(
-        self, order_id: str, payment_id: str, signature: str = None
+        self, order_id: str, payment_id: str, signature: str = None, email: str = None
     ) -> Dict[str, Any]:
+        """
+        Confirm a payment the client reports after the provider redirect.
+        The provider signs `<order_id>|<payment_id>` with our shared secret;
+        a valid signature is applied through the same state machine as the
+        webhook, so whichever arrives first wins and the other is a no-op.
+        """
+        expected = hmac_hex(f"{order_id}|{payment_id}", PAYMENT_WEBHOOK_SECRET)
+        if not signature or not hmac.compare_digest(expected, signature):
+            return {"verified": False, "status": "invalid_signature"}
+
+        query = {"order_id": order_id, "payment.payment_id": payment_id}
+        if email:
+            query["email"] = email
+        if not await orders_collection.count_documents(query, limit=1):
+            return {"verified": False, "status": "order_not_found"}
+
+        event = PaymentWebhookEvent(
+            id=f"verify:{payment_id}",
+            type=PaymentEventType.SUCCEEDED,
+            payment_id=payment_id,
+            order_id=order_id
+        )
+        await PaymentEventService().process([event])
+        order = await orders_collection.find_one(query, {"status": 1, "payment.status": 1})
         return {
             "verified": True,
-            "status": "completed"
+            "status": order["payment"]["status"],
+            "order_status": order["status"]
         }
@@ -0,0 +1,129 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from database import meta_collection, products_collection, wishlists_collection
+from services.notification_service import NotificationService
+from services.wishlist_service import WishlistService
+from utils.lease import Lease, run_leader_loop, worker_stats
+from config import PRICE_ALERT_SECONDS, PRICE_ALERT_BATCH, PRICE_ALERT_LAG_SECONDS, PRICE_ALERT_MIN_DROP_PERCENT
+
+PRICE_ALERT_LEASE = "price_alerts"
+WATERMARK_ID = "price_alerts"
+
+_worker_stats = worker_stats()
+
+
+def price_alert_stats() -> dict:
+    return dict(_worker_stats)
+
+
+def format_alert(drops: List[dict]) -> tuple:
+    if len(drops) == 1:
+        subject = f"Price drop: {drops[0]['name']}"
+    else:
+        subject = f"Price drops on {len(drops)} items in your wishlist"
+    lines = [
+        f"- {drop['name']}: {drop['old_price']:.2f} -> {drop['new_price']:.2f}"
+        for drop in drops
+    ]
+    body = "Good news! Items you saved just got cheaper:\n\n" + "\n".join(lines)
+    return subject, body
+
+
+class PriceAlertService:
+    """
+    Tells users when a product on their wishlist gets cheaper.
+
+    Catalog edits stamp price_updated_at when the Selling Price changes
+    (CatalogService.update_product), and this job tails that field from a
+    (price_updated_at, _id) watermark kept in the meta collection. Each
+    pass therefore reads only the products repriced since the last one,
+    finds their wishlisters through the (product_id, email) index, and
+    queues one notification per user for the whole batch.
+
+    Wishlisters are only found in the wishlists collection, so the first
+    run in each process migrates any accounts still holding the legacy
+    `wishlist` array before it reads price changes.
+    """
+
+    def __init__(self, notifications: Optional[NotificationService] = None):
+        self.notifications = notifications or NotificationService()
+        self.wishlists_migrated = False
+
+    async def run(self, lease: Optional[Lease] = None) -> int:
+        """
+        Process every price change up to PRICE_ALERT_LAG_SECONDS ago.
+        Returns the number of notifications queued.
+        """
+        # Writes stamped just before `until` may not be visible yet
+        until = datetime.utcnow() - timedelta(seconds=PRICE_ALERT_LAG_SECONDS)
+        if not self.wishlists_migrated:
+            await WishlistService().migrate_all()
+            self.wishlists_migrated = True
+        queued = 0
+        while True:
+            if lease is not None and not await lease.acquire():
+                break
+            mark = await meta_collection.find_one({"_id": WATERMARK_ID})
+            if mark is None:
+                # First run: start from now rather than announce old changes
+                await meta_collection.insert_one({"_id": WATERMARK_ID, "at": until, "product_id": None})
+                break
+
+            query = {"price_updated_at": {"$gt": mark["at"], "$lte": until}}
+            if mark.get("product_id") is not None:
+                # The outer bound gives the planner an index range; $or breaks ties
+                query["price_updated_at"] = {"$gte": mark["at"], "$lte": until}
+                query["$or"] = [
+                    {"price_updated_at": {"$gt": mark["at"]}},
+                    {"price_updated_at": mark["at"], "_id": {"$gt": mark["product_id"]}}
+                ]
+            changed = await products_collection.find(
+                query, {"Name": 1, "Selling Price": 1, "previous_price": 1, "price_updated_at": 1}
+            ).sort([("price_updated_at", 1), ("_id", 1)]).limit(PRICE_ALERT_BATCH).to_list(PRICE_ALERT_BATCH)
+            if not changed:
+                break
+
+            queued += await self.notifications.enqueue(await self._notifications(changed))
+            last = changed[-1]
+            # Advanced only after the batch is queued: a crash re-sends a
+            # batch rather than dropping it
+            await meta_collection.update_one(
+                {"_id": WATERMARK_ID},
+                {"$set": {"at": last["price_updated_at"], "product_id": last["_id"]}}
+            )
+            if len(changed) < PRICE_ALERT_BATCH:
+                break
+        return queued
+
+    async def _notifications(self, changed: List[dict]) -> List[dict]:
+        drops = {}
+        for product in changed:
+            old, new = product.get("previous_price"), product.get("Selling Price")
+            if old is None or new is None or old <= 0:
+                continue
+            if (old - new) / old * 100 >= PRICE_ALERT_MIN_DROP_PERCENT:
+                pid = str(product["_id"])
+                drops[pid] = {
+                    "product_id": pid, "name": product.get("Name", ""),
+                    "old_price": float(old), "new_price": float(new)
+                }
+        if not drops:
+            return []
+
+        by_user: Dict[str, List[dict]] = defaultdict(list)
+        async for entry in wishlists_collection.find(
+            {"product_id": {"$in": list(drops)}}, {"_id": 0, "email": 1, "product_id": 1}
+        ):
+            by_user[entry["email"]].append(drops[entry["product_id"]])
+
+        notifications = []
+        for email, items in by_user.items():
+            subject, body = format_alert(items)
+            notifications.append({"email": email, "kind": "price_drop", "subject": subject, "body": body, "items": items})
+        return notifications
+
+
+async def run_price_alert_worker(interval: float = PRICE_ALERT_SECONDS):
+    service = PriceAlertService()
+    await run_leader_loop(PRICE_ALERT_LEASE, service.run, interval, _worker_stats)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+import hashlib
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from database import promotions_collection
+from models.pricing import PromotionRule, PromotionType, PriceBreakdown
+from services.catalog_service import CatalogService
+from utils.lazy import lazy_import
+from utils.signing import sign_payload, verify_payload
+from config import QUOTE_SECRET_KEY, QUOTE_TTL_SECONDS, PROMOTIONS_TTL_SECONDS
+
+# Loaded on first use to keep numpy out of cold starts
+np = lazy_import("numpy")
+
+# Single source of truth for delivery charges, used by GET /cart and checkout.
+# `free_above` waives the fee once the discounted merchandise total reaches it.
+DELIVERY_RULES = {
+    "standard": {"fee": 50.0, "free_above": 500.0},
+    "express": {"fee": 80.0, "free_above": None},
+    "same-day": {"fee": 120.0, "free_above": None},
+}
+
+PRICING_PROJECTION = {"Name": 1, "name": 1, "Selling Price": 1, "price": 1, "Product Photo": 1}
+
+# Active promotions, reloaded whenever the catalog version moves and at
+# least every PROMOTIONS_TTL_SECONDS
+_promotions_cache = {"version": None, "rules": [], "fingerprint": None, "loaded_at": 0.0}
+
+
+def quote_window(now: Optional[float] = None) -> int:
+    """
+    Quotes are issued per time window so a cached cart body (same ETag)
+    always carries a quote with at least QUOTE_TTL_SECONDS left.
+    """
+    return int((time.time() if now is None else now) // QUOTE_TTL_SECONDS)
+
+
+def promotions_fingerprint(rules: List[PromotionRule]) -> str:
+    """
+    Identifies a set of promotion rules by content, so anything priced with
+    them can tell when they changed, whether or not the catalog version moved.
+    """
+    digest = hashlib.sha256()
+    for rule in sorted(rules, key=lambda rule: rule.id):
+        digest.update(rule.model_dump_json().encode())
+    return digest.hexdigest()[:16]
+
+
+def product_price(product: dict) -> float:
+    return float(product.get("Selling Price", product.get("price", 0)) or 0)
+
+
+def product_name(product: dict) -> str:
+    return product.get("Name", product.get("name", ""))
+
+
+def product_images(product: dict) -> List[str]:
+    return product.get("Product Photo", "").strip().split("\n")
+
+
+class PricingService:
+
+    async def price_cart(self, cart: List[dict], delivery_option: str = "standard") -> PriceBreakdown:
+        """
+        Price a stored cart ({product_id, quantity} entries) server-side.
+        All product prices are resolved with one batched catalog read.
+        """
+        if delivery_option not in DELIVERY_RULES:
+            raise HTTPException(status_code=400, detail="Invalid delivery option")
+
+        products = await self.fetch_products([item["product_id"] for item in cart])
+        promotions = await self.get_promotions()
+        return self.compute(cart, products, promotions, delivery_option)
+
+    async def fetch_products(self, product_ids: List[str]) -> Dict[str, dict]:
+        """
+        Load every product in one `$in` query, keyed by string id.
+        Unknown or malformed ids are simply absent from the result.
+        """
+        return await CatalogService().get_products(product_ids, PRICING_PROJECTION)
+
+    async def get_promotions(self) -> List[PromotionRule]:
+        rules, _ = await self.current_promotions()
+        return rules
+
+    async def current_promotions(self, max_age: float = PROMOTIONS_TTL_SECONDS) -> Tuple[List[PromotionRule], str]:
+        """
+        Active promotion rules and their fingerprint. Editing promotions
+        should bump the catalog version (CatalogService.bump_version) so
+        caches and ETags move at once; edits that do not are still picked up
+        within `max_age` seconds.
+        """
+        version = await CatalogService().get_version()
+        now = time.monotonic()
+        if _promotions_cache["version"] != version or now - _promotions_cache["loaded_at"] >= max_age:
+            rules = [
+                PromotionRule(**{k: v for k, v in doc.items() if k != "_id"})
+                async for doc in promotions_collection.find({"active": True})
+            ]
+            _promotions_cache.update(
+                version=version, rules=rules, fingerprint=promotions_fingerprint(rules), loaded_at=now
+            )
+        return _promotions_cache["rules"], _promotions_cache["fingerprint"]
+
+    def compute(
+        self,
+        cart: List[dict],
+        products: Dict[str, dict],
+        promotions: List[PromotionRule],
+        delivery_option: str = "standard"
+    ) -> PriceBreakdown:
+        """
+        Pure pricing pass over a cart, vectorised with NumPy so very large
+        carts cost a handful of array operations rather than a Python loop
+        per rule and line. Each line gets its single best line-level
+        promotion; the best qualifying threshold promotion then applies to
+        the order.
+        """
+        items = [item for item in cart if item["product_id"] in products]
+        ids = np.array([item["product_id"] for item in items], dtype=object)
+        prices = np.array([product_price(products[item["product_id"]]) for item in items], dtype=np.float64)
+        quantities = np.array([item["quantity"] for item in items], dtype=np.int64)
+        gross = prices * quantities
+
+        line_rules = [p for p in promotions if p.active and p.type != PromotionType.threshold]
+        order_rules = [p for p in promotions if p.active and p.type == PromotionType.threshold]
+
+        line_discount = np.zeros(len(items))
+        best_rule = np.full(len(items), -1)
+        if line_rules and len(items):
+            candidates = np.vstack([self._line_discounts(rule, ids, prices, quantities, gross) for rule in line_rules])
+            best_rule = candidates.argmax(axis=0)
+            line_discount = candidates[best_rule, np.arange(len(items))]
+            best_rule[line_discount <= 0] = -1
+        line_total = gross - line_discount
+
+        subtotal = float(gross.sum())
+        merchandise = float(line_total.sum())
+
+        order_discount, order_rule = 0.0, None
+        for rule in order_rules:
+            if merchandise >= rule.min_subtotal and min(rule.value, merchandise) > order_discount:
+                order_discount, order_rule = min(rule.value, merchandise), rule
+
+        discounted = merchandise - order_discount
+        delivery = DELIVERY_RULES[delivery_option]
+        delivery_fee = delivery["fee"]
+        if delivery["free_above"] is not None and discounted >= delivery["free_above"]:
+            delivery_fee = 0.0
+        if not items:
+            delivery_fee = 0.0
+
+        applied = sorted({line_rules[i].id for i in np.unique(best_rule) if i >= 0})
+        if order_rule:
+            applied.append(order_rule.id)
+
+        # Lines are built as plain dicts and validated in one pydantic-core
+        # call below, which is much cheaper than one model per line.
+        rule_ids = [rule.id for rule in line_rules]
+        lines = [
+            {
+                "product_id": pid,
+                "name": product_name(products[pid]),
+                "unit_price": price,
+                "quantity": qty,
+                "line_subtotal": line_gross,
+                "discount": discount,
+                "line_total": total,
+                "promotion_id": rule_ids[rule] if rule >= 0 else None,
+                "image_urls": product_images(products[pid])
+            }
+            for pid, price, qty, line_gross, discount, total, rule in zip(
+                ids.tolist(),
+                np.round(prices, 2).tolist(),
+                quantities.tolist(),
+                np.round(gross, 2).tolist(),
+                np.round(line_discount, 2).tolist(),
+                np.round(line_total, 2).tolist(),
+                best_rule.tolist()
+            )
+        ]
+
+        return PriceBreakdown.model_validate({
+            "lines": lines,
+            "subtotal": round(subtotal, 2),
+            "discount": round(subtotal - discounted, 2),
+            "delivery_fee": round(delivery_fee, 2),
+            "total": round(discounted + delivery_fee, 2),
+            "delivery_option": delivery_option,
+            "applied_promotions": applied
+        })
+
+    def issue_quote(
+        self, breakdown: PriceBreakdown, email: str, cart_version: int, catalog_version: int
+    ) -> Tuple[str, datetime]:
+        """
+        Sign the priced cart so checkout can trust it without re-pricing.
+        The quote is bound to the user, the cart version and the catalog
+        version; any change to either invalidates it.
+        """
+        expires = (quote_window() + 2) * QUOTE_TTL_SECONDS
+        payload = {
+            "email": email,
+            "cart_version": cart_version,
+            "catalog_version": catalog_version,
+            "exp": expires,
+            "pricing": breakdown.model_dump(exclude={"lines": {"__all__": {"image_urls"}}})
+        }
+        return sign_payload(payload, QUOTE_SECRET_KEY), datetime.utcfromtimestamp(expires)
+
+    def redeem_quote(
+        self, token: str, email: str, cart_version: int, catalog_version: int, delivery_option: str
+    ) -> Optional[PriceBreakdown]:
+        """
+        Return the quoted pricing if the token is authentic, unexpired and
+        still matches the cart and catalog; otherwise None (caller re-prices).
+        """
+        payload = verify_payload(token, QUOTE_SECRET_KEY)
+        if (
+            not payload
+            or payload.get("exp", 0) < time.time()
+            or payload.get("email") != email
+            or payload.get("cart_version") != cart_version
+            or payload.get("catalog_version") != catalog_version
+            or payload.get("pricing", {}).get("delivery_option") != delivery_option
+        ):
+            return None
+        return PriceBreakdown.model_validate(payload["pricing"])
+
+    def _line_discounts(
+        self, rule: PromotionRule, ids: np.ndarray, prices: np.ndarray,
+        quantities: np.ndarray, gross: np.ndarray
+    ) -> np.ndarray:
+        if rule.product_ids:
+            eligible = set(rule.product_ids)
+            mask = np.fromiter((pid in eligible for pid in ids), dtype=bool, count=len(ids))
+        else:
+            mask = np.ones(len(ids), dtype=bool)
+
+        if rule.type == PromotionType.percent:
+            discount = gross * min(rule.value, 100.0) / 100.0
+        elif rule.type == PromotionType.flat:
+            discount = np.minimum(rule.value, prices) * quantities
+        elif rule.type == PromotionType.bundle and rule.bundle_qty:
+            bundles = quantities // rule.bundle_qty
+            discount = bundles * np.maximum(prices * rule.bundle_qty - rule.value, 0.0)
+        else:
+            discount = np.zeros(len(ids))
+        return np.where(mask, discount, 0.0)
@@ -0,0 +1,323 @@
+from __future__ import annotations
+import io
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from pymongo import ReturnDocument
+from database import meta_collection, orders_collection, recommendations_collection, users_collection
+from utils.lease import Lease, run_leader_loop, worker_stats
+from utils.lazy import lazy_import
+from utils.singleflight import SingleFlight
+from config import (
+    RECS_TOP_K, RECS_MAX_BASKET, RECS_ORDER_WEIGHT, RECS_REFRESH_SECONDS,
+    RECS_VERSION_TTL, SINGLEFLIGHT_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+# Loaded on first use to keep numpy out of cold starts
+np = lazy_import("numpy")
+
+RECS_META_ID = "recommendations"
+
+# Snapshots are split across documents to stay under the 16MB BSON limit
+SNAPSHOT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Pending pair arrays are merged into the counts once they reach this size
+COMPACT_PAIRS = 2_000_000
+
+_worker_stats = worker_stats()
+
+# The table this process serves from, swapped whole when a newer one is published
+_table_cache = {"table": None, "version": None, "checked_at": 0.0}
+_load_flight = SingleFlight("recommendations", timeout=SINGLEFLIGHT_TIMEOUT)
+
+
+def recommendation_stats() -> dict:
+    table = _table_cache["table"]
+    return {
+        **_worker_stats,
+        "version": _table_cache["version"],
+        "products": len(table.ids) if table else 0,
+        "table_bytes": table.nbytes if table else 0
+    }
+
+
+class RecommendationTable:
+    """
+    Top-K neighbours of every product in CSR layout: the neighbours of
+    product i are neighbors[indptr[i]:indptr[i + 1]], best first, with their
+    scores alongside. Lookups touch only these arrays and one dict.
+    """
+
+    def __init__(self, ids: np.ndarray, indptr: np.ndarray, neighbors: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.indptr = indptr
+        self.neighbors = neighbors
+        self.scores = scores
+        self.index = {pid: i for i, pid in enumerate(ids.tolist())}
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.indptr.nbytes + self.neighbors.nbytes + self.scores.nbytes
+
+    def lookup(self, product_id: str, limit: int) -> List[Tuple[str, float]]:
+        i = self.index.get(product_id)
+        if i is None:
+            return []
+        start = self.indptr[i]
+        end = min(self.indptr[i + 1], start + limit)
+        return list(zip(self.ids[self.neighbors[start:end]].tolist(), self.scores[start:end].tolist()))
+
+    def dump(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(buffer, ids=self.ids, indptr=self.indptr, neighbors=self.neighbors, scores=self.scores)
+        return buffer.getvalue()
+
+    @classmethod
+    def load(cls, data: bytes) -> "RecommendationTable":
+        arrays = np.load(io.BytesIO(data), allow_pickle=False)
+        return cls(arrays["ids"], arrays["indptr"], arrays["neighbors"], arrays["scores"])
+
+
+class CoOccurrenceMatrix:
+    """
+    Sparse item-item co-occurrence counts in COO form: pair keys
+    (row << 32 | col) with summed weights, plus each item's own weight.
+    Two products co-occur when the same user viewed both (among their
+    RECS_MAX_BASKET most recent) or they were bought in the same order.
+
+    The matrix keeps a watermark, so `refresh` only folds in views and
+    orders newer than the previous run.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.vocab: Dict[str, int] = {}
+        self.keys = np.empty(0, dtype=np.int64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.freq = np.empty(0, dtype=np.float64)
+        self.watermark: Optional[datetime] = None
+        self._pending_keys: List[np.ndarray] = []
+        self._pending_weights: List[np.ndarray] = []
+        self._pending_freq: List[Tuple[np.ndarray, float]] = []
+        self._pending_size = 0
+
+    async def refresh(self) -> int:
+        """
+        Fold views and orders recorded since the last refresh into the
+        counts. Returns the number of baskets (users and orders) read.
+        """
+        since, until = self.watermark, datetime.utcnow()
+        baskets = 0
+
+        if since:
+            query = {"history": {"$elemMatch": {"viewed_at": {"$gt": since, "$lte": until}}}}
+        else:
+            query = {"history.0": {"$exists": True}}
+        async for user in users_collection.find(query, {"history": 1}, batch_size=1000):
+            old, new = self._split_history(user.get("history", []), since, until)
+            self._add_basket(old, new, 1.0)
+            baskets += 1
+
+        window = {"$gt": since, "$lte": until} if since else {"$lte": until}
+        async for order in orders_collection.find({"created_at": window}, {"items.product_id": 1}, batch_size=1000):
+            self._add_basket([], [item["product_id"] for item in order.get("items", [])], RECS_ORDER_WEIGHT)
+            baskets += 1
+
+        self._compact()
+        self.watermark = until
+        return baskets
+
+    def top_k(self, k: int = RECS_TOP_K) -> RecommendationTable:
+        """
+        Keep the k best neighbours per product, scored by co-occurrence
+        normalised by both products' popularity (cosine), so bestsellers
+        do not become everyone's neighbour.
+        """
+        self._compact()
+        n = len(self.ids)
+        rows = (self.keys >> 32).astype(np.int32)
+        cols = (self.keys & 0xFFFFFFFF).astype(np.int32)
+        scores = self.weights / np.sqrt(self.freq[rows] * self.freq[cols])
+
+        order = np.lexsort((-scores, rows))
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+        keep = rank < k
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return RecommendationTable(
+            np.array(self.ids, dtype=str), indptr, cols.astype(np.int32), scores.astype(np.float32)
+        )
+
+    def _split_history(self, history: list, since: Optional[datetime], until: datetime):
+        """
+        The user's most recent distinct products, split into those already
+        counted at `since` and those viewed after it.
+        """
+        latest = {}
+        for entry in history:
+            viewed_at = entry.get("viewed_at")
+            if viewed_at is None or viewed_at > until:
+                continue
+            if entry["product_id"] not in latest or viewed_at > latest[entry["product_id"]]:
+                latest[entry["product_id"]] = viewed_at
+        recent = sorted(latest.items(), key=lambda kv: kv[1], reverse=True)[:RECS_MAX_BASKET]
+        if since is None:
+            return [], [pid for pid, _ in recent]
+
+        before = {
+            entry["product_id"]
+            for entry in history
+            if entry.get("viewed_at") is not None and entry["viewed_at"] <= since
+        }
+        old = [pid for pid, _ in recent if pid in before]
+        new = [pid for pid, _ in recent if pid not in before]
+        return old, new
+
+    def _add_basket(self, old: Iterable[str], new: Iterable[str], weight: float):
+        """
+        Count the pairs a basket gains when `new` products join the already
+        counted `old` ones: new x (old + new) and old x new, both directions.
+        """
+        old = np.array([self._index(pid) for pid in dict.fromkeys(old)], dtype=np.int64)
+        new = np.array([self._index(pid) for pid in dict.fromkeys(new)], dtype=np.int64)
+        if not len(new):
+            return
+        every = np.concatenate([old, new])
+
+        a, b = np.meshgrid(new, every, indexing="ij")
+        a, b = a.ravel(), b.ravel()
+        mask = a != b
+        keys = [(a[mask] << 32) | b[mask]]
+        if len(old):
+            c, d = np.meshgrid(old, new, indexing="ij")
+            keys.append((c.ravel() << 32) | d.ravel())
+        keys = np.concatenate(keys)
+
+        self._pending_keys.append(keys)
+        self._pending_weights.append(np.full(len(keys), weight))
+        self._pending_freq.append((new, weight))
+        self._pending_size += len(keys)
+        if self._pending_size >= COMPACT_PAIRS:
+            self._compact()
+
+    def _index(self, product_id: str) -> int:
+        i = self.vocab.get(product_id)
+        if i is None:
+            i = self.vocab[product_id] = len(self.ids)
+            self.ids.append(product_id)
+        return i
+
+    def _compact(self):
+        """
+        Merge pending pairs into the counts, summing duplicates.
+        """
+        if len(self.freq) < len(self.ids):
+            self.freq = np.concatenate([self.freq, np.zeros(len(self.ids) - len(self.freq))])
+        for items, weight in self._pending_freq:
+            np.add.at(self.freq, items, weight)
+        if self._pending_keys:
+            keys = np.concatenate([self.keys] + self._pending_keys)
+            weights = np.concatenate([self.weights] + self._pending_weights)
+            self.keys, inverse = np.unique(keys, return_inverse=True)
+            self.weights = np.bincount(inverse, weights=weights, minlength=len(self.keys))
+        self._pending_keys, self._pending_weights, self._pending_freq = [], [], []
+        self._pending_size = 0
+
+
+class RecommendationService:
+    """
+    "Customers also viewed": served from the published top-K table held in
+    memory. Only the version check (at most every RECS_VERSION_TTL seconds)
+    and a reload after a new publish touch the database.
+    """
+
+    async def also_viewed(self, product_id: str, limit: int = 10) -> Tuple[Optional[int], List[Tuple[str, float]]]:
+        table, version = await self.get_table()
+        if table is None:
+            return version, []
+        return version, table.lookup(product_id, limit)
+
+    async def get_table(self) -> Tuple[Optional[RecommendationTable], Optional[int]]:
+        now = time.monotonic()
+        if now - _table_cache["checked_at"] < RECS_VERSION_TTL:
+            return _table_cache["table"], _table_cache["version"]
+
+        meta = await meta_collection.find_one({"_id": RECS_META_ID}, {"version": 1})
+        version = meta.get("version") if meta else None
+        if version is not None and version != _table_cache["version"]:
+            try:
+                table = await _load_flight.do(version, lambda: self._load(version))
+            except Exception as e:
+                # Keep serving the table we have; the load is retried at the next check
+                logger.error(f"recommendations v{version} failed to load, keeping v{_table_cache['version']}: {e}")
+            else:
+                _table_cache.update(table=table, version=version)
+        _table_cache["checked_at"] = now
+        return _table_cache["table"], _table_cache["version"]
+
+    async def publish(self, table: RecommendationTable) -> int:
+        """
+        Store `table` as the next version. Versions are allocated
+        atomically, so concurrent publishes never share one. Chunks are
+        written before the version flips, the flip never moves it backwards,
+        and the previous version is kept for processes that are still
+        loading it.
+        """
+        version = await self._next_version()
+        data = table.dump()
+        await recommendations_collection.insert_many([
+            {"_id": f"{version}:{n}", "version": version, "n": n, "data": data[offset:offset + SNAPSHOT_CHUNK_BYTES]}
+            for n, offset in enumerate(range(0, max(len(data), 1), SNAPSHOT_CHUNK_BYTES))
+        ])
+        await meta_collection.update_one({"_id": RECS_META_ID}, {"$max": {"version": version}})
+        await meta_collection.update_one(
+            {"_id": RECS_META_ID, "version": version},
+            {"$set": {"products": len(table.ids), "bytes": len(data), "built_at": datetime.utcnow()}}
+        )
+        await recommendations_collection.delete_many({"version": {"$lt": version - 1}})
+        return version
+
+    async def _next_version(self) -> int:
+        meta = await meta_collection.find_one_and_update(
+            {"_id": RECS_META_ID},
+            {"$inc": {"next_version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if meta["next_version"] <= meta.get("version", 0):
+            # Versions published before the counter existed: skip past them
+            await meta_collection.update_one({"_id": RECS_META_ID}, {"$max": {"next_version": meta["version"]}})
+            return await self._next_version()
+        return meta["next_version"]
+
+    async def _load(self, version: int) -> RecommendationTable:
+        chunks = await recommendations_collection.find({"version": version}).sort("n", 1).to_list(None)
+        return RecommendationTable.load(b"".join(chunk["data"] for chunk in chunks))
+
+
+class RecommendationBuilder:
+    """
+    Leader-side job: keeps the co-occurrence matrix in memory between runs,
+    folds in new activity and publishes a fresh top-K table. A new leader
+    starts from an empty matrix, so its first run is a full build.
+    """
+
+    def __init__(self):
+        self.matrix = CoOccurrenceMatrix()
+
+    async def run(self, lease: Optional[Lease] = None) -> int:
+        baskets = await self.matrix.refresh()
+        if baskets:
+            await RecommendationService().publish(self.matrix.top_k())
+        return baskets
+
+
+async def run_recommendation_worker(interval: float = RECS_REFRESH_SECONDS):
+    builder = RecommendationBuilder()
+    await run_leader_loop("recommendations", builder.run, interval, _worker_stats)
@@ -0,0 +1,228 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from database import orders_collection, rollups_collection
+from models.analytics import RollupPeriod, RevenueBucket, RevenueSeries, PaymentMethodStat, TopProduct
+from utils.lease import Lease, run_leader_loop, worker_stats
+from config import ROLLUP_SWEEP_SECONDS, ROLLUP_BATCH
+
+# Orders that count as sales. The write path flags them rollup: "pending"
+# when they enter one of these statuses.
+COUNTED_STATUSES = ["confirmed"]
+
+# Upper bound on buckets one dashboard query may read
+MAX_BUCKETS = {RollupPeriod.day: 400, RollupPeriod.hour: 24 * 31}
+
+ROLLUP_LEASE = "sales_rollup"
+
+_worker_stats = worker_stats()
+
+
+def rollup_stats() -> dict:
+    return dict(_worker_stats)
+
+
+def bucket_start(period: RollupPeriod, ts: datetime) -> datetime:
+    if period == RollupPeriod.day:
+        return datetime.combine(ts.date(), time())
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_id(period: RollupPeriod, ts: datetime) -> str:
+    fmt = "%Y-%m-%d" if period == RollupPeriod.day else "%Y-%m-%dT%H"
+    return f"{period.value}:{ts.strftime(fmt)}"
+
+
+class RollupService:
+    """
+    Pre-aggregated sales buckets in the sales_rollups collection: one
+    document per day and per hour with order count, revenue and items sold.
+    Day buckets also break revenue down by payment method and product.
+    Dashboard queries read only these buckets, so their cost depends on the
+    date range, never on how many orders exist.
+    """
+
+    async def apply_pending(self, lease: Optional[Lease] = None) -> int:
+        """
+        Fold confirmed orders flagged rollup: "pending" into their buckets,
+        ROLLUP_BATCH at a time. Each order is flagged done before its
+        increments are written, so a crash in between under-counts (fixed
+        by a rebuild) rather than counting an order twice.
+        """
+        folded = 0
+        while True:
+            if lease is not None and not await lease.acquire():
+                break
+            orders = await orders_collection.find(
+                {"rollup": "pending"},
+                {"created_at": 1, "payment_method": 1, "pricing.total": 1, "items": 1}
+            ).limit(ROLLUP_BATCH).to_list(ROLLUP_BATCH)
+            if not orders:
+                break
+
+            await orders_collection.update_many(
+                {"_id": {"$in": [o["_id"] for o in orders]}, "rollup": "pending"},
+                {"$set": {"rollup": "done"}}
+            )
+            await self._write(self.fold(orders))
+            folded += len(orders)
+            if len(orders) < ROLLUP_BATCH:
+                break
+        return folded
+
+    async def rebuild(self, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """
+        Recompute every bucket for the days [start, end) from the orders
+        themselves. Run it after changing what counts as a sale or to repair
+        drift. Orders are streamed and folded in batches, never loaded whole.
+        Returns the number of orders counted.
+        """
+        start_at = datetime.combine(start, time()) if start else datetime.min
+        end_at = datetime.combine(end, time()) if end else bucket_start(RollupPeriod.day, datetime.utcnow()) + timedelta(days=1)
+        in_range = {"created_at": {"$gte": start_at, "$lt": end_at}}
+
+        await orders_collection.update_many(
+            {**in_range, "rollup": "pending"}, {"$set": {"rollup": "done"}}
+        )
+        await rollups_collection.delete_many({"start": {"$gte": start_at, "$lt": end_at}})
+
+        counted, batch = 0, []
+        cursor = orders_collection.find(
+            {**in_range, "status": {"$in": COUNTED_STATUSES}},
+            {"created_at": 1, "payment_method": 1, "pricing.total": 1, "items": 1},
+            batch_size=ROLLUP_BATCH
+        )
+        async for order in cursor:
+            batch.append(order)
+            if len(batch) == ROLLUP_BATCH:
+                await self._write(self.fold(batch))
+                counted += len(batch)
+                batch = []
+        if batch:
+            await self._write(self.fold(batch))
+            counted += len(batch)
+        return counted
+
+    def fold(self, orders: Iterable[dict]) -> Dict[str, dict]:
+        """
+        Combine orders into one update per bucket: {bucket_id: update}.
+        """
+        updates = {}
+        for order in orders:
+            created = order["created_at"]
+            revenue = float(order.get("pricing", {}).get("total", 0.0))
+            items = order.get("items", [])
+            quantity = sum(item.get("quantity", 0) for item in items)
+
+            for period in RollupPeriod:
+                key = bucket_id(period, created)
+                update = updates.setdefault(key, {
+                    "$inc": defaultdict(float),
+                    "$set": {},
+                    "$setOnInsert": {"period": period.value, "start": bucket_start(period, created)}
+                })
+                inc = update["$inc"]
+                inc["orders"] += 1
+                inc["revenue"] += revenue
+                inc["items"] += quantity
+                if period != RollupPeriod.day:
+                    continue
+
+                method = order.get("payment_method", "unknown")
+                inc[f"payment_methods.{method}.orders"] += 1
+                inc[f"payment_methods.{method}.revenue"] += revenue
+                for item in items:
+                    pid = item["product_id"]
+                    line_total = item.get("line_total", item.get("price", 0.0) * item.get("quantity", 0))
+                    inc[f"products.{pid}.quantity"] += item.get("quantity", 0)
+                    inc[f"products.{pid}.revenue"] += line_total
+                    update["$set"][f"products.{pid}.name"] = item.get("name", "")
+        return updates
+
+    async def revenue(self, period: RollupPeriod, start: date, end: date) -> RevenueSeries:
+        start_at, end_at = self._range(period, start, end)
+        docs = {
+            doc["_id"]: doc
+            async for doc in rollups_collection.find(
+                {"_id": {"$gte": bucket_id(period, start_at), "$lt": bucket_id(period, end_at)}},
+                {"orders": 1, "revenue": 1, "items": 1}
+            )
+        }
+        step = timedelta(days=1) if period == RollupPeriod.day else timedelta(hours=1)
+        buckets, at = [], start_at
+        while at < end_at:
+            doc = docs.get(bucket_id(period, at), {})
+            buckets.append(RevenueBucket(
+                start=at,
+                orders=int(doc.get("orders", 0)),
+                revenue=round(doc.get("revenue", 0.0), 2),
+                items=int(doc.get("items", 0))
+            ))
+            at += step
+        return RevenueSeries(
+            period=period,
+            buckets=buckets,
+            orders=sum(b.orders for b in buckets),
+            revenue=round(sum(b.revenue for b in buckets), 2)
+        )
+
+    async def payment_methods(self, start: date, end: date) -> List[PaymentMethodStat]:
+        totals = defaultdict(lambda: {"orders": 0, "revenue": 0.0})
+        async for doc in self._day_buckets(start, end, "payment_methods"):
+            for method, stat in doc.get("payment_methods", {}).items():
+                totals[method]["orders"] += int(stat.get("orders", 0))
+                totals[method]["revenue"] += stat.get("revenue", 0.0)
+        return sorted(
+            (PaymentMethodStat(payment_method=m, orders=t["orders"], revenue=round(t["revenue"], 2)) for m, t in totals.items()),
+            key=lambda s: s.revenue, reverse=True
+        )
+
+    async def top_products(self, start: date, end: date, limit: int = 10) -> List[TopProduct]:
+        totals = defaultdict(lambda: {"name": "", "quantity": 0, "revenue": 0.0})
+        async for doc in self._day_buckets(start, end, "products"):
+            for pid, stat in doc.get("products", {}).items():
+                totals[pid]["name"] = stat.get("name") or totals[pid]["name"]
+                totals[pid]["quantity"] += int(stat.get("quantity", 0))
+                totals[pid]["revenue"] += stat.get("revenue", 0.0)
+        ranked = sorted(totals.items(), key=lambda kv: (kv[1]["quantity"], kv[1]["revenue"]), reverse=True)
+        return [
+            TopProduct(product_id=pid, name=t["name"], quantity=t["quantity"], revenue=round(t["revenue"], 2))
+            for pid, t in ranked[:limit]
+        ]
+
+    def _day_buckets(self, start: date, end: date, field: str):
+        start_at, end_at = self._range(RollupPeriod.day, start, end)
+        return rollups_collection.find(
+            {"_id": {"$gte": bucket_id(RollupPeriod.day, start_at), "$lt": bucket_id(RollupPeriod.day, end_at)}},
+            {field: 1}
+        )
+
+    def _range(self, period: RollupPeriod, start: date, end: date):
+        """
+        [start, end] as whole days, bounded so one query reads at most
+        MAX_BUCKETS[period] buckets.
+        """
+        start_at = datetime.combine(start, time())
+        end_at = datetime.combine(end, time()) + timedelta(days=1)
+        if end_at <= start_at:
+            raise HTTPException(status_code=400, detail="end must not be before start")
+        step = timedelta(days=1) if period == RollupPeriod.day else timedelta(hours=1)
+        if (end_at - start_at) / step > MAX_BUCKETS[period]:
+            raise HTTPException(status_code=400, detail=f"Range too large for {period.value} buckets")
+        return start_at, end_at
+
+    async def _write(self, updates: Dict[str, dict]):
+        if not updates:
+            return
+        ops = []
+        for key, update in updates.items():
+            update = {op: dict(fields) for op, fields in update.items() if fields}
+            ops.append(UpdateOne({"_id": key}, update, upsert=True))
+        await rollups_collection.bulk_write(ops, ordered=False)
+
+
+async def run_rollup_worker(interval: float = ROLLUP_SWEEP_SECONDS):
+    service = RollupService()
+    await run_leader_loop(ROLLUP_LEASE, service.apply_pending, interval, _worker_stats)
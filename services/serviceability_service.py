@@ -0,0 +1,233 @@
+import logging
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from database import meta_collection, serviceability_collection
+from models.delivery import DeliveryEstimate, DeliveryOptionEstimate
+from services.pricing_service import DELIVERY_RULES
+from utils.singleflight import SingleFlight
+from config import SERVICEABILITY_VERSION_TTL, SINGLEFLIGHT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+SERVICEABILITY_META_ID = "serviceability"
+
+DELIVERY_OPTIONS = tuple(DELIVERY_RULES)
+
+# Lead times stored per range fit a signed byte; -1 marks an option not offered
+MAX_LEAD_DAYS = 127
+
+# The table this process serves from, swapped whole when a newer one is published
+_index_cache = {"index": None, "version": None, "checked_at": 0.0}
+_load_flight = SingleFlight("serviceability", timeout=SINGLEFLIGHT_TIMEOUT)
+
+
+def serviceability_stats() -> dict:
+    index = _index_cache["index"]
+    return {
+        "version": _index_cache["version"],
+        "ranges": len(index) if index else 0,
+        "index_bytes": index.nbytes if index else 0
+    }
+
+
+class Serviceability(NamedTuple):
+    zone: Optional[str]
+    warehouse: Optional[str]
+    lead_days: Dict[str, Optional[int]]
+
+
+# Served for every PIN code until a table is published
+DEFAULT_SERVICEABILITY = Serviceability(None, None, {"standard": 7, "express": 3, "same-day": 1})
+
+
+def delivery_date(days: int) -> str:
+    return (datetime.utcnow() + timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+class ServiceabilityIndex:
+    """
+    Non-overlapping PIN code ranges in sorted parallel arrays: range i
+    covers starts[i]..ends[i], belongs to zones[zone_ids[i]], ships from
+    warehouses[warehouse_ids[i]] and takes lead[i * len(DELIVERY_OPTIONS) + k]
+    days for option k. A lookup is one bisect over starts.
+    """
+
+    def __init__(self, starts: array, ends: array, zone_ids: array, warehouse_ids: array,
+                 lead: array, zones: List[str], warehouses: List[str]):
+        self.starts = starts
+        self.ends = ends
+        self.zone_ids = zone_ids
+        self.warehouse_ids = warehouse_ids
+        self.lead = lead
+        self.zones = zones
+        self.warehouses = warehouses
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.starts, self.ends, self.zone_ids, self.warehouse_ids, self.lead)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    @classmethod
+    def build(cls, ranges: Iterable[dict]) -> "ServiceabilityIndex":
+        """
+        Index {start, end, zone, warehouse, lead_days} ranges. Raises
+        ValueError for inverted or overlapping ranges and unknown options.
+        """
+        starts, ends = array("i"), array("i")
+        zone_ids, warehouse_ids, lead = array("H"), array("H"), array("b")
+        zones: Dict[str, int] = {}
+        warehouses: Dict[str, int] = {}
+        for row in sorted(ranges, key=lambda row: row["start"]):
+            start, end = row["start"], row["end"]
+            if end < start:
+                raise ValueError(f"range {start}-{end} ends before it starts")
+            if ends and start <= ends[-1]:
+                raise ValueError(f"range {start}-{end} overlaps {starts[-1]}-{ends[-1]}")
+            unknown = set(row["lead_days"]) - set(DELIVERY_OPTIONS)
+            if unknown:
+                raise ValueError(f"range {start}-{end} has unknown delivery options: {', '.join(sorted(unknown))}")
+
+            starts.append(start)
+            ends.append(end)
+            zone_ids.append(zones.setdefault(row["zone"], len(zones)))
+            warehouse_ids.append(warehouses.setdefault(row["warehouse"], len(warehouses)))
+            for option in DELIVERY_OPTIONS:
+                days = row["lead_days"].get(option)
+                if days is not None and not 0 <= days <= MAX_LEAD_DAYS:
+                    raise ValueError(f"range {start}-{end}: {option} lead time must be 0-{MAX_LEAD_DAYS} days")
+                lead.append(-1 if days is None else days)
+        return cls(starts, ends, zone_ids, warehouse_ids, lead, list(zones), list(warehouses))
+
+    def lookup(self, pincode: int) -> Optional[Serviceability]:
+        i = bisect_right(self.starts, pincode) - 1
+        if i < 0 or pincode > self.ends[i]:
+            return None
+        width = len(DELIVERY_OPTIONS)
+        return Serviceability(
+            self.zones[self.zone_ids[i]],
+            self.warehouses[self.warehouse_ids[i]],
+            {option: days if days >= 0 else None
+             for option, days in zip(DELIVERY_OPTIONS, self.lead[i * width:(i + 1) * width])}
+        )
+
+
+class ServiceabilityService:
+    """
+    Where we deliver and how fast, by PIN code. The published ranges are
+    served from an in-memory ServiceabilityIndex, so estimates and checkout
+    never read the database per request: only the version check (at most
+    every SERVICEABILITY_VERSION_TTL seconds) and a reload after a new
+    publish do. Until a table is published every PIN code gets the
+    default lead times.
+    """
+
+    async def lookup(self, pincode: str) -> Tuple[Optional[Serviceability], Optional[int]]:
+        index, version = await self.get_index()
+        if index is None:
+            return DEFAULT_SERVICEABILITY, version
+        return index.lookup(int(pincode)), version
+
+    async def estimate(self, pincode: str) -> DeliveryEstimate:
+        found, version = await self.lookup(pincode)
+        lead_days = found.lead_days if found else {}
+        options = []
+        for option in DELIVERY_OPTIONS:
+            days = lead_days.get(option)
+            options.append(DeliveryOptionEstimate(
+                delivery_option=option,
+                available=days is not None,
+                days=days,
+                estimated_delivery=delivery_date(days) if days is not None else None,
+                fee=DELIVERY_RULES[option]["fee"]
+            ))
+        return DeliveryEstimate(
+            pincode=pincode,
+            serviceable=found is not None,
+            zone=found.zone if found else None,
+            warehouse=found.warehouse if found else None,
+            version=version,
+            options=options
+        )
+
+    async def delivery_date(self, pincode: str, delivery_option: str) -> str:
+        """
+        Estimated delivery day for an order, or 400 when we do not deliver
+        to `pincode` with `delivery_option`.
+        """
+        if delivery_option not in DELIVERY_RULES:
+            raise HTTPException(status_code=400, detail="Invalid delivery option")
+        found, _ = await self.lookup(pincode)
+        if found is None:
+            raise HTTPException(status_code=400, detail=f"We do not deliver to PIN code {pincode} yet")
+        days = found.lead_days.get(delivery_option)
+        if days is None:
+            raise HTTPException(status_code=400, detail=f"{delivery_option} delivery is not available for PIN code {pincode}")
+        return delivery_date(days)
+
+    async def get_index(self, max_age: float = SERVICEABILITY_VERSION_TTL) -> Tuple[Optional[ServiceabilityIndex], Optional[int]]:
+        now = time.monotonic()
+        if now - _index_cache["checked_at"] < max_age:
+            return _index_cache["index"], _index_cache["version"]
+
+        meta = await meta_collection.find_one({"_id": SERVICEABILITY_META_ID}, {"version": 1})
+        version = meta.get("version") if meta else None
+        if version is not None and version != _index_cache["version"]:
+            try:
+                index = await _load_flight.do(version, lambda: self._load(version))
+            except Exception as e:
+                # Keep serving the table we have; the load is retried at the next check
+                logger.error(f"serviceability v{version} failed to load, keeping v{_index_cache['version']}: {e}")
+            else:
+                _index_cache.update(index=index, version=version)
+        _index_cache["checked_at"] = now
+        return _index_cache["index"], _index_cache["version"]
+
+    async def refresh(self) -> Tuple[Optional[ServiceabilityIndex], Optional[int]]:
+        """
+        Pick up the latest published version now instead of at the next check.
+        """
+        return await self.get_index(max_age=0)
+
+    async def publish(self, ranges: List[dict]) -> int:
+        """
+        Validate `ranges` and store them as the next version. Versions are
+        allocated atomically, so concurrent publishes never share one. Rows
+        are written before the version flips, the flip never moves it
+        backwards, and the previous version is kept for processes that are
+        still loading it.
+        """
+        index = ServiceabilityIndex.build(ranges)
+        meta = await meta_collection.find_one_and_update(
+            {"_id": SERVICEABILITY_META_ID},
+            {"$inc": {"next_version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        version = meta["next_version"]
+        await serviceability_collection.insert_many([
+            {"version": version, "start": row["start"], "end": row["end"], "zone": row["zone"],
+             "warehouse": row["warehouse"], "lead_days": row["lead_days"]}
+            for row in ranges
+        ])
+        await meta_collection.update_one({"_id": SERVICEABILITY_META_ID}, {"$max": {"version": version}})
+        await meta_collection.update_one(
+            {"_id": SERVICEABILITY_META_ID, "version": version},
+            {"$set": {"ranges": len(index), "published_at": datetime.utcnow()}}
+        )
+        await serviceability_collection.delete_many({"version": {"$lt": version - 1}})
+        if version > (_index_cache["version"] or 0):
+            # This process serves the new table straight away; others within the TTL
+            _index_cache.update(index=index, version=version, checked_at=time.monotonic())
+        return version
+
+    async def _load(self, version: int) -> ServiceabilityIndex:
+        rows = await serviceability_collection.find({"version": version}, {"_id": 0}).sort("start", 1).to_list(None)
+        return ServiceabilityIndex.build(rows)
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import DeleteMany, UpdateOne
+from database import users_collection, wishlists_collection
+from models.cart import BulkItemResult
+from models.wishlist import WishlistItem, WishlistPage
+from services.catalog_service import CatalogService
+from utils.cursor import encode_cursor, decode_cursor
+
+# Only the product fields a WishlistItem needs
+WISHLIST_PRODUCT_PROJECTION = {"Name": 1, "Selling Price": 1, "Product Photo": 1}
+
+
+class WishlistService:
+    """
+    Wishlists live in their own collection, one {email, product_id,
+    added_at} document per saved product. Pages and counts are range
+    reads on the (email, added_at, product_id) index, so a user with
+    hundreds of saved items costs no more per page than one with ten,
+    and a unique (email, product_id) index keeps adds idempotent.
+
+    Older accounts kept a bare `wishlist` id array on the user document;
+    it is moved over on first use, by the price-alert job when it starts,
+    or by `manage.py migrate-wishlists`.
+    """
+
+    async def add(self, user: dict, product_id: str):
+        await self.migrate(user)
+        await wishlists_collection.update_one(
+            {"email": user["email"], "product_id": product_id},
+            {"$setOnInsert": {"added_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    async def remove(self, user: dict, product_id: str) -> bool:
+        await self.migrate(user)
+        result = await wishlists_collection.delete_one({"email": user["email"], "product_id": product_id})
+        return result.deleted_count > 0
+
+    async def contains(self, user: dict, product_id: str) -> bool:
+        await self.migrate(user)
+        doc = await wishlists_collection.find_one({"email": user["email"], "product_id": product_id}, {"_id": 1})
+        return doc is not None
+
+    async def count(self, user: dict) -> int:
+        await self.migrate(user)
+        return await wishlists_collection.count_documents({"email": user["email"]})
+
+    async def list_page(self, user: dict, limit: int = 20, cursor: Optional[str] = None) -> WishlistPage:
+        """
+        A page of saved products, most recently added first. Pages are
+        keyset-paginated on (added_at, product_id) and hydrated with one
+        catalog query; products no longer in the catalog are skipped.
+        """
+        await self.migrate(user)
+        query = {"email": user["email"]}
+        position = decode_cursor(cursor)
+        if position:
+            try:
+                added_at = datetime.fromisoformat(position["a"])
+                product_id = position["p"]
+            except (KeyError, TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            # The outer bound gives the planner an index range; $or breaks ties
+            query["added_at"] = {"$lte": added_at}
+            query["$or"] = [
+                {"added_at": {"$lt": added_at}},
+                {"added_at": added_at, "product_id": {"$lt": product_id}}
+            ]
+
+        entries = await wishlists_collection.find(query, {"_id": 0, "product_id": 1, "added_at": 1}).sort(
+            [("added_at", -1), ("product_id", -1)]
+        ).limit(limit + 1).to_list(limit + 1)
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        products = await CatalogService().get_products(
+            [entry["product_id"] for entry in entries], WISHLIST_PRODUCT_PROJECTION
+        )
+        items = [
+            WishlistItem(
+                product_id=entry["product_id"],
+                name=product["Name"],
+                price=product["Selling Price"],
+                image_url=product["Product Photo"].strip().split("\n")[0],
+                added_at=entry["added_at"]
+            )
+            for entry in entries
+            if (product := products.get(entry["product_id"]))
+        ]
+        next_cursor = None
+        if has_more:
+            last = entries[-1]
+            next_cursor = encode_cursor({"a": last["added_at"].isoformat(), "p": last["product_id"]})
+        return WishlistPage(items=items, next_cursor=next_cursor, has_more=has_more)
+
+    async def bulk_update(self, user: dict, add: List[str], remove: List[str]) -> Tuple[List[BulkItemResult], int]:
+        """
+        Add the `add` ids that exist in the catalog (validated with one
+        query) and remove the `remove` ids, in a single bulk write. An id in
+        both lists ends up saved. Returns the per-item results and the
+        wishlist size afterwards.
+        """
+        await self.migrate(user)
+        email = user["email"]
+        products = await CatalogService().get_products(add, {"_id": 1}) if add else {}
+        present = set()
+        if remove:
+            present = {
+                doc["product_id"]
+                async for doc in wishlists_collection.find({"email": email, "product_id": {"$in": remove}}, {"product_id": 1})
+            }
+
+        now = datetime.utcnow()
+        ops, pending, add_results = [], {}, []
+        for product_id in add:
+            if not ObjectId.is_valid(product_id):
+                add_results.append(BulkItemResult(product_id=product_id, status="invalid"))
+                continue
+            if product_id not in products:
+                add_results.append(BulkItemResult(product_id=product_id, status="not_found"))
+                continue
+            if product_id not in pending:
+                pending[product_id] = len(ops)
+                ops.append(UpdateOne(
+                    {"email": email, "product_id": product_id},
+                    {"$setOnInsert": {"added_at": now}},
+                    upsert=True
+                ))
+            add_results.append(BulkItemResult(product_id=product_id, status="unchanged"))
+
+        removed, remove_results = set(), []
+        for product_id in remove:
+            if product_id in present and product_id not in pending and product_id not in removed:
+                removed.add(product_id)
+                remove_results.append(BulkItemResult(product_id=product_id, status="removed"))
+            else:
+                remove_results.append(BulkItemResult(product_id=product_id, status="unchanged"))
+        # After the upserts, so upserted_ids indexes match the add positions
+        if removed:
+            ops.append(DeleteMany({"email": email, "product_id": {"$in": list(removed)}}))
+
+        if ops:
+            written = await wishlists_collection.bulk_write(ops, ordered=True)
+            # Only products that were not saved yet create a document
+            inserted = {product_id for product_id, idx in pending.items() if idx in written.upserted_ids}
+            for result in add_results:
+                if result.product_id in inserted:
+                    result.status = "added"
+                    inserted.discard(result.product_id)
+        return remove_results + add_results, await wishlists_collection.count_documents({"email": email})
+
+    async def migrate(self, user: dict) -> int:
+        """
+        Move a legacy `wishlist` array off the user document. Entries get
+        added_at times one millisecond apart that keep the array's order.
+        Safe to repeat: existing entries are left as they are.
+        """
+        legacy = user.get("wishlist")
+        if legacy is None:
+            return 0
+        product_ids = list(dict.fromkeys(legacy))
+        if product_ids:
+            base = datetime.utcnow() - timedelta(milliseconds=len(product_ids))
+            await wishlists_collection.bulk_write([
+                UpdateOne(
+                    {"email": user["email"], "product_id": product_id},
+                    {"$setOnInsert": {"added_at": base + timedelta(milliseconds=n)}},
+                    upsert=True
+                )
+                for n, product_id in enumerate(product_ids)
+            ], ordered=False)
+        await users_collection.update_one({"_id": user["_id"]}, {"$unset": {"wishlist": ""}})
+        del user["wishlist"]
+        return len(product_ids)
+
+    async def migrate_all(self) -> Tuple[int, int]:
+        """
+        Migrate every account that still has a legacy array. Returns
+        (users, entries moved).
+        """
+        users = moved = 0
+        async for user in users_collection.find({"wishlist": {"$exists": True}}, {"email": 1, "wishlist": 1}):
+            moved += await self.migrate(user)
+            users += 1
+        return users, moved
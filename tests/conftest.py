@@ -0,0 +1,60 @@
+import uuid
+import httpx
+import pytest
+from bson import ObjectId
+from benchmarks.harness import boot_app
+
+# The app runs against the in-memory backend. The 1ms simulated round trip
+# makes every database call yield, so concurrent coroutines really interleave.
+app, database, counter = boot_app("memory", latency_ms=1)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def queries():
+    """
+    Database round trips issued by the app so far.
+    """
+    return counter
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def shopper(client):
+    """
+    A signed-in user with one product in the cart, and a checkout body
+    priced from GET /cart the way a real client builds it.
+    """
+    from utils.tokens import create_access_token
+
+    email = f"shopper-{uuid.uuid4().hex[:8]}@example.com"
+    product_id = ObjectId()
+    await database.products_collection.insert_one({"_id": product_id, "Name": "Phone", "Selling Price": 1000.0, "Product Photo": ""})
+    await database.users_collection.insert_one({
+        "email": email, "cart": [{"product_id": str(product_id), "quantity": 1}], "cart_version": 0
+    })
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+    cart = (await client.get("/cart/api/v1/cart/", headers=headers)).json()
+    body = {
+        "customer_info": {"name": "Shopper", "email": email, "phone": "9000000000"},
+        "shipping_address": {
+            "full_name": "Shopper", "mobile": "9000000000", "address_line_1": "1 Test Street",
+            "city": "Bengaluru", "state": "Karnataka", "pincode": "560001"
+        },
+        "pricing": cart["totals"],
+        "delivery_option": "standard",
+        "payment_method": "cod",
+        "payment_data": {"confirm": True},
+        "quote": cart.get("quote")
+    }
+    return {"email": email, "product_id": str(product_id), "headers": headers, "body": body}
@@ -0,0 +1,76 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from utils.admission import AdmissionMiddleware, RouteClass
+from utils.ratelimit import MemoryRateLimitStore, RateLimiter, RateLimitStore
+
+
+def limited_app(name: str, queue_timeout_ms: float = 1000, **limits) -> tuple:
+    app = FastAPI()
+    gate = asyncio.Event()
+
+    @app.post("/slow")
+    async def slow():
+        await gate.wait()
+        return {"ok": True}
+
+    @app.post("/fast")
+    async def fast():
+        return {"ok": True}
+
+    app.add_middleware(
+        AdmissionMiddleware,
+        classes=[RouteClass(name, routes=[("POST", "/slow"), ("POST", "/fast")], **limits)],
+        queue_timeout_ms=queue_timeout_ms
+    )
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test"), gate
+
+
+@pytest.mark.anyio
+async def test_drained_ip_bucket_gets_429_with_retry_after():
+    client, _ = limited_app("test-ip", max_concurrency=4, max_queue=4, ip_rate_per_minute=1, ip_burst=2)
+    async with client:
+        statuses = [(await client.post("/fast")).status_code for _ in range(2)]
+        r = await client.post("/fast")
+
+    assert statuses == [200, 200]
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+@pytest.mark.anyio
+async def test_saturated_route_class_gets_503_with_retry_after():
+    client, gate = limited_app("test-busy", queue_timeout_ms=50, max_concurrency=1, max_queue=1)
+    async with client:
+        running = asyncio.create_task(client.post("/slow"))
+        await asyncio.sleep(0.05)
+        # One request holds the only slot: the next waits out the queue
+        # timeout and the one after that finds the queue full
+        queued = asyncio.create_task(client.post("/fast"))
+        await asyncio.sleep(0.01)
+        full = await client.post("/fast")
+        timed_out = await queued
+        gate.set()
+        assert (await running).status_code == 200
+
+    assert full.status_code == 503 and full.headers["Retry-After"] == "1"
+    assert timed_out.status_code == 503
+
+
+@pytest.mark.anyio
+async def test_account_limiter_raises_429():
+    limiter = RateLimiter("test:account", rate=1 / 60, burst=1, store=MemoryRateLimitStore())
+    await limiter.enforce("Someone@example.com")
+    with pytest.raises(HTTPException) as raised:
+        await limiter.enforce("someone@example.com")
+    assert raised.value.status_code == 429
+    assert int(raised.value.headers["Retry-After"]) >= 1
+
+
+def test_store_without_take_cannot_be_constructed():
+    class Incomplete(RateLimitStore):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,29 @@
+import bcrypt
+import httpx
+import pytest
+from database import otps_collection, users_collection
+from main import app
+from services.otp_service import OTPService
+
+
+@pytest.mark.anyio
+async def test_reset_password_matches_the_account_case_insensitively():
+    await users_collection.insert_one({
+        "email": "Reset.Case@example.com", "email_lower": "reset.case@example.com", "hashed_password": "old"
+    })
+    otp = await OTPService().issue("Reset.Case@example.com")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        missing = await client.post("/auth/api/v1/auth/reset-password", json={
+            "email": "nobody@example.com", "otp": otp, "new_password": "n3w-Passw0rd!"
+        })
+        r = await client.post("/auth/api/v1/auth/reset-password", json={
+            "email": "reset.case@example.com", "otp": otp, "new_password": "n3w-Passw0rd!"
+        })
+
+    assert missing.status_code == 404
+    assert r.status_code == 200
+    user = await users_collection.find_one({"email": "Reset.Case@example.com"})
+    assert bcrypt.checkpw(b"n3w-Passw0rd!", user["hashed_password"].encode())
+    assert await otps_collection.find_one({"_id": "reset.case@example.com"}) is None
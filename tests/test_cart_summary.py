@@ -0,0 +1,27 @@
+import pytest
+from bson import ObjectId
+from database import products_collection, promotions_collection, users_collection
+from services.cart_service import CartService, empty_summary
+from services.pricing_service import PricingService
+
+
+@pytest.mark.anyio
+async def test_promotion_change_reprices_summary_without_catalog_bump():
+    product_id = ObjectId()
+    await products_collection.insert_one({"_id": product_id, "Name": "Phone", "Selling Price": 1000.0, "Product Photo": ""})
+    user_id = (await users_collection.insert_one({
+        "email": "promo@example.com", "cart": [], "cart_version": 0, "cart_summary": empty_summary()
+    })).inserted_id
+    service = CartService()
+    await service.set_quantity(await users_collection.find_one({"_id": user_id}), str(product_id), 2)
+    assert (await service.get_summary("promo@example.com")).total == 2000.0
+
+    # Written straight to the collection: the catalog version does not move
+    await promotions_collection.insert_one({"id": "TENOFF", "type": "percent", "value": 10, "active": True})
+    await PricingService().current_promotions(max_age=0)
+    assert (await service.get_summary("promo@example.com")).stale
+
+    assert await service.refresh_summaries() == 1
+    summary = await service.get_summary("promo@example.com")
+    assert (summary.discount, summary.total, summary.stale) == (200.0, 1800.0, False)
+    assert await service.refresh_summaries() == 0
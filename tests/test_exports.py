@@ -0,0 +1,27 @@
+import csv
+import io
+import pytest
+from bson import ObjectId
+from database import products_collection
+from services.export_service import ExportService
+
+
+async def export(fmt: str, after_id: str) -> bytes:
+    return b"".join([chunk async for chunk in await ExportService().products(fmt, after_id=after_id)])
+
+
+@pytest.mark.anyio
+async def test_csv_export_neutralises_formula_cells():
+    start = ObjectId()
+    await products_collection.insert_one({
+        "Name": '=HYPERLINK("http://evil.example","Phone")', "Brand": "@Brand",
+        "Model": "-1+2", "Color": "Blue", "Memory": "\t=1+1", "Storage": "\r=1+1", "Selling Price": -5.0
+    })
+
+    rows = list(csv.DictReader(io.StringIO((await export("csv", str(start))).decode())))
+    assert rows[0]["Name"] == '\'=HYPERLINK("http://evil.example","Phone")'
+    assert (rows[0]["Brand"], rows[0]["Model"], rows[0]["Color"]) == ("'@Brand", "'-1+2", "Blue")
+    assert (rows[0]["Memory"], rows[0]["Storage"]) == ("'\t=1+1", "'\r=1+1")
+    assert rows[0]["Selling Price"] == "-5.0"
+    # Only the CSV encoder escapes; NDJSON keeps the raw value
+    assert b'"Name":"=HYPERLINK' in await export("ndjson", str(start))
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from database import products_collection, users_collection
+from utils.tokens import create_access_token
+
+FILTER = "/history/api/v1/history/filter"
+
+
+async def viewer(email: str, views: int, product_ids: list) -> dict:
+    now = datetime.utcnow()
+    await users_collection.insert_one({"email": email, "cart": [], "history": [
+        {"product_id": product_ids[n % len(product_ids)], "viewed_at": now - timedelta(minutes=views - n)}
+        for n in range(views)
+    ]})
+    return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+
+@pytest.mark.anyio
+async def test_filter_fetches_products_in_one_query(client, queries):
+    ids = [ObjectId() for _ in range(5)]
+    await products_collection.insert_many([
+        {"_id": pid, "name": f"Phone {n}", "Brand": "Acme" if n % 2 else "Other", "Model": f"M{n}", "price": 100 + n}
+        for n, pid in enumerate(ids)
+    ])
+    product_ids = [str(pid) for pid in ids] + [str(ObjectId())]  # one no longer in the catalog
+    short = await viewer("history-short@example.com", 2, product_ids)
+    long = await viewer("history-long@example.com", 30, product_ids)
+
+    before = queries.count
+    await client.get(FILTER, headers=short)
+    short_queries = queries.count - before
+    before = queries.count
+    r = await client.get(FILTER, params={"brand": "acme"}, headers=long)
+    assert queries.count - before == short_queries
+
+    assert r.status_code == 200
+    items = r.json()["filtered_history"]
+    assert len(items) == 10
+    assert {item["brand"] for item in items} == {"Acme"}
+    viewed = [item["viewed_at"] for item in items]
+    assert viewed == sorted(viewed, reverse=True)
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from database import ensure_indexes, idempotency_collection, orders_collection, users_collection
+from services import idempotency_service
+from services.idempotency_service import IdempotencyService
+
+CHECKOUT = "/checkout/api/v1/checkout/"
+
+
+@pytest.mark.anyio
+async def test_retry_replays_the_stored_response(client, shopper):
+    headers = {**shopper["headers"], "Idempotency-Key": "replay-1"}
+    first = await client.post(CHECKOUT, json=shopper["body"], headers=headers)
+    again = await client.post(CHECKOUT, json=shopper["body"], headers=headers)
+
+    assert first.status_code == 200, first.text
+    assert "Idempotent-Replayed" not in first.headers
+    assert again.status_code == 200
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.json()["order_id"] == first.json()["order_id"]
+    assert await orders_collection.count_documents({"email": shopper["email"]}) == 1
+
+
+@pytest.mark.anyio
+async def test_key_reused_with_a_different_body_is_rejected(client, shopper):
+    headers = {**shopper["headers"], "Idempotency-Key": "reuse-1"}
+    assert (await client.post(CHECKOUT, json=shopper["body"], headers=headers)).status_code == 200
+
+    changed = {**shopper["body"], "delivery_option": "express"}
+    r = await client.post(CHECKOUT, json=changed, headers=headers)
+    assert r.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_duplicate_waits_then_gets_409_while_first_is_running(monkeypatch):
+    monkeypatch.setattr(idempotency_service, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    first, second = IdempotencyService(), IdempotencyService()
+    assert await first.begin("running@example.com", "k", "fp") is None
+
+    with pytest.raises(Exception) as raised:
+        await second.begin("running@example.com", "k", "fp")
+    assert raised.value.status_code == 409
+    await first.release("running@example.com", "k")
+
+
+@pytest.mark.anyio
+async def test_expired_lease_is_taken_over_and_the_old_owner_is_ignored():
+    first, second = IdempotencyService(), IdempotencyService()
+    assert await first.begin("crashed@example.com", "k", "fp") is None
+    await idempotency_collection.update_one(
+        {"_id": "crashed@example.com:k"}, {"$set": {"locked_until": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+
+    assert await second.begin("crashed@example.com", "k", "fp") is None
+    # The first owner was only slow: its late writes must not clobber the new run
+    await first.release("crashed@example.com", "k")
+    assert not await first.complete("crashed@example.com", "k", {"order_id": "stale"})
+    assert await second.complete("crashed@example.com", "k", {"order_id": "fresh"})
+    assert await IdempotencyService().begin("crashed@example.com", "k", "fp") == {"order_id": "fresh"}
+
+
+@pytest.mark.anyio
+async def test_running_request_keeps_renewing_its_lease(monkeypatch):
+    monkeypatch.setattr(idempotency_service, "IDEMPOTENCY_LEASE_SECONDS", 0.3)
+    owner = IdempotencyService()
+    assert await owner.begin("slow@example.com", "k", "fp") is None
+    async with owner.hold("slow@example.com", "k"):
+        await asyncio.sleep(0.6)
+        doc = await idempotency_collection.find_one({"_id": "slow@example.com:k"})
+        assert doc["locked_until"] > datetime.utcnow()
+    assert await owner.complete("slow@example.com", "k", {"order_id": "done"})
+
+
+@pytest.mark.anyio
+async def test_takeover_that_collides_with_the_first_order_replays_it(client, shopper):
+    await ensure_indexes()  # the unique (email, idempotency_key) order index
+    headers = {**shopper["headers"], "Idempotency-Key": "collide-1"}
+    first = await client.post(CHECKOUT, json=shopper["body"], headers=headers)
+    assert first.status_code == 200
+    # As if the first attempt placed its order but stalled before completing
+    # the key, and the shopper put the same item back in the cart
+    await idempotency_collection.update_one(
+        {"_id": f"{shopper['email']}:collide-1"},
+        {"$set": {"status": "in_progress", "owner": "gone", "locked_until": datetime.utcnow() - timedelta(seconds=1)},
+         "$unset": {"response": ""}}
+    )
+    await users_collection.update_one(
+        {"email": shopper["email"]}, {"$set": {"cart": [{"product_id": shopper["product_id"], "quantity": 1}]}}
+    )
+
+    r = await client.post(CHECKOUT, json=shopper["body"], headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.headers["Idempotent-Replayed"] == "true"
+    assert r.json()["order_id"] == first.json()["order_id"]
+    assert await orders_collection.count_documents({"email": shopper["email"]}) == 1
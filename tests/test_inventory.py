@@ -0,0 +1,24 @@
+import pytest
+from fastapi import HTTPException
+from services import inventory_service
+from services.inventory_service import InventoryService
+
+
+@pytest.mark.anyio
+async def test_failed_reservation_gives_back_lines_evicted_from_holds(monkeypatch):
+    # Under contention other buyers can push this reservation's id out of
+    # the bounded holds log before anything reads it; an empty log is the
+    # extreme case
+    monkeypatch.setattr(inventory_service, "INVENTORY_HOLD_LOG", 0)
+    service = InventoryService()
+    plenty, sold_out = "64f1c2a0b1c2d3e4f5a6b701", "64f1c2a0b1c2d3e4f5a6b702"
+    await service.set_stock(plenty, 100)
+    await service.set_stock(sold_out, 0)
+
+    with pytest.raises(HTTPException) as raised:
+        await service.reserve("ORDLEAK01", [(plenty, 1), (sold_out, 1)])
+
+    assert raised.value.status_code == 409
+    assert raised.value.detail["product_ids"] == [sold_out]
+    assert await service.get_stock(plenty) == 100
+    assert await service.get_stock(sold_out) == 0
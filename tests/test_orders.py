@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from database import orders_collection, users_collection
+from main import app
+from utils.tokens import create_access_token
+
+
+@pytest.mark.anyio
+async def test_recent_orders_keeps_its_array_shape():
+    email = "recent@example.com"
+    await users_collection.insert_one({"email": email, "cart": [], "cart_version": 0})
+    now = datetime.utcnow()
+    await orders_collection.insert_many([
+        {
+            "order_id": f"ORDRECENT{n}", "email": email, "status": "confirmed",
+            "pricing": {"total": 100.0 * n},
+            "payment": {"status": "completed", "payment_id": f"pay_{n}"},
+            "shipping": {"tracking_id": f"TRK{n}", "estimated_delivery": "2026-01-01", "status": "pending"},
+            "created_at": now - timedelta(minutes=n), "updated_at": now
+        }
+        for n in range(7)
+    ])
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.get("/orders/api/v1/orders/recent", headers={"Authorization": f"Bearer {create_access_token({'sub': email})}"})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert isinstance(body, list)
+    assert [order["order_id"] for order in body] == [f"ORDRECENT{n}" for n in range(5)]
+    assert body[0]["tracking_id"] == "TRK0" and body[0]["payment_status"] == "completed"
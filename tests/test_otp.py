@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from database import otps_collection
+from services.otp_service import OTPService
+from config import OTP_MAX_ATTEMPTS
+
+
+def wrong(otp: str) -> str:
+    return "000000" if otp != "000000" else "111111"
+
+
+@pytest.mark.anyio
+async def test_wrong_codes_count_attempts_and_lock_the_code():
+    service = OTPService()
+    otp = await service.issue("Guess@example.com")
+
+    for attempt in range(1, OTP_MAX_ATTEMPTS):
+        with pytest.raises(HTTPException) as raised:
+            await service.verify("guess@example.com", wrong(otp))
+        assert raised.value.detail == "Invalid OTP"
+        assert (await otps_collection.find_one({"_id": "guess@example.com"}))["attempts"] == attempt
+
+    with pytest.raises(HTTPException) as raised:
+        await service.verify("guess@example.com", wrong(otp))
+    assert raised.value.detail == "Too many attempts, request a new OTP"
+    # Locked: even the right code no longer matches
+    with pytest.raises(HTTPException):
+        await service.consume("guess@example.com", otp)
+
+
+@pytest.mark.anyio
+async def test_consumed_code_cannot_be_reused(client):
+    service = OTPService()
+    otp = await service.issue("once@example.com")
+    await service.verify("once@example.com", otp)  # checking does not use it up
+    await service.consume("once@example.com", otp)
+
+    with pytest.raises(HTTPException) as raised:
+        await service.consume("once@example.com", otp)
+    assert raised.value.status_code == 400
+    r = await client.post("/api/v1/otp/verify", json={"email": "once@example.com", "otp": otp})
+    assert r.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_expired_code_is_rejected():
+    service = OTPService()
+    otp = await service.issue("late@example.com")
+    await otps_collection.update_one(
+        {"_id": "late@example.com"}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+
+    with pytest.raises(HTTPException) as raised:
+        await service.consume("late@example.com", otp)
+    # Until the TTL index removes it the code reads as expired, then as unknown
+    assert raised.value.detail in ("OTP expired", "Invalid OTP")
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+import pytest
+from database import inventory_collection, orders_collection
+from models.payment import PaymentEventType, PaymentWebhookEvent
+from services.inventory_service import shard_id
+from services.payment_event_service import PaymentEventService
+from utils.signing import sign_webhook
+from config import PAYMENT_WEBHOOK_SECRET, PAYMENT_WEBHOOK_TOLERANCE_SECONDS
+
+WEBHOOK = "/payment/webhook"
+
+
+def signed(event: dict, sent_at: int = None, secret: str = PAYMENT_WEBHOOK_SECRET) -> tuple:
+    body = json.dumps(event).encode()
+    sent_at = int(time.time()) if sent_at is None else sent_at
+    return body, {"X-Webhook-Timestamp": str(sent_at), "X-Webhook-Signature": sign_webhook(body, sent_at, secret)}
+
+
+async def pending_order(order_id: str, payment_id: str):
+    await orders_collection.insert_one({
+        "order_id": order_id, "status": "pending_payment",
+        "payment": {"payment_id": payment_id, "status": "pending"}
+    })
+
+
+@pytest.mark.anyio
+async def test_concurrent_failed_event_releases_stock_once():
+    product_id = "64f1c2a0b1c2d3e4f5a6b7c8"
+    await inventory_collection.insert_one({"_id": shard_id(product_id, 0), "product_id": product_id, "shard": 0, "stock": 8})
+    await orders_collection.insert_one({
+        "order_id": "ORDRACE01",
+        "status": "pending_payment",
+        "payment": {"payment_id": "pay_race", "status": "pending"},
+        "reservation": {"status": "held", "items": [{"product_id": product_id, "shard": 0, "quantity": 2}]}
+    })
+    event = PaymentWebhookEvent(id="evt_race", type=PaymentEventType.FAILED, payment_id="pay_race")
+
+    # A buffer flush on one worker and verify_payment on another
+    await asyncio.gather(PaymentEventService().process([event]), PaymentEventService().process([event]))
+
+    counter = await inventory_collection.find_one({"_id": shard_id(product_id, 0)})
+    order = await orders_collection.find_one({"order_id": "ORDRACE01"})
+    assert counter["stock"] == 10
+    assert order["status"] == "payment_failed"
+    assert order["reservation"]["status"] == "released"
+
+
+@pytest.mark.anyio
+async def test_webhook_rejects_bad_signatures_and_stale_timestamps(client):
+    await pending_order("ORDSIG01", "pay_sig")
+    event = {"id": "evt_sig", "type": "payment.succeeded", "payment_id": "pay_sig"}
+
+    body, headers = signed(event, secret="not-the-secret")
+    forged = await client.post(WEBHOOK, content=body, headers=headers)
+    body, headers = signed(event, sent_at=int(time.time()) - PAYMENT_WEBHOOK_TOLERANCE_SECONDS - 60)
+    replayed = await client.post(WEBHOOK, content=body, headers=headers)
+    body, headers = signed(event)
+    tampered = await client.post(WEBHOOK, content=body.replace(b"succeeded", b"failed"), headers=headers)
+
+    assert [r.status_code for r in (forged, replayed, tampered)] == [401, 401, 401]
+    assert (await orders_collection.find_one({"order_id": "ORDSIG01"}))["status"] == "pending_payment"
+
+
+@pytest.mark.anyio
+async def test_redelivered_event_is_applied_once(client):
+    await pending_order("ORDDUP01", "pay_dup")
+    body, headers = signed({"id": "evt_dup", "type": "payment.succeeded", "payment_id": "pay_dup", "transaction_id": "txn_1"})
+
+    first = await client.post(WEBHOOK, content=body, headers=headers)
+    again = await client.post(WEBHOOK, content=body, headers=headers)
+
+    assert first.json() == {"received": True, "duplicate": False}
+    assert again.json() == {"received": True, "duplicate": True}
+    order = await orders_collection.find_one({"order_id": "ORDDUP01"})
+    assert (order["status"], order["payment"]["last_event_id"]) == ("confirmed", "evt_dup")
+
+
+@pytest.mark.anyio
+async def test_out_of_order_transitions_are_ignored():
+    await pending_order("ORDORDER01", "pay_order")
+    service = PaymentEventService()
+
+    await service.process([PaymentWebhookEvent(id="evt_fail", type=PaymentEventType.FAILED, payment_id="pay_order")])
+    # A late success for a failed payment does not resurrect the order
+    await service.process([PaymentWebhookEvent(id="evt_late", type=PaymentEventType.SUCCEEDED, payment_id="pay_order")])
+    order = await orders_collection.find_one({"order_id": "ORDORDER01"})
+    assert (order["status"], order["payment"]["status"], order["payment"]["last_event_id"]) == (
+        "payment_failed", "failed", "evt_fail"
+    )
+
+    await pending_order("ORDORDER02", "pay_order2")
+    await service.process([PaymentWebhookEvent(id="evt_ok", type=PaymentEventType.SUCCEEDED, payment_id="pay_order2")])
+    await service.process([PaymentWebhookEvent(id="evt_stale_fail", type=PaymentEventType.FAILED, payment_id="pay_order2")])
+    order = await orders_collection.find_one({"order_id": "ORDORDER02"})
+    assert (order["status"], order["payment"]["status"]) == ("confirmed", "completed")
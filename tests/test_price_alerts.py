@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from database import meta_collection, products_collection, users_collection
+from services.price_alert_service import WATERMARK_ID, PriceAlertService
+
+
+class RecordingNotifications:
+    def __init__(self):
+        self.sent = []
+
+    async def enqueue(self, notifications):
+        self.sent.extend(notifications)
+        return len(notifications)
+
+
+@pytest.mark.anyio
+async def test_legacy_wishlist_users_get_price_drop_alerts():
+    product_id = ObjectId()
+    changed_at = datetime.utcnow() - timedelta(minutes=5)
+    await products_collection.insert_one({
+        "_id": product_id, "Name": "Kettle", "Selling Price": 800.0,
+        "previous_price": 1000.0, "price_updated_at": changed_at
+    })
+    # Never opened their wishlist since the move to the wishlists collection
+    await users_collection.insert_one({"email": "legacy@example.com", "wishlist": [str(product_id)]})
+    await meta_collection.update_one(
+        {"_id": WATERMARK_ID}, {"$set": {"at": changed_at - timedelta(minutes=1), "product_id": None}}, upsert=True
+    )
+
+    notifications = RecordingNotifications()
+    assert await PriceAlertService(notifications).run() == 1
+    assert notifications.sent[0]["email"] == "legacy@example.com"
+    assert "wishlist" not in await users_collection.find_one({"email": "legacy@example.com"})
@@ -0,0 +1,76 @@
+import pytest
+from database import users_collection
+from models.pricing import PriceBreakdown
+from services.pricing_service import PricingService
+from utils.signing import verify_payload
+from config import QUOTE_SECRET_KEY
+
+CHECKOUT = "/checkout/api/v1/checkout/"
+
+
+def cheap_quote(quote: str, **bound) -> str:
+    """
+    Re-sign the shopper's quote at a total of 1.00, bound to the same
+    cart and catalog unless `bound` overrides them. Honouring it shows up
+    as an order charged 1.00; re-pricing turns it into a price mismatch.
+    """
+    payload = verify_payload(quote, QUOTE_SECRET_KEY)
+    pricing = PriceBreakdown.model_validate({
+        **payload["pricing"], "total": 1.0,
+        "delivery_option": bound.get("delivery_option", payload["pricing"]["delivery_option"])
+    })
+    token, _ = PricingService().issue_quote(
+        pricing,
+        bound.get("email", payload["email"]),
+        bound.get("cart_version", payload["cart_version"]),
+        bound.get("catalog_version", payload["catalog_version"])
+    )
+    return token
+
+
+@pytest.fixture
+def price_cart_calls(monkeypatch):
+    calls = []
+    price_cart = PricingService.price_cart
+
+    async def counted(self, *args, **kwargs):
+        calls.append(args)
+        return await price_cart(self, *args, **kwargs)
+
+    monkeypatch.setattr(PricingService, "price_cart", counted)
+    return calls
+
+
+def cheap_body(shopper, quote: str, **changes) -> dict:
+    return {**shopper["body"], "quote": quote, "pricing": {**shopper["body"]["pricing"], "total": 1.0}, **changes}
+
+
+@pytest.mark.anyio
+async def test_matching_quote_is_honoured_without_repricing(client, shopper, price_cart_calls):
+    r = await client.post(CHECKOUT, json=cheap_body(shopper, cheap_quote(shopper["body"]["quote"])), headers=shopper["headers"])
+    assert r.status_code == 200, r.text
+    assert price_cart_calls == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("case", ["tampered", "cart_version", "catalog_version", "delivery_option"])
+async def test_mismatched_quote_falls_back_to_full_pricing(client, shopper, price_cart_calls, case):
+    quote = shopper["body"]["quote"]
+    body = cheap_body(shopper, cheap_quote(quote))
+    if case == "tampered":
+        # The shopper's own quote with the total edited, signature unchanged
+        forged, _ = cheap_quote(quote).split(".")
+        body["quote"] = f"{forged}.{quote.split('.')[1]}"
+    elif case == "cart_version":
+        await users_collection.update_one({"email": shopper["email"]}, {"$inc": {"cart_version": 1}})
+    elif case == "catalog_version":
+        payload = verify_payload(quote, QUOTE_SECRET_KEY)
+        body["quote"] = cheap_quote(quote, catalog_version=payload["catalog_version"] - 1)
+    else:
+        # Priced for express; the order asks for standard
+        body["quote"] = cheap_quote(quote, delivery_option="express")
+
+    r = await client.post(CHECKOUT, json=body, headers=shopper["headers"])
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Price mismatch")
+    assert len(price_cart_calls) == 1
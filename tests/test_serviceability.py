@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from database import meta_collection, serviceability_collection
+from services import serviceability_service
+from services.serviceability_service import SERVICEABILITY_META_ID, ServiceabilityService
+
+
+def ranges(zone: str, end: int) -> list:
+    return [{"start": 560001, "end": end, "zone": zone, "warehouse": "BLR1", "lead_days": {"standard": 2}}]
+
+
+@pytest.mark.anyio
+async def test_concurrent_publishes_get_their_own_versions():
+    service = ServiceabilityService()
+    # Overlapping tables: rows sharing a version could not be indexed together
+    versions = await asyncio.gather(
+        service.publish(ranges("first", 560050)), service.publish(ranges("second", 560099))
+    )
+    assert len(set(versions)) == 2
+
+    serviceability_service._index_cache.update(index=None, version=None, checked_at=0.0)
+    index, version = await service.refresh()
+    assert version == max(versions)
+    assert len(index) == 1
+    assert (await meta_collection.find_one({"_id": SERVICEABILITY_META_ID}))["version"] == max(versions)
+
+
+@pytest.mark.anyio
+async def test_failed_load_keeps_serving_the_previous_table():
+    service = ServiceabilityService()
+    version = await service.publish(ranges("metro", 560099))
+
+    # A broken next version (overlapping rows) must not take estimates down
+    await serviceability_collection.insert_many([{"version": version + 1, **row} for row in ranges("a", 560050) + ranges("b", 560060)])
+    await meta_collection.update_one({"_id": SERVICEABILITY_META_ID}, {"$set": {"version": version + 1, "next_version": version + 1}})
+
+    index, served = await service.refresh()
+    assert served == version
+    assert (await service.estimate("560010")).zone == "metro"
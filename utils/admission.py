@@ -0,0 +1,183 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from utils.ratelimit import RateLimiter
+from utils.responses import dumps
+from config import ADMISSION_QUEUE_TIMEOUT_MS, IP_RATE_PER_MINUTE, IP_RATE_BURST, TRUST_PROXY_HEADERS
+
+# Every ConcurrencyLimiter registers itself here so /metrics can report on it
+_registry: Dict[str, "ConcurrencyLimiter"] = {}
+
+
+class Overloaded(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` requests run at once; up to `max_queue` more wait in
+    FIFO order for at most `timeout` seconds. Anything beyond that is
+    turned away immediately, so a burst costs the rejected callers one
+    dictionary check instead of piling up on the worker.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        _registry[name] = self
+
+    async def acquire(self):
+        """
+        Take a slot or raise Overloaded. Pair every success with release().
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.name)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._waiters.remove(waiter)
+                self.timed_out += 1
+                raise Overloaded(self.name)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # The slot was handed over just as the caller went away
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        self.admitted += 1
+
+    def release(self):
+        # Hand the slot straight to the next waiter, keeping FIFO order
+        if self._waiters:
+            self._waiters.popleft().set_result(None)
+            return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+
+@dataclass
+class RouteClass:
+    """
+    A group of expensive routes sharing one concurrency limit and one
+    per-IP rate limit.
+    """
+    name: str
+    routes: List[Tuple[str, str]]  # (method, path prefix)
+    max_concurrency: int
+    max_queue: int
+    ip_rate_per_minute: float = IP_RATE_PER_MINUTE
+    ip_burst: float = IP_RATE_BURST
+
+
+def client_ip(scope: Scope) -> str:
+    if TRUST_PROXY_HEADERS:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionMiddleware:
+    """
+    Load shedding for CPU-heavy and abuse-prone routes.
+
+    A request matching a RouteClass first spends a token from its IP's
+    bucket (429 when empty), then waits for a slot in the class's
+    concurrency limiter (503 when the queue is full or the wait runs out).
+    Both rejections carry Retry-After. Requests outside every class pass
+    straight through, so cheap reads never queue behind logins or OTP mail.
+    """
+
+    def __init__(self, app: ASGIApp, classes: List[RouteClass], queue_timeout_ms: float = ADMISSION_QUEUE_TIMEOUT_MS):
+        self.app = app
+        self.classes = []
+        for route_class in classes:
+            limiter = ConcurrencyLimiter(
+                route_class.name, route_class.max_concurrency, route_class.max_queue, queue_timeout_ms / 1000
+            )
+            ip_limiter = RateLimiter(
+                f"ip:{route_class.name}", rate=route_class.ip_rate_per_minute / 60, burst=route_class.ip_burst
+            )
+            self.classes.append((route_class, limiter, ip_limiter))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        match = self._match(scope["method"], scope["path"])
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        _, limiter, ip_limiter = match
+        allowed, retry_after = await ip_limiter.check(client_ip(scope))
+        if not allowed:
+            await self._reject(send, 429, "Too many requests, slow down", max(1, round(retry_after)))
+            return
+
+        try:
+            await limiter.acquire()
+        except Overloaded:
+            await self._reject(send, 503, "Server busy, try again shortly", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    def _match(self, method: str, path: str) -> Optional[tuple]:
+        for entry in self.classes:
+            for route_method, prefix in entry[0].routes:
+                if method == route_method and path.startswith(prefix):
+                    return entry
+        return None
+
+    async def _reject(self, send: Send, status: int, detail: str, retry_after: int):
+        body = dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def admission_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in _registry.items()}
@@ -0,0 +1,24 @@
+import base64
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException
+
+
+def encode_cursor(position: dict) -> str:
+    """
+    Opaque keyset cursor: the sort key of the last item a page returned.
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(position)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    if not cursor:
+        return None
+    try:
+        position = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, orjson.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(position, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
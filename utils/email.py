@@ -1,15 +1,11 @@
-import os
-from dotenv import load_dotenv
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-
-load_dotenv()
-
-EMAIL_USER = os.getenv("EMAIL_USER")
-EMAIL_PASS = os.getenv("EMAIL_PASS")
+from config import EMAIL_USER, EMAIL_PASS
 
 def send_email(to: str, subject: str, body: str):
+    # smtplib and the MIME classes are only needed when mail actually goes out
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
     msg = MIMEMultipart()
     msg["From"] = EMAIL_USER
     msg["To"] = to
@@ -0,0 +1,74 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from utils.responses import ORJSONResponse, dumps
+
+
+def compute_etag(payload: bytes, weak: bool = False) -> str:
+    tag = f'"{hashlib.blake2b(payload, digest_size=12).hexdigest()}"'
+    return f"W/{tag}" if weak else tag
+
+
+def version_etag(*parts: Any) -> str:
+    """
+    Weak ETag derived from version counters instead of the body, so it can be
+    checked before any database work is done.
+    """
+    return compute_etag("|".join(str(p) for p in parts).encode(), weak=True)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison as required for If-None-Match (RFC 9110 13.1.2).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(candidate) == target for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Response:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
+
+
+def conditional(request: Request, etag: str, cache_control: Optional[str] = None) -> Optional[Response]:
+    """
+    Return a 304 response when the client already holds `etag`, else None.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control)
+    return None
+
+
+class StaticJSON:
+    """
+    A JSON payload that never changes at runtime.
+    The body and its strong ETag are computed once at import time.
+    """
+
+    def __init__(self, content: Any, cache_control: str):
+        self.body = dumps(content)
+        self.etag = compute_etag(self.body)
+        self.cache_control = cache_control
+
+    def response(self, request: Request) -> Response:
+        cached = conditional(request, self.etag, self.cache_control)
+        if cached is not None:
+            return cached
+        return Response(
+            content=self.body,
+            media_type=ORJSONResponse.media_type,
+            headers={"ETag": self.etag, "Cache-Control": self.cache_control}
+        )
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from pymongo.errors import DuplicateKeyError
+from database import meta_collection
+from config import WORKER_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Lease:
+    """
+    Leader election through a lease document in the meta collection.
+
+    Whoever holds an unexpired lease is the leader; the holder must renew
+    (acquire again) well within `ttl` seconds. If it dies, the lease lapses
+    and another worker takes over on its next attempt.
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.doc_id = f"lease:{name}"
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self) -> bool:
+        """
+        Take or renew the lease. Returns True when this worker is the leader.
+        """
+        now = datetime.utcnow()
+        try:
+            # No match means another owner holds a live lease; the upsert
+            # then collides on _id instead of stealing it.
+            await meta_collection.update_one(
+                {"_id": self.doc_id, "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl), "renewed_at": now}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def release(self):
+        await meta_collection.delete_one({"_id": self.doc_id, "owner": self.owner})
+
+
+def worker_stats() -> dict:
+    return {"leader": False, "last_run_at": None, "processed_total": 0, "errors": 0}
+
+
+async def run_leader_loop(
+    name: str, job: Callable[[Lease], Awaitable[int]], interval: float, stats: dict
+):
+    """
+    Background loop for app-lifespan jobs. Every worker process runs it, but
+    only the holder of the `name` lease calls `job(lease)` each `interval`
+    seconds; `job` returns how many items it processed and may renew the
+    lease between batches.
+    """
+    lease = Lease(name, ttl=WORKER_LEASE_SECONDS)
+    try:
+        while True:
+            try:
+                stats["leader"] = await lease.acquire()
+                if stats["leader"]:
+                    processed = await job(lease)
+                    stats["last_run_at"] = datetime.utcnow().isoformat()
+                    stats["processed_total"] += processed
+                    if processed:
+                        logger.info("%s processed %d items", name, processed)
+            except Exception as e:
+                stats["errors"] += 1
+                logger.warning(f"{name} run failed: {e}")
+            await asyncio.sleep(interval)
+    finally:
+        if stats["leader"]:
+            await asyncio.shield(lease.release())
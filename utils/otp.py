@@ -1,8 +1,14 @@
-import random
+import secrets
 from datetime import datetime, timedelta
+from utils.signing import hmac_hex
+from config import OTP_SECRET_KEY, OTP_TTL_MINUTES
 
 def generate_otp(length: int = 6) -> str:
-    return ''.join([str(random.randint(0, 9)) for _ in range(length)])
+    return ''.join(secrets.choice("0123456789") for _ in range(length))
 
-def get_expiry(minutes: int = 10) -> datetime:
+def get_expiry(minutes: int = OTP_TTL_MINUTES) -> datetime:
     return datetime.utcnow() + timedelta(minutes=minutes)
+
+def hash_otp(email: str, otp: str) -> str:
+    # Keyed by email so equal codes for different users hash differently
+    return hmac_hex(f"{email.lower()}|{otp}", OTP_SECRET_KEY)
@@ -0,0 +1,143 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from database import rate_limits_collection
+from config import (
+    RATE_LIMIT_STORE, RATE_LIMIT_MAX_KEYS,
+    ACCOUNT_RATE_PER_MINUTE, ACCOUNT_RATE_BURST, OTP_RATE_PER_HOUR, OTP_RATE_BURST
+)
+
+# Every RateLimiter registers itself here so /metrics can report on it
+_registry: Dict[str, "RateLimiter"] = {}
+
+
+class RateLimitStore(ABC):
+    """
+    Token-bucket state keyed by an arbitrary string. `take` refills the
+    bucket for the time elapsed, then spends `cost` tokens if it can.
+    Returns (allowed, seconds until `cost` tokens are available).
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        ...
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Buckets held in this process. Limits are per worker, and the least
+    recently used buckets are dropped beyond `max_keys`, so a flood of
+    spoofed keys cannot grow memory without bound.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+class MongoRateLimitStore(RateLimitStore):
+    """
+    Buckets shared by every worker, one document each in `collection`.
+    Refill and spend happen in a single pipeline update, so concurrent
+    requests from different processes cannot overspend a bucket. Idle
+    buckets expire through a TTL index on expires_at.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        now = datetime.utcnow()
+        refilled = {"$min": [burst, {"$add": [
+            {"$ifNull": ["$tokens", burst]},
+            {"$multiply": [{"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}, rate]}
+        ]}]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    "expires_at": now + timedelta(seconds=burst / rate)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (cost - doc["tokens"]) / rate
+
+
+def _default_store() -> RateLimitStore:
+    if RATE_LIMIT_STORE == "mongo":
+        return MongoRateLimitStore(rate_limits_collection)
+    return MemoryRateLimitStore()
+
+
+class RateLimiter:
+    """
+    A named token-bucket limit: `rate` tokens per second up to `burst`.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, store: Optional[RateLimitStore] = None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.store = store or rate_limit_store
+        self.allowed = 0
+        self.limited = 0
+        _registry[name] = self
+
+    async def check(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, retry_after = await self.store.take(f"{self.name}:{key}", self.rate, self.burst, cost)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return allowed, retry_after
+
+    async def enforce(self, key: str, cost: float = 1.0):
+        """
+        Raise 429 with a Retry-After header when `key` is over the limit.
+        """
+        allowed, retry_after = await self.check(key.lower(), cost)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, slow down",
+                headers={"Retry-After": str(max(1, round(retry_after)))}
+            )
+
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "limited": self.limited}
+
+
+rate_limit_store = _default_store()
+
+# Per-account limits, checked by handlers once the account is known
+login_limiter = RateLimiter("account:login", rate=ACCOUNT_RATE_PER_MINUTE / 60, burst=ACCOUNT_RATE_BURST)
+checkout_limiter = RateLimiter("account:checkout", rate=ACCOUNT_RATE_PER_MINUTE / 60, burst=ACCOUNT_RATE_BURST)
+otp_limiter = RateLimiter("account:otp", rate=OTP_RATE_PER_HOUR / 3600, burst=OTP_RATE_BURST)
+otp_verify_limiter = RateLimiter("account:otp_verify", rate=ACCOUNT_RATE_PER_MINUTE / 60, burst=ACCOUNT_RATE_BURST)
+
+
+def rate_limit_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in _registry.items()}
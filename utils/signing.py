@@ -0,0 +1,66 @@
+import base64
+import hashlib
+import hmac
+import time
+from typing import Optional
+
+import orjson
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def sign_payload(payload: dict, secret: str) -> str:
+    """
+    Serialise `payload` and append an HMAC-SHA256 tag: `<body>.<tag>`.
+    The body is readable by the client but cannot be altered without the secret.
+    """
+    body = _b64encode(orjson.dumps(payload))
+    tag = hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(tag)}"
+
+
+def verify_payload(token: str, secret: str) -> Optional[dict]:
+    """
+    Return the payload of a token produced by sign_payload, or None when the
+    token is malformed or its tag does not match.
+    """
+    try:
+        body, tag = token.split(".", 1)
+        expected = hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(tag)):
+            return None
+        return orjson.loads(_b64decode(body))
+    except (ValueError, orjson.JSONDecodeError):
+        return None
+
+
+def hmac_hex(message: str, secret: str) -> str:
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def sign_webhook(body: bytes, timestamp: int, secret: str) -> str:
+    """
+    Signature a payment provider sends with a webhook: HMAC-SHA256 over
+    `<timestamp>.<raw body>`, hex encoded.
+    """
+    return hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+
+
+def verify_webhook(body: bytes, timestamp: str, signature: str, secret: str, tolerance: int) -> bool:
+    """
+    Check a webhook signature and reject deliveries older than `tolerance`
+    seconds, so a captured request cannot be replayed later.
+    """
+    try:
+        sent_at = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(time.time() - sent_at) > tolerance:
+        return False
+    return hmac.compare_digest(sign_webhook(body, sent_at, secret), signature or "")
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Every SingleFlight registers itself here so /metrics can report on it
+_registry: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into one in-flight execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and get the same result or exception.
+    The work runs detached from any single caller, so one client
+    disconnecting does not cancel it for the others. Results are shared,
+    so callers must treat them as read-only.
+    """
+
+    def __init__(self, name: str, timeout: Optional[float] = None):
+        self.name = name
+        self.timeout = timeout
+        self.requests = 0
+        self.executions = 0
+        self.errors = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        _registry[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.requests += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(self._run(fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finished(key, t))
+        # shield: a waiter timing out or being cancelled must not cancel the shared task
+        return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+
+    async def _run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.wait_for(fn(), self.timeout)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        coalesced = self.requests - self.executions
+        return {
+            "requests": self.requests,
+            "executions": self.executions,
+            "coalesced": coalesced,
+            "coalescing_ratio": round(coalesced / self.requests, 4) if self.requests else 0.0,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+        }
+
+
+def singleflight_stats() -> dict:
+    return {name: flight.stats() for name, flight in _registry.items()}
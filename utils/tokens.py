@@ -28,7 +28,11 @@ def create_refresh_token(data: dict) -> str:
     return jwt.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_email(token: str = Depends(oauth2_scheme)) -> str:
+    """
+    The account a valid access token belongs to, without loading the user.
+    For hot endpoints that read only a projection of the user document.
+    """
     try:
         payload = jwt.decode(token, ACCESS_SECRET_KEY, algorithms=[ALGORITHM])
         email = payload.get("sub")
@@ -38,8 +42,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=401, detail="Access token has expired")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid access token")
+    return email
 
+
+async def get_current_user(email: str = Depends(get_current_email)):
     user = await users_collection.find_one({"email": email})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)):
+    # Back-office access is granted by setting role: "admin" on the user document
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user